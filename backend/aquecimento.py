@@ -0,0 +1,52 @@
+"""
+Aquecimento do processo antes da primeira requisição.
+
+`django.setup()` carrega os apps e os models, mas várias coisas só acontecem
+na primeira requisição: importar a URLconf e com ela todas as views,
+serializers e filtros, montar o cache de relações dos models, importar as
+classes padrão do DRF e ler os catálogos de tradução. `aquecer()` faz isso na
+inicialização (chamado em backend/wsgi.py e backend/asgi.py), então a primeira
+requisição de um worker novo custa o mesmo que as outras.
+
+Com `gunicorn --preload` o aquecimento acontece uma vez no processo mestre e
+os workers herdam tudo já carregado. Nenhuma conexão com o banco é aberta aqui.
+"""
+import logging
+import time
+from django.apps import apps
+from django.conf import settings
+from django.urls import get_resolver
+from django.utils import timezone, translation
+from rest_framework.settings import api_settings
+
+
+logger = logging.getLogger(__name__)
+
+CLASSES_DRF = [
+    'DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+    'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_PAGINATION_CLASS', 'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+]
+
+
+def aquecer():
+    """Carrega o que a primeira requisição carregaria; retorna o tempo gasto (ms)"""
+    inicio = time.perf_counter()
+    
+    # URLconf, views, serializers e filtros; reverse_dict monta o índice do reverse()
+    get_resolver().reverse_dict
+    
+    # Cache de campos e relações reversas de cada model
+    for model in apps.get_models():
+        model._meta.get_fields()
+    
+    for nome in CLASSES_DRF:
+        getattr(api_settings, nome)
+    
+    # Catálogos de tradução de todos os apps e o fuso horário
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('Not found.')
+    timezone.get_current_timezone()
+    
+    duracao = (time.perf_counter() - inicio) * 1000
+    logger.info('Aquecimento: %.0f ms', duracao)
+    return duracao
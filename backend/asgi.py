@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# URLconf, views e traduções carregadas antes da primeira requisição
+from backend.aquecimento import aquecer  # noqa: E402
+
+aquecer()
@@ -0,0 +1,141 @@
+"""
+Compressão negociada das respostas (gzip, brotli ou zstd).
+
+gzip usa a biblioteca padrão; brotli (`brotli`) e zstd (`zstandard`) são
+opcionais e só são oferecidos quando os pacotes estão instalados.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Codificador:
+    """
+    Base dos codificadores. `fluxo` comprime um iterável de chunks sem
+    acumular a resposta inteira, forçando um flush sempre que pelo menos
+    `tamanho_flush` bytes (não comprimidos) foram recebidos desde o último.
+    """
+    encoding = None
+    nivel_padrao = None
+    tamanho_flush = 16 * 1024
+    
+    def __init__(self, nivel):
+        self.nivel = nivel
+    
+    def comprimir(self, dados):
+        compressor = self.novo_compressor()
+        return self.processar(compressor, dados) + self.finalizar(compressor)
+    
+    def fluxo(self, chunks):
+        compressor = self.novo_compressor()
+        pendente = 0
+        for chunk in chunks:
+            dados = self.processar(compressor, chunk)
+            pendente += len(chunk)
+            if pendente >= self.tamanho_flush:
+                dados += self.flush(compressor)
+                pendente = 0
+            if dados:
+                yield dados
+        yield self.finalizar(compressor)
+    
+    def novo_compressor(self):
+        raise NotImplementedError
+    
+    def processar(self, compressor, dados):
+        raise NotImplementedError
+    
+    def flush(self, compressor):
+        raise NotImplementedError
+    
+    def finalizar(self, compressor):
+        raise NotImplementedError
+
+
+class Gzip(Codificador):
+    encoding = 'gzip'
+    nivel_padrao = 6
+    
+    def novo_compressor(self):
+        return zlib.compressobj(self.nivel, zlib.DEFLATED, 31)
+    
+    def processar(self, compressor, dados):
+        return compressor.compress(dados)
+    
+    def flush(self, compressor):
+        return compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finalizar(self, compressor):
+        return compressor.flush()
+
+
+class Brotli(Codificador):
+    encoding = 'br'
+    nivel_padrao = 4
+    
+    def novo_compressor(self):
+        return brotli.Compressor(quality=self.nivel)
+    
+    def processar(self, compressor, dados):
+        return compressor.process(dados)
+    
+    def flush(self, compressor):
+        return compressor.flush()
+    
+    def finalizar(self, compressor):
+        return compressor.finish()
+
+
+class Zstd(Codificador):
+    encoding = 'zstd'
+    nivel_padrao = 3
+    
+    def novo_compressor(self):
+        return zstandard.ZstdCompressor(level=self.nivel).compressobj()
+    
+    def processar(self, compressor, dados):
+        return compressor.compress(dados)
+    
+    def flush(self, compressor):
+        return compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    
+    def finalizar(self, compressor):
+        return compressor.flush()
+
+
+def codificadores_disponiveis():
+    """Codificadores suportados neste processo, em ordem de preferência"""
+    codificadores = []
+    if zstandard is not None:
+        codificadores.append(Zstd)
+    if brotli is not None:
+        codificadores.append(Brotli)
+    codificadores.append(Gzip)
+    return codificadores
+
+
+def parse_accept_encoding(cabecalho):
+    """Converte 'gzip;q=0.8, br' em {'gzip': 0.8, 'br': 1.0}"""
+    aceitos = {}
+    for parte in cabecalho.split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceitos[nome] = q
+    return aceitos
@@ -0,0 +1,152 @@
+"""
+Controle de concorrência otimista.
+
+Models com `Versionado` ganham a coluna `versao`. Todo save() de uma instância
+existente vira
+
+    UPDATE ... SET ..., versao = versao + 1 WHERE id = ? AND versao = ?
+
+com a versão lida junto com a instância. Se outra escrita chegou antes, nenhuma
+linha é atualizada e o save levanta ConflitoVersao. Nenhuma trava de linha fica
+aberta entre a leitura e a escrita.
+
+Na API a versão é o ETag (`"<versao>"`). O cliente devolve o ETag lido no
+cabeçalho If-Match das alterações; se o registro mudou desde então, a resposta
+é 412. Sem If-Match, vale a versão lida pela própria requisição.
+
+Colunas de projeção (`campos_projecao`, ex: o estoque do equipamento) são
+recalculadas por UPDATEs em massa que não mudam a versão: um movimento de
+estoque não invalida o ETag de quem está editando o cadastro. Em troca, o save
+só grava um grupo de projeção quando a instância alterou algum campo dele;
+sem alteração, o valor lido (possivelmente velho) não sobrescreve o recalculado.
+"""
+from django.db import models
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+class ConflitoVersao(Exception):
+    """O registro foi alterado por outra escrita desde que foi lido"""
+
+
+class VersaoDesatualizada(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'O registro foi alterado por outra requisição. Recarregue e tente novamente.'
+    default_code = 'versao_desatualizada'
+
+
+class Versionado(models.Model):
+    versao = models.PositiveIntegerField(default=1, editable=False, verbose_name="Versão")
+    
+    # Grupos de colunas de projeção; um grupo é gravado inteiro ou não é gravado
+    campos_projecao = ()
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._guardar_projecoes()
+        return instancia
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._guardar_projecoes(fields)
+    
+    def _guardar_projecoes(self, campos=None):
+        """Guarda os valores de projeção lidos (ou gravados) como base do próximo save"""
+        lidas = getattr(self, '_projecoes_lidas', {})
+        for grupo in self.campos_projecao:
+            for campo in grupo:
+                if campo in self.__dict__ and (campos is None or campo in campos):
+                    lidas[campo] = self.__dict__[campo]
+        self._projecoes_lidas = lidas
+    
+    def _projecoes_intactas(self):
+        """Campos dos grupos de projeção que a instância não alterou desde a leitura"""
+        lidas = getattr(self, '_projecoes_lidas', {})
+        intactas = set()
+        for grupo in self.campos_projecao:
+            if all(campo in lidas and getattr(self, campo) == lidas[campo] for campo in grupo):
+                intactas.update(grupo)
+        return intactas
+    
+    def _do_insert(self, *args, **kwargs):
+        resultado = super()._do_insert(*args, **kwargs)
+        self._guardar_projecoes()
+        return resultado
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        esperada = self.versao
+        campo = self._meta.get_field('versao')
+        intactas = self._projecoes_intactas()
+        values = [
+            valor for valor in values if valor[0] is not campo and valor[0].name not in intactas
+        ] + [(campo, None, esperada + 1)]
+        
+        if super()._do_update(base_qs.filter(versao=esperada), using, pk_val, values, update_fields, forced_update):
+            self.versao = esperada + 1
+            self._guardar_projecoes()
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConflitoVersao(f'{self._meta.label} #{pk_val} não está mais na versão {esperada}')
+        return False
+
+
+def etag(instancia):
+    return f'"{instancia.versao}"'
+
+
+def verificar_if_match(request, instancia):
+    """Levanta VersaoDesatualizada se o If-Match não corresponder à versão atual"""
+    cabecalho = request.headers.get('If-Match')
+    if not cabecalho or cabecalho.strip() == '*':
+        return
+    tags = [tag.strip().removeprefix('W/') for tag in cabecalho.split(',')]
+    if etag(instancia) not in tags:
+        raise VersaoDesatualizada()
+
+
+def resposta_conflito():
+    """Resposta 412 para as views de função (que tratam as próprias exceções)"""
+    return Response(
+        {'error': VersaoDesatualizada.default_detail},
+        status=status.HTTP_412_PRECONDITION_FAILED
+    )
+
+
+def com_etag(response, instancia):
+    if response.status_code < 300:
+        response['ETag'] = etag(instancia)
+    return response
+
+
+class VersaoMixin:
+    """
+    Para views genéricas de models Versionado: confere o If-Match nas
+    alterações, responde 412 em conflito e devolve o ETag da instância.
+    """
+    def get_object(self):
+        instancia = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            verificar_if_match(self.request, instancia)
+        # Com ?fields= sem a versão, a coluna não foi carregada: a resposta sai sem ETag
+        if 'versao' not in instancia.get_deferred_fields():
+            self.instancia_versionada = instancia
+        return instancia
+    
+    def perform_update(self, serializer):
+        try:
+            super().perform_update(serializer)
+        except ConflitoVersao:
+            raise VersaoDesatualizada()
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        instancia = getattr(self, 'instancia_versionada', None)
+        if instancia is not None:
+            com_etag(response, instancia)
+        return response
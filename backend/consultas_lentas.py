@@ -0,0 +1,214 @@
+"""
+Registro de consultas SQL lentas.
+
+`ConsultasLentasMiddleware` (backend/middleware.py) instala um execute_wrapper
+em cada requisição; as consultas acima de CONSULTAS_LENTAS_LIMITE_MS são
+gravadas no logger `consultas_lentas` (arquivo rotativo, ver LOGGING) e
+agrupadas em memória por fingerprint, com contagem, tempo total e a última
+ocorrência (view, pilha Python resumida, parâmetros mascarados e, opcionalmente,
+o EXPLAIN). Consultas com o mesmo SQL repetidas muitas vezes na mesma
+requisição são marcadas como suspeitas de N+1.
+
+O custo por consulta é só o cronômetro e a contagem pelo texto do SQL (já
+parametrizado); o fingerprint (regex + md5) só é calculado para as consultas
+que passam de um dos limites.
+"""
+import hashlib
+import logging
+import re
+import time
+import traceback
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .limite_queries import limite_queries
+
+
+logger = logging.getLogger('consultas_lentas')
+
+MAX_FINGERPRINTS = 500
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_PLACEHOLDER = re.compile(r'%s|\?')
+_RE_LISTA_IN = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_RE_ESPACOS = re.compile(r'\s+')
+
+
+def normalizar_sql(sql):
+    """Remove literais e parâmetros do SQL, deixando apenas a forma da consulta"""
+    sql = _RE_STRING.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_PLACEHOLDER.sub('?', sql)
+    sql = _RE_LISTA_IN.sub('(...)', sql)
+    return _RE_ESPACOS.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalizar_sql(sql).encode()).hexdigest()[:12]
+
+
+def mascarar_parametros(params):
+    """Mantém números, datas e nulos; demais valores viram apenas o tipo"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {chave: mascarar_parametros([valor])[0] for chave, valor in params.items()}
+    
+    mascarados = []
+    for valor in params:
+        if valor is None or isinstance(valor, (bool, int, float, Decimal, date, datetime)):
+            mascarados.append(valor if not isinstance(valor, (date, datetime)) else valor.isoformat())
+        elif isinstance(valor, (list, tuple)):
+            mascarados.append(mascarar_parametros(valor))
+        else:
+            mascarados.append(f'<{type(valor).__name__}>')
+    return mascarados
+
+
+def pilha_resumida(limite=8):
+    """Últimos frames da pilha que pertencem ao projeto (fora de site-packages e dos middlewares)"""
+    base = str(settings.BASE_DIR)
+    ignorados = (__file__, str(settings.BASE_DIR / 'backend' / 'middleware.py'))
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in ignorados
+    ]
+    return [
+        f'{frame.filename[len(base) + 1:]}:{frame.lineno} em {frame.name}'
+        for frame in frames[-limite:]
+    ]
+
+
+class RegistroConsultas:
+    """Agrupamento em memória das consultas lentas e suspeitas de N+1 por fingerprint"""
+    
+    def __init__(self):
+        self.grupos = {}
+    
+    def registrar(self, tipo, sql, duracao, ocorrencia, impressao=None):
+        chave = (tipo, impressao or fingerprint(sql))
+        grupo = self.grupos.get(chave)
+        if grupo is None:
+            if len(self.grupos) >= MAX_FINGERPRINTS:
+                return
+            grupo = self.grupos.setdefault(chave, {
+                'tipo': tipo,
+                'fingerprint': chave[1],
+                'sql': normalizar_sql(sql),
+                'ocorrencias': 0,
+                'tempo_total_ms': 0.0,
+                'tempo_max_ms': 0.0,
+                'views': {},
+                'ultima': None,
+            })
+        
+        grupo['ocorrencias'] += 1
+        grupo['tempo_total_ms'] += duracao
+        grupo['tempo_max_ms'] = max(grupo['tempo_max_ms'], duracao)
+        view = ocorrencia.get('view')
+        grupo['views'][view] = grupo['views'].get(view, 0) + 1
+        grupo['ultima'] = ocorrencia
+    
+    def listar(self):
+        return sorted(self.grupos.values(), key=lambda g: g['tempo_total_ms'], reverse=True)
+    
+    def limpar(self):
+        self.grupos.clear()
+
+
+registro_consultas = RegistroConsultas()
+
+
+class MonitorConsultas:
+    """execute_wrapper de uma requisição"""
+    
+    def __init__(self, request):
+        self.request = request
+        self.limite_ms = getattr(settings, 'CONSULTAS_LENTAS_LIMITE_MS', 100)
+        self.explain = getattr(settings, 'CONSULTAS_LENTAS_EXPLAIN', False)
+        self.limite_repeticoes = getattr(settings, 'CONSULTAS_LENTAS_N_MAIS_1', 10)
+        self.repeticoes = {}
+        self.executando_explain = False
+    
+    def __call__(self, execute, sql, params, many, context):
+        if self.executando_explain:
+            return execute(sql, params, many, context)
+        
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = (time.perf_counter() - inicio) * 1000
+            if duracao >= self.limite_ms:
+                self.registrar_lenta(sql, params, many, duracao, context)
+            if self.limite_repeticoes:
+                self.contar_repeticao(sql, duracao)
+    
+    def nome_view(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+    
+    def registrar_lenta(self, sql, params, many, duracao, context):
+        ocorrencia = {
+            'view': self.nome_view(),
+            'metodo': self.request.method,
+            'caminho': self.request.path,
+            'duracao_ms': round(duracao, 2),
+            'parametros': None if many else mascarar_parametros(params),
+            'pilha': pilha_resumida(),
+            'explain': None,
+        }
+        if self.explain and not many and sql.lstrip().upper().startswith('SELECT'):
+            ocorrencia['explain'] = self.obter_explain(context['connection'], sql, params)
+        
+        impressao = fingerprint(sql)
+        registro_consultas.registrar('lenta', sql, duracao, ocorrencia, impressao)
+        logger.warning(
+            'Consulta lenta (%.1f ms) em %s [%s]: %s | params=%s | pilha=%s',
+            duracao, ocorrencia['view'], impressao, sql,
+            ocorrencia['parametros'], ' <- '.join(reversed(ocorrencia['pilha'])),
+        )
+    
+    def contar_repeticao(self, sql, duracao):
+        # O SQL do Django já vem com placeholders: o N+1 repete o mesmo texto
+        quantidade, tempo = self.repeticoes.get(sql, (0, 0.0))
+        self.repeticoes[sql] = (quantidade + 1, tempo + duracao)
+        
+        # Registra uma vez por requisição, quando atinge o limite
+        if quantidade + 1 == self.limite_repeticoes:
+            registro_consultas.registrar('n_mais_1', sql, tempo + duracao, {
+                'view': self.nome_view(),
+                'metodo': self.request.method,
+                'caminho': self.request.path,
+                'repeticoes': quantidade + 1,
+                'pilha': pilha_resumida(),
+            })
+    
+    def obter_explain(self, connection, sql, params):
+        prefixo = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        self.executando_explain = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(prefixo + sql, params)
+                return [' '.join(str(coluna) for coluna in linha) for linha in cursor.fetchall()]
+        except Exception as e:
+            return [f'EXPLAIN indisponível: {e}']
+        finally:
+            self.executando_explain = False
+
+
+@limite_queries(1)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def consultas_lentas_view(request):
+    """Consultas lentas e suspeitas de N+1 agrupadas por fingerprint (apenas staff)"""
+    if request.method == 'DELETE':
+        registro_consultas.limpar()
+        return Response(status=204)
+    return Response(registro_consultas.listar())
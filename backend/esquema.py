@@ -0,0 +1,152 @@
+"""
+Esquema OpenAPI pré-calculado.
+
+Gerar o esquema com o drf-yasg percorre todas as views e serializers (centenas
+de ms de CPU). Por isso ele é gerado uma vez por versão do código:
+
+1. no build/deploy, `python manage.py gerar_esquema` grava ESQUEMA_OPENAPI_ARQUIVO
+   com a versão do código em `x-versao-codigo`;
+2. cada processo carrega o arquivo na primeira requisição (se a versão bater)
+   e guarda em memória o documento já serializado em JSON e YAML;
+3. sem arquivo, ou com um arquivo de outra versão, o esquema é gerado no
+   próprio processo, uma vez, e fica em memória do mesmo jeito.
+
+A versão do código é VERSAO_CODIGO (ex: o commit, definido no deploy) ou, sem
+ela, um hash dos fontes Python do projeto e das versões das bibliotecas que
+definem o esquema.
+
+O esquema não depende da requisição: não traz `host` nem `schemes`, e o
+Swagger UI e o ReDoc usam o endereço da própria página.
+"""
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+from importlib import metadata
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, yaml_dump
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger(__name__)
+
+INFO = openapi.Info(
+    title="Reflex Som API",
+    default_version='v1',
+    description="API para o sistema de locação de equipamentos da Reflex Som",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contato@reflexsom.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+CHAVE_VERSAO = 'x-versao-codigo'
+
+# Formato do renderer do drf-yasg -> documento servido
+FORMATOS = {'json': 'json', 'openapi': 'json', 'yaml': 'yaml'}
+
+# Bibliotecas cuja versão muda o esquema gerado
+BIBLIOTECAS = ['Django', 'djangorestframework', 'drf-yasg', 'django-filter']
+
+# Documento serializado por formato ('json', 'yaml') da versão atual
+_documentos = {}
+
+
+@lru_cache(maxsize=None)
+def versao_codigo():
+    if settings.VERSAO_CODIGO:
+        return settings.VERSAO_CODIGO
+    
+    resumo = hashlib.sha256()
+    for biblioteca in BIBLIOTECAS:
+        resumo.update(f'{biblioteca}=={metadata.version(biblioteca)}\n'.encode())
+    # Pacotes do projeto (diretórios com __init__.py na raiz), em ordem estável
+    pacotes = sorted(caminho.parent for caminho in settings.BASE_DIR.glob('*/__init__.py'))
+    for pacote in pacotes:
+        for arquivo in sorted(pacote.rglob('*.py')):
+            resumo.update(str(arquivo.relative_to(settings.BASE_DIR)).encode())
+            resumo.update(arquivo.read_bytes())
+    return resumo.hexdigest()[:16]
+
+
+def gerar():
+    """Gera o esquema completo (lento); retorna o dict com a versão do código"""
+    # Requisição anônima simulada, como no `generate_swagger` do drf-yasg: as views leem request.user
+    requisicao = APIView().initialize_request(APIRequestFactory().get('/swagger.json'))
+    gerador = swagger_settings.DEFAULT_GENERATOR_CLASS(INFO)
+    documento = json.loads(OpenAPICodecJson([]).encode(gerador.get_schema(request=requisicao, public=True)))
+    # O endereço vem da página que carrega o esquema, não da requisição simulada
+    documento.pop('host', None)
+    documento.pop('schemes', None)
+    documento[CHAVE_VERSAO] = versao_codigo()
+    return documento
+
+
+def gravar(caminho=None):
+    """Gera o esquema e grava em `caminho` (ESQUEMA_OPENAPI_ARQUIVO); retorna o documento"""
+    caminho = caminho or settings.ESQUEMA_OPENAPI_ARQUIVO
+    documento = gerar()
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+    # Troca atômica: processos lendo o arquivo nunca veem um JSON pela metade
+    os.replace(temporario, caminho)
+    _documentos.clear()
+    return documento
+
+
+def ler_arquivo():
+    try:
+        with open(settings.ESQUEMA_OPENAPI_ARQUIVO, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def carregar():
+    """O documento do arquivo, se for da versão atual; senão gera no processo"""
+    documento = ler_arquivo()
+    if documento.get(CHAVE_VERSAO) == versao_codigo():
+        return documento
+    logger.warning(
+        'Esquema OpenAPI %s ausente ou de outra versão do código; gerando no processo '
+        '(rode `manage.py gerar_esquema` no deploy)', settings.ESQUEMA_OPENAPI_ARQUIVO
+    )
+    return gerar()
+
+
+def obter(formato='json'):
+    """Bytes do esquema em 'json' ou 'yaml', gerados no máximo uma vez por versão do código"""
+    chave = (versao_codigo(), formato)
+    if chave not in _documentos:
+        documento = carregar()
+        _documentos[versao_codigo(), 'json'] = json.dumps(documento, ensure_ascii=False).encode()
+        _documentos[versao_codigo(), 'yaml'] = yaml_dump(documento, binary=True)
+    return _documentos[chave]
+
+
+class EsquemaView(get_schema_view(INFO, public=True, permission_classes=(permissions.AllowAny,))):
+    """
+    Serve o esquema de `obter` em /swagger.json e no `?format=openapi` que o
+    Swagger UI e o ReDoc buscam, com ETag da versão do código. As páginas do
+    Swagger UI e do ReDoc continuam com o drf-yasg (não percorrem as views).
+    """
+    def get(self, request, version='', format=None):
+        renderer = request.accepted_renderer
+        if renderer.format not in FORMATOS:
+            return super().get(request, version, format)
+        
+        etag = f'"{versao_codigo()}"'
+        nao_modificado = get_conditional_response(request, etag=etag)
+        if nao_modificado is not None:
+            return nao_modificado
+        response = HttpResponse(obter(FORMATOS[renderer.format]), content_type=f'{renderer.media_type}; charset=utf-8')
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,73 @@
+"""
+Medição do tempo de inicialização de um processo (cold start).
+
+`medir()` roda `django.setup()` (e o aquecimento de backend/aquecimento.py) num
+interpretador novo com `python -X importtime`, para que nada já importado pelo
+processo atual esconda o custo real. Devolve os tempos, os módulos carregados
+e o custo de cada import, usados pelo comando `perfil_inicializacao` (que
+compara o perfil API com INICIALIZACAO_META_MS) e pelo teste que confere os
+módulos que o perfil API não carrega.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+
+
+SCRIPT = '''
+import json, sys, time
+inicio = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+setup = time.perf_counter()
+if {aquecer}:
+    from backend.aquecimento import aquecer
+    aquecer()
+fim = time.perf_counter()
+print(json.dumps({{
+    'setup_ms': (setup - inicio) * 1000,
+    'aquecimento_ms': (fim - setup) * 1000,
+    'total_ms': (fim - inicio) * 1000,
+    'modulos': sorted(sys.modules),
+}}))
+'''
+
+
+def ler_importtime(saida):
+    """[(modulo, proprio_us, acumulado_us, profundidade)] das linhas `import time:` do -X importtime"""
+    importacoes = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, nome = linha.removeprefix('import time:').split('|')
+        profundidade = (len(nome) - len(nome.lstrip())) // 2
+        importacoes.append((nome.strip(), int(proprio), int(acumulado), profundidade))
+    return importacoes
+
+
+def por_pacote(importacoes):
+    """{pacote de topo: tempo próprio somado (us)}, do mais caro ao mais barato"""
+    totais = defaultdict(int)
+    for nome, proprio, _, _ in importacoes:
+        totais[nome.split('.')[0]] += proprio
+    return dict(sorted(totais.items(), key=lambda item: -item[1]))
+
+
+def medir(perfil='completo', aquecer=True):
+    """Inicializa o projeto num processo novo com DJANGO_PERFIL=`perfil`; retorna as medições"""
+    ambiente = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+        'DJANGO_PERFIL': perfil,
+    }
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT.format(aquecer=aquecer)],
+        cwd=settings.BASE_DIR, env=ambiente, capture_output=True, text=True, check=True,
+    )
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+    resultado['importacoes'] = ler_importtime(processo.stderr)
+    return resultado
@@ -0,0 +1,62 @@
+"""
+Orçamento de queries por requisição.
+
+Cada view declara o máximo de queries SQL que uma requisição pode executar,
+independente do volume de dados (páginas maiores, orçamentos com mais itens):
+
+    @limite_queries(6)
+    @api_view(['POST'])
+    def finalizar_orcamento(request, orcamento_id): ...
+
+    class OrcamentoListView(generics.ListAPIView):
+        limite_queries = 4
+
+O MetricasMiddleware compara o limite com as queries contadas e age conforme
+LIMITE_QUERIES_MODO: 'erro' levanta LimiteQueriesExcedido (testes), 'aviso'
+registra no log e na métrica `db_limite_queries_excedido_total` (staging e
+produção) e vazio desliga a verificação.
+"""
+import logging
+from django.conf import settings
+
+
+logger = logging.getLogger('consultas_lentas')
+
+
+class LimiteQueriesExcedido(AssertionError):
+    pass
+
+
+def limite_queries(maximo):
+    """Declara o limite de queries de uma view (função ou classe)"""
+    def decorador(view):
+        view.limite_queries = maximo
+        return view
+    return decorador
+
+
+def limite_da_view(func):
+    """Limite declarado para a view resolvida (função, APIView ou view genérica do Django)"""
+    limite = getattr(func, 'limite_queries', None)
+    if limite is None:
+        classe = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+        limite = getattr(classe, 'limite_queries', None)
+    return limite
+
+
+def verificar_limite(request, queries):
+    """Retorna True se a requisição excedeu o limite da view (ver LIMITE_QUERIES_MODO)"""
+    modo = getattr(settings, 'LIMITE_QUERIES_MODO', 'aviso')
+    match = request.resolver_match
+    if not modo or match is None:
+        return False
+    
+    limite = limite_da_view(match.func)
+    if limite is None or queries <= limite:
+        return False
+    
+    mensagem = f'{match.view_name} {request.method} executou {queries} queries (limite {limite})'
+    if modo == 'erro':
+        raise LimiteQueriesExcedido(mensagem)
+    logger.warning('limite_queries %s', mensagem)
+    return True
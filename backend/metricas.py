@@ -0,0 +1,253 @@
+"""
+Métricas por rota no formato texto do Prometheus.
+
+Os contadores ficam em memória no próprio processo e são atualizados sem
+locks (a contagem pode perder incrementos raros sob threads concorrentes, o
+que é aceitável para métricas). Com vários workers (gunicorn), defina
+METRICAS_DIR_MULTIPROCESSO: cada processo grava periodicamente um snapshot
+`<pid>.json` nesse diretório e o endpoint `/metrics` soma todos os arquivos.
+
+O snapshot de um processo que terminou é somado a `acumulado.json` e apagado
+(na próxima leitura do `/metrics`, ou quando um processo novo recebe o mesmo
+PID), então o diretório não cresce com os reinícios dos workers e os
+contadores dos processos encerrados não se perdem. O diretório deve ser local
+à máquina: a verificação de processo vivo usa os PIDs do próprio host.
+
+Jobs (comandos e tarefas) usam `registro.incrementar` para contadores sem
+rota. Só aparecem no `/metrics` dos workers web no modo multiprocesso, em que
+o snapshot do processo do job fica no diretório compartilhado.
+"""
+import hmac
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from .limite_queries import limite_queries
+
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTADORES = (
+    ('requisicoes', 'http_requisicoes_total', 'Total de requisições'),
+    ('queries', 'db_queries_total', 'Queries SQL executadas'),
+    ('queries_segundos', 'db_queries_segundos_total', 'Tempo gasto em queries SQL'),
+    ('serializacao_segundos', 'serializacao_segundos_total', 'Tempo gasto renderizando a resposta'),
+    ('bytes_resposta', 'http_resposta_bytes_total', 'Bytes enviados no corpo das respostas'),
+    ('erros', 'http_erros_total', 'Respostas com status 5xx'),
+    ('limite_excedido', 'db_limite_queries_excedido_total', 'Requisições acima do limite de queries da view'),
+)
+
+ARQUIVO_ACUMULADO = 'acumulado.json'
+
+
+class SerieRota:
+    """Contadores de uma combinação (rota, método)"""
+    __slots__ = ['requisicoes', 'latencia_soma', 'buckets', 'queries', 'queries_segundos',
+                 'serializacao_segundos', 'bytes_resposta', 'erros', 'limite_excedido']
+    
+    def __init__(self):
+        self.requisicoes = 0
+        self.latencia_soma = 0.0
+        self.buckets = [0] * (len(BUCKETS_LATENCIA) + 1)
+        self.queries = 0
+        self.queries_segundos = 0.0
+        self.serializacao_segundos = 0.0
+        self.bytes_resposta = 0
+        self.erros = 0
+        self.limite_excedido = 0
+    
+    def como_dict(self):
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+
+class Registro:
+    def __init__(self):
+        self.series = {}
+        self.contadores = {}  # nome -> [valor, descrição]
+        self.ultimo_snapshot = 0.0
+        self.pid_snapshot = None
+    
+    def registrar(self, rota, metodo, status, latencia, queries, queries_segundos,
+                  serializacao_segundos, bytes_resposta, excedeu_limite=False):
+        serie = self.series.get((rota, metodo))
+        if serie is None:
+            serie = self.series.setdefault((rota, metodo), SerieRota())
+        
+        serie.requisicoes += 1
+        serie.latencia_soma += latencia
+        serie.buckets[bisect_left(BUCKETS_LATENCIA, latencia)] += 1
+        serie.queries += queries
+        serie.queries_segundos += queries_segundos
+        serie.serializacao_segundos += serializacao_segundos
+        serie.bytes_resposta += bytes_resposta
+        if status >= 500:
+            serie.erros += 1
+        if excedeu_limite:
+            serie.limite_excedido += 1
+        
+        self.gravar_snapshot()
+    
+    def incrementar(self, nome, valor=1, descricao=''):
+        """Contador avulso (sem rota), ex: linhas apagadas por um job"""
+        contador = self.contadores.setdefault(nome, [0, descricao])
+        contador[0] += valor
+        self.gravar_snapshot(forcar=True)
+    
+    def gravar_snapshot(self, forcar=False):
+        """Grava o snapshot do processo para agregação multiprocesso (no máximo 1x por segundo)"""
+        diretorio = getattr(settings, 'METRICAS_DIR_MULTIPROCESSO', None)
+        agora = time.monotonic()
+        if not diretorio or (not forcar and agora - self.ultimo_snapshot < 1.0):
+            return
+        self.ultimo_snapshot = agora
+        
+        pid = os.getpid()
+        destino = Path(diretorio) / f'{pid}.json'
+        if self.pid_snapshot != pid:
+            # Um arquivo com o nosso PID antes da primeira gravação é de um processo que já terminou
+            if destino.exists():
+                incorporar(Path(diretorio), destino)
+            self.pid_snapshot = pid
+        series = [[rota, metodo, serie.como_dict()] for (rota, metodo), serie in list(self.series.items())]
+        gravar_json(destino, {'series': series, 'contadores': self.contadores})
+    
+    def agregado(self):
+        """(séries, contadores) deste processo ou, no modo multiprocesso, a soma de todos os processos"""
+        diretorio = getattr(settings, 'METRICAS_DIR_MULTIPROCESSO', None)
+        if not diretorio:
+            series = {chave: serie.como_dict() for chave, serie in list(self.series.items())}
+            return series, {nome: list(contador) for nome, contador in list(self.contadores.items())}
+        
+        self.gravar_snapshot(forcar=True)
+        diretorio = Path(diretorio)
+        for arquivo in diretorio.glob('*.json'):
+            if arquivo.stem.isdigit() and not processo_vivo(int(arquivo.stem)):
+                incorporar(diretorio, arquivo)
+        
+        total = {}
+        contadores = {}
+        for arquivo in diretorio.glob('*.json'):
+            snapshot = ler_snapshot(arquivo)
+            if snapshot is not None:
+                somar_snapshot(total, contadores, snapshot)
+        return total, contadores
+
+
+def processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def gravar_json(destino, dados):
+    """Grava de forma atômica (quem lê nunca vê um arquivo pela metade)"""
+    temporario = destino.with_suffix('.tmp')
+    temporario.write_text(json.dumps(dados))
+    os.replace(temporario, destino)
+
+
+def ler_snapshot(arquivo):
+    """{'series': [...], 'contadores': {...}} do arquivo, ou None se ele sumiu ou está ilegível"""
+    try:
+        snapshot = json.loads(arquivo.read_text())
+    except (OSError, ValueError):
+        return None
+    if isinstance(snapshot, list):
+        # Formato anterior: só as séries
+        snapshot = {'series': snapshot, 'contadores': {}}
+    return snapshot
+
+
+def somar_snapshot(total, contadores, snapshot):
+    """Acumula o snapshot em `total` ({(rota, método): valores}) e `contadores`"""
+    for nome, (valor, descricao) in snapshot['contadores'].items():
+        contadores.setdefault(nome, [0, descricao])[0] += valor
+    for rota, metodo, valores in snapshot['series']:
+        acumulado = total.setdefault((rota, metodo), SerieRota().como_dict())
+        for nome, valor in valores.items():
+            if nome == 'buckets':
+                acumulado[nome] = [a + b for a, b in zip(acumulado[nome], valor)]
+            else:
+                acumulado[nome] += valor
+
+
+def incorporar(diretorio, arquivo):
+    """Soma o snapshot de um processo encerrado ao acumulado.json e apaga o arquivo dele"""
+    import fcntl  # só no modo multiprocesso (gunicorn, Unix)
+    
+    with open(diretorio / 'acumulado.lock', 'w') as trava:
+        # Leituras concorrentes do /metrics: só uma incorpora cada arquivo
+        fcntl.flock(trava, fcntl.LOCK_EX)
+        snapshot = ler_snapshot(arquivo)
+        if snapshot is None:
+            return
+        destino = diretorio / ARQUIVO_ACUMULADO
+        acumulado = ler_snapshot(destino) or {'series': [], 'contadores': {}}
+        total = {(rota, metodo): valores for rota, metodo, valores in acumulado['series']}
+        contadores = acumulado['contadores']
+        somar_snapshot(total, contadores, snapshot)
+        gravar_json(destino, {
+            'series': [[rota, metodo, valores] for (rota, metodo), valores in total.items()],
+            'contadores': contadores,
+        })
+        arquivo.unlink()
+
+
+registro = Registro()
+
+
+def _rotulos(rota, metodo, **extras):
+    rotulos = {'rota': rota, 'metodo': metodo, **extras}
+    return ','.join(f'{nome}="{valor}"' for nome, valor in rotulos.items())
+
+
+def exportar_prometheus():
+    """Formata as métricas no formato de exposição texto do Prometheus"""
+    series, contadores = registro.agregado()
+    series = sorted(series.items())
+    linhas = []
+    
+    linhas.append('# HELP http_latencia_segundos Latência das requisições por rota')
+    linhas.append('# TYPE http_latencia_segundos histogram')
+    for (rota, metodo), valores in series:
+        acumulado = 0
+        for limite, quantidade in zip(BUCKETS_LATENCIA + ('+Inf',), valores['buckets']):
+            acumulado += quantidade
+            linhas.append(f'http_latencia_segundos_bucket{{{_rotulos(rota, metodo, le=limite)}}} {acumulado}')
+        linhas.append(f'http_latencia_segundos_sum{{{_rotulos(rota, metodo)}}} {valores["latencia_soma"]}')
+        linhas.append(f'http_latencia_segundos_count{{{_rotulos(rota, metodo)}}} {valores["requisicoes"]}')
+    
+    for campo, nome, descricao in CONTADORES:
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} counter')
+        for (rota, metodo), valores in series:
+            linhas.append(f'{nome}{{{_rotulos(rota, metodo)}}} {valores[campo]}')
+    
+    for nome, (valor, descricao) in sorted(contadores.items()):
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} counter')
+        linhas.append(f'{nome} {valor}')
+    
+    return '\n'.join(linhas) + '\n'
+
+
+@limite_queries(0)
+def metricas_view(request):
+    """
+    Endpoint /metrics; exige `Authorization: Bearer <METRICAS_TOKEN>` se o token
+    estiver definido. Em produção sem token o endpoint fica fechado.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if not token:
+        if settings.PRODUCAO:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), f'Bearer {token}'.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(exportar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,208 @@
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from .compressao import codificadores_disponiveis, parse_accept_encoding
+from .metricas import registro
+from .consultas_lentas import MonitorConsultas
+from .limite_queries import verificar_limite
+from .roteamento import (
+    COOKIE_PRIMARIO, fixar_usuario_no_primario, id_usuario_jwt, liberar_replica, replica_configurada, restaurar,
+    usuario_no_primario, verificar_cache_compartilhado,
+)
+
+
+class CompressaoMiddleware:
+    """
+    Comprime as respostas com gzip, brotli ou zstd conforme o `Accept-Encoding`.
+    
+    - Respostas menores que COMPRESSAO_TAMANHO_MINIMO não são comprimidas.
+    - Respostas que já têm Content-Encoding, parciais (206) ou de tipos já
+      comprimidos (imagens, vídeos, zip...) são mantidas como estão.
+    - StreamingHttpResponse é comprimida chunk a chunk (sem acumular a resposta),
+      com flush periódico para não atrasar a entrega ao cliente. Streams
+      assíncronos e text/event-stream não são comprimidos.
+    """
+    
+    tipos_ignorados = (
+        'image/', 'video/', 'audio/', 'font/woff',
+        'application/zip', 'application/gzip', 'application/x-gzip',
+        'application/pdf', 'text/event-stream',
+    )
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tamanho_minimo = getattr(settings, 'COMPRESSAO_TAMANHO_MINIMO', 1024)
+        niveis = getattr(settings, 'COMPRESSAO_NIVEIS', {})
+        self.codificadores = [
+            codificador(niveis.get(codificador.encoding, codificador.nivel_padrao))
+            for codificador in codificadores_disponiveis()
+        ]
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        
+        if not self.pode_comprimir(response):
+            return response
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        
+        codificador = self.negociar(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificador is None:
+            return response
+        
+        if response.streaming:
+            response.streaming_content = codificador.fluxo(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            comprimido = codificador.comprimir(response.content)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+        
+        # ETag forte passa a ser fraca, como no GZipMiddleware do Django
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificador.encoding
+        
+        return response
+    
+    def pode_comprimir(self, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return False
+        
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(self.tipos_ignorados):
+            return False
+        
+        if response.streaming:
+            return not response.is_async
+        return len(response.content) >= self.tamanho_minimo
+    
+    def negociar(self, accept_encoding):
+        """Escolhe o codificador de maior q aceito pelo cliente (empate: ordem de preferência)"""
+        aceitos = parse_accept_encoding(accept_encoding)
+        melhor, melhor_q = None, 0.0
+        for codificador in self.codificadores:
+            q = aceitos.get(codificador.encoding, aceitos.get('*', 0.0))
+            if q > melhor_q:
+                melhor, melhor_q = codificador, q
+        return melhor
+
+
+class ContadorQueries:
+    """execute_wrapper que conta as queries e o tempo gasto nelas"""
+    
+    def __init__(self):
+        self.queries = 0
+        self.segundos = 0.0
+    
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.segundos += time.perf_counter() - inicio
+
+
+class MetricasMiddleware:
+    """
+    Registra, por rota (nome da URL) e método: latência, número e tempo de
+    queries, tempo de renderização da resposta e bytes enviados.
+    As métricas são expostas em /metrics (ver backend/metricas.py).
+    Também verifica o limite de queries da view (ver backend/limite_queries.py).
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        contador = ContadorQueries()
+        request._metricas_serializacao = 0.0
+        
+        with ExitStack() as stack:
+            for conexao in connections.all():
+                stack.enter_context(conexao.execute_wrapper(contador))
+            response = self.get_response(request)
+        
+        match = request.resolver_match
+        registro.registrar(
+            rota=match.view_name if match else 'nao_resolvida',
+            metodo=request.method,
+            status=response.status_code,
+            latencia=time.perf_counter() - inicio,
+            queries=contador.queries,
+            queries_segundos=contador.segundos,
+            serializacao_segundos=request._metricas_serializacao,
+            bytes_resposta=0 if response.streaming else len(response.content),
+            excedeu_limite=verificar_limite(request, contador.queries),
+        )
+        return response
+    
+    def process_template_response(self, request, response):
+        """Mede o tempo de renderização das respostas do DRF"""
+        inicio = time.perf_counter()
+        
+        def fim_renderizacao(response):
+            request._metricas_serializacao += time.perf_counter() - inicio
+        
+        response.add_post_render_callback(fim_renderizacao)
+        return response
+
+
+class ConsultasLentasMiddleware:
+    """Monitora as consultas de cada requisição (ver backend/consultas_lentas.py)"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        monitor = MonitorConsultas(request)
+        with ExitStack() as stack:
+            for conexao in connections.all():
+                stack.enter_context(conexao.execute_wrapper(monitor))
+            return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """
+    Libera leituras na réplica para requisições seguras sem escrita recente do
+    usuário ou do navegador e, após escritas, fixa os dois no primário
+    (ver backend/roteamento.py).
+    """
+    
+    metodos_seguros = ('GET', 'HEAD', 'OPTIONS')
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        verificar_cache_compartilhado()
+    
+    def __call__(self, request):
+        if not replica_configurada():
+            return self.get_response(request)
+        
+        leitura = request.method in self.metodos_seguros
+        token = liberar_replica(leitura and not self.escreveu_recentemente(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            restaurar(token)
+        
+        if not leitura:
+            # O DRF grava em request.user o usuário que autenticou (JWT ou sessão)
+            usuario = getattr(request, 'user', None)
+            if usuario is not None and usuario.is_authenticated:
+                fixar_usuario_no_primario(usuario.pk)
+            response.set_cookie(
+                COOKIE_PRIMARIO, '1', max_age=settings.REPLICA_JANELA_PRIMARIO,
+                httponly=True, samesite='Lax',
+            )
+        return response
+    
+    def escreveu_recentemente(self, request):
+        return COOKIE_PRIMARIO in request.COOKIES or usuario_no_primario(id_usuario_jwt(request))
@@ -0,0 +1,39 @@
+"""
+Paginação do admin para tabelas grandes.
+
+A listagem do admin conta as linhas a cada página. Sem filtros isso é um
+COUNT(*) da tabela inteira. Acima de ADMIN_CONTAGEM_ESTIMADA_MINIMO linhas,
+`PaginadorEstimado` usa a estimativa que o PostgreSQL mantém em
+pg_class.reltuples (atualizada pelo autovacuum/ANALYZE), que custa uma leitura
+de catálogo. Com filtros ou busca, e em outros bancos, a contagem é exata.
+
+Use junto com `show_full_result_count = False`, que dispensa o segundo COUNT(*)
+("N de M resultados") das listagens filtradas.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimar_linhas(queryset):
+    """Linhas estimadas da tabela do queryset sem filtros (PostgreSQL), ou None"""
+    conexao = connections[queryset.db]
+    if conexao.vendor != 'postgresql' or queryset.query.where or queryset.query.distinct:
+        return None
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table]
+        )
+        linha = cursor.fetchone()
+    # -1: tabela ainda não analisada
+    return linha[0] if linha and linha[0] >= 0 else None
+
+
+class PaginadorEstimado(Paginator):
+    @cached_property
+    def count(self):
+        estimativa = estimar_linhas(self.object_list)
+        if estimativa is not None and estimativa >= settings.ADMIN_CONTAGEM_ESTIMADA_MINIMO:
+            return estimativa
+        return super().count
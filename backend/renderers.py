@@ -0,0 +1,83 @@
+"""
+Renderers e parsers alternativos para a API.
+
+- ORJSONRenderer / ORJSONParser: JSON via orjson, com a mesma saída do
+  JSONRenderer padrão do DRF (Decimal e datetime passam pelo encoder do DRF).
+- MessagePackRenderer / MessagePackParser: `application/msgpack`, escolhido
+  pelo cliente via cabeçalho `Accept` / `Content-Type`.
+
+orjson e msgpack são opcionais; settings.py só registra estas classes quando
+os pacotes estão instalados.
+"""
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer com codificação via orjson"""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        
+        # orjson só gera JSON compacto em UTF-8; demais formatos usam o renderer padrão
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        
+        # Mesmo escape de \u2028 e \u2029 feito pelo JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONParser(parsers.JSONParser):
+    """JSONParser com decodificação via orjson"""
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Serializa a resposta em MessagePack"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = encoders.JSONEncoder
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Lê requisições enviadas em MessagePack"""
+    media_type = 'application/msgpack'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
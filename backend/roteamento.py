@@ -0,0 +1,115 @@
+"""
+Roteamento de leituras para a réplica.
+
+Com DB_REPLICA_HOST (PostgreSQL) ou DB_REPLICA_NAME (SQLite) definidos, o
+settings cria o alias `replica` e ativa o RoteadorReplica. As leituras só vão
+para a réplica dentro de requisições seguras (GET/HEAD/OPTIONS) liberadas
+pelo ReplicaMiddleware; todo o resto (comandos, jobs, shell) usa o primário.
+
+Dentro de uma requisição liberada, as leituras voltam ao primário quando:
+- há uma transação aberta no primário (ex: criar_reserva_do_orcamento);
+- a requisição já escreveu algo (o restante dela fica no primário).
+
+Para que o cliente leia as próprias escritas mesmo com atraso de replicação,
+depois de uma requisição de escrita o middleware fixa no primário, por
+REPLICA_JANELA_PRIMARIO segundos:
+- o usuário autenticado, numa chave do cache (`replica:usuario:<id>`); as
+  leituras seguintes com o JWT desse usuário vão ao primário, de qualquer
+  origem e sem depender de cookies (o frontend chama a API cross-origin);
+- o navegador, com o cookie `usar_primario` (admin e clientes na mesma origem).
+
+Com vários workers a chave precisa de um cache compartilhado (DJANGO_CACHE_URL,
+obrigatório em produção): com o LocMemCache, a próxima requisição pode cair num
+worker que não vê a marcação e ler da réplica. O ReplicaMiddleware avisa na
+inicialização quando há réplica e o cache é local ao processo.
+"""
+import logging
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+logger = logging.getLogger(__name__)
+
+ALIAS_PRIMARIO = 'default'
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIO = 'usar_primario'
+CHAVE_USUARIO_PRIMARIO = 'replica:usuario:{}'
+
+_replica_liberada = ContextVar('replica_liberada', default=False)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def verificar_cache_compartilhado():
+    """Avisa (e retorna False) se há réplica mas o cache padrão é local a cada processo"""
+    if replica_configurada() and isinstance(caches['default'], LocMemCache):
+        logger.warning(
+            'Réplica configurada com LocMemCache: com vários workers a leitura das próprias escritas '
+            'não é garantida. Defina DJANGO_CACHE_URL (Redis ou Memcached).'
+        )
+        return False
+    return True
+
+
+def liberar_replica(liberada=True):
+    """Libera (ou não) leituras na réplica no contexto atual; retorna o token para `restaurar`"""
+    return _replica_liberada.set(liberada)
+
+
+def restaurar(token):
+    _replica_liberada.reset(token)
+
+
+def fixar_primario():
+    """Envia as próximas leituras do contexto atual ao primário"""
+    _replica_liberada.set(False)
+
+
+def id_usuario_jwt(request):
+    """Id do usuário do JWT da requisição (assinatura e validade conferidas, sem acessar o banco)"""
+    autenticacao = JWTAuthentication()
+    cabecalho = autenticacao.get_header(request)
+    bruto = autenticacao.get_raw_token(cabecalho) if cabecalho else None
+    if bruto is None:
+        return None
+    try:
+        return autenticacao.get_validated_token(bruto).get(jwt_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+def fixar_usuario_no_primario(id_usuario):
+    """Leituras do usuário vão ao primário pelos próximos REPLICA_JANELA_PRIMARIO segundos"""
+    cache.set(CHAVE_USUARIO_PRIMARIO.format(id_usuario), True, settings.REPLICA_JANELA_PRIMARIO)
+
+
+def usuario_no_primario(id_usuario):
+    return id_usuario is not None and cache.get(CHAVE_USUARIO_PRIMARIO.format(id_usuario), False)
+
+
+class RoteadorReplica:
+    def db_for_read(self, model, **hints):
+        if not _replica_liberada.get() or not replica_configurada():
+            return ALIAS_PRIMARIO
+        if connections[ALIAS_PRIMARIO].in_atomic_block:
+            return ALIAS_PRIMARIO
+        return ALIAS_REPLICA
+    
+    def db_for_write(self, model, **hints):
+        fixar_primario()
+        return ALIAS_PRIMARIO
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e primário têm os mesmos dados
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == ALIAS_PRIMARIO
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
+from django.core.exceptions import ImproperlyConfigured
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,13 +24,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
+# Perfil do ambiente: DJANGO_AMBIENTE=producao muda os padrões abaixo
+# (DEBUG desligado, PostgreSQL, SECRET_KEY, ALLOWED_HOSTS e cache compartilhado obrigatórios)
+PRODUCAO = os.environ.get('DJANGO_AMBIENTE', 'desenvolvimento') == 'producao'
+
+# Perfil do processo: DJANGO_PERFIL=api para workers que só servem a API
+# (sem admin, Swagger/ReDoc e arquivos estáticos; inicializam mais rápido)
+PERFIL_API = os.environ.get('DJANGO_PERFIL', 'completo') == 'api'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-pbl$k45@w@_0l)frvf#b8vfdy08v0b*k=&rlumgrvd9hf^4cq&'
+if PRODUCAO:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+else:
+    SECRET_KEY = os.environ.get(
+        'DJANGO_SECRET_KEY', 'django-insecure-pbl$k45@w@_0l)frvf#b8vfdy08v0b*k=&rlumgrvd9hf^4cq&'
+    )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '0' if PRODUCAO else '1') == '1'
 
-ALLOWED_HOSTS = ['*']
+# Em produção sem padrão: '*' aceitaria qualquer cabeçalho Host
+if PRODUCAO:
+    ALLOWED_HOSTS = os.environ['DJANGO_ALLOWED_HOSTS'].split(',')
+else:
+    ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', '*').split(',')
 
 
 # Application definition
@@ -49,10 +70,16 @@ INSTALLED_APPS = [
     # Local apps
     'clientes',
     'equipamentos',
+    'tarefas',
+    'idempotencia',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'backend.middleware.MetricasMiddleware',
+    'backend.middleware.ReplicaMiddleware',
+    'backend.middleware.ConsultasLentasMiddleware',
+    'backend.middleware.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +89,56 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Compressão das respostas (backend.middleware.CompressaoMiddleware)
+COMPRESSAO_TAMANHO_MINIMO = 1024  # bytes
+COMPRESSAO_NIVEIS = {
+    'gzip': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+# Métricas Prometheus (backend.middleware.MetricasMiddleware, exposto em /metrics)
+# Com vários workers, aponte para um diretório local compartilhado para agregar os processos
+# (snapshots de processos encerrados são somados em acumulado.json)
+METRICAS_DIR_MULTIPROCESSO = os.environ.get('METRICAS_DIR_MULTIPROCESSO')
+# Se definido, /metrics exige "Authorization: Bearer <token>"; em produção, sem ele /metrics responde 403
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+
+# Consultas lentas (backend.middleware.ConsultasLentasMiddleware)
+CONSULTAS_LENTAS_LIMITE_MS = int(os.environ.get('CONSULTAS_LENTAS_LIMITE_MS', 100))
+# Executa EXPLAIN nas consultas lentas (custo extra; use em diagnóstico)
+CONSULTAS_LENTAS_EXPLAIN = os.environ.get('CONSULTAS_LENTAS_EXPLAIN', '') == '1'
+# Repetições do mesmo SQL numa requisição para marcar suspeita de N+1 (0 desativa)
+CONSULTAS_LENTAS_N_MAIS_1 = 10
+CONSULTAS_LENTAS_ARQUIVO = os.environ.get('CONSULTAS_LENTAS_ARQUIVO', BASE_DIR / 'consultas_lentas.log')
+
+# Fila de tarefas (tarefas/fila.py)
+TAREFAS_TIMEOUT_EXECUCAO = 120     # segundos sem renovação até uma tarefa em execução ser considerada presa
+TAREFAS_INTERVALO_RENOVACAO = 30   # o worker renova a reserva da tarefa em execução a cada N segundos
+TAREFAS_BACKOFF_BASE = 5           # espera (s) antes da 2ª tentativa; dobra a cada falha
+TAREFAS_BACKOFF_MAXIMO = 3600
+
+# Idempotency-Key (idempotencia/chaves.py): tempo (s) que a resposta fica disponível para repetições
+IDEMPOTENCIA_TTL = 24 * 60 * 60
+
+# Orçamentos em rascunho sem alterações há mais dias que isso são apagados por `purgar_rascunhos`
+ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS = int(os.environ.get('ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS', 30))
+
+# Reservas e orçamentos fechados há mais dias que isso saem das tabelas principais (equipamentos/arquivamento.py)
+ARQUIVAMENTO_DIAS = int(os.environ.get('ARQUIVAMENTO_DIAS', 365))
+
+# Livro de estoque (equipamentos/estoque.py): idade mínima (s) de um movimento para entrar em um saldo consolidado
+ESTOQUE_MARGEM_CONSOLIDACAO = 60
+
+# Meta (ms) de inicialização de um worker no perfil API, conferida por `perfil_inicializacao --verificar-meta`
+INICIALIZACAO_META_MS = int(os.environ.get('INICIALIZACAO_META_MS', 1500))
+
+# Listagens do admin sem filtros acima disso usam a contagem estimada do PostgreSQL (backend/paginacao.py)
+ADMIN_CONTAGEM_ESTIMADA_MINIMO = 100_000
+
+# Limite de queries por view (backend/limite_queries.py): 'erro', 'aviso' ou vazio para desligar
+LIMITE_QUERIES_MODO = os.environ.get('LIMITE_QUERIES_MODO', 'aviso')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -79,6 +156,13 @@ TEMPLATES = [
     },
 ]
 
+# Fora do perfil API: apps e middleware usados só pelo admin e pela documentação
+APPS_SEM_API = ['django.contrib.admin', 'django.contrib.messages', 'django.contrib.staticfiles', 'drf_yasg']
+if PERFIL_API:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_SEM_API]
+    MIDDLEWARE.remove('django.contrib.messages.middleware.MessageMiddleware')
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.contrib.messages.context_processors.messages')
+
 WSGI_APPLICATION = 'backend.wsgi.application'
 
 
@@ -87,24 +171,158 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Para desenvolvimento local, usaremos SQLite (mais simples)
 # Em produção, pode ser configurado PostgreSQL
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DB_ENGINE = os.environ.get('DB_ENGINE', 'postgresql' if PRODUCAO else 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    # Limite por statement e por transação ociosa, aplicados na abertura da conexão
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 5000))
+    DB_IDLE_TRANSACTION_TIMEOUT_MS = int(os.environ.get('DB_IDLE_TRANSACTION_TIMEOUT_MS', 30000))
+    
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'reflex_som_db'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Conexões persistentes entre requisições, verificadas antes do reuso
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            # Atrás de PgBouncer em modo transaction, cursores nomeados não funcionam
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+                'options': (
+                    f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS} '
+                    f'-c idle_in_transaction_session_timeout={DB_IDLE_TRANSACTION_TIMEOUT_MS}'
+                ),
+            },
+        }
+    }
+    
+    # Pool do psycopg 3 (pip install "psycopg[pool]"); substitui as conexões persistentes
+    if os.environ.get('DB_POOL', '1' if find_spec('psycopg_pool') else '0') == '1':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Espera até 20s pelo lock em vez de falhar com "database is locked"
+                'timeout': 20,
+                # Transações pegam o lock de escrita no BEGIN: sem deadlock na
+                # promoção leitura -> escrita entre transações concorrentes
+                'transaction_mode': 'IMMEDIATE',
+                # Executado a cada conexão: WAL permite leituras durante escritas
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=134217728;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
+
+# Réplica de leitura (backend/roteamento.py). Nos testes ela espelha o banco principal.
+if DB_ENGINE == 'postgresql' and os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
     }
+elif DB_ENGINE != 'postgresql' and os.environ.get('DB_REPLICA_NAME'):
+    # Dois arquivos SQLite: a réplica é uma cópia do principal (ex: sqlite3 db.sqlite3 ".backup replica.sqlite3")
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+if 'replica' in DATABASES:
+    DATABASE_ROUTERS = ['backend.roteamento.RoteadorReplica']
+
+# Segundos em que o cliente lê do primário depois de uma escrita (read-your-writes)
+REPLICA_JANELA_PRIMARIO = int(os.environ.get('DB_REPLICA_JANELA_PRIMARIO', 5))
+
+
+# Cache
+# A versão do catálogo, o índice de sugestões e a marcação de leitura no primário
+# (réplica) precisam valer para todos os workers: em produção o cache é compartilhado
+# e obrigatório. DJANGO_CACHE_URL: redis://host:6379/0 ou memcached://host:11211
+BACKENDS_CACHE = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
 }
+if PRODUCAO:
+    CACHE_URL = os.environ['DJANGO_CACHE_URL']
+else:
+    CACHE_URL = os.environ.get('DJANGO_CACHE_URL')
+
+if CACHE_URL:
+    esquema_cache, _, endereco_cache = CACHE_URL.partition('://')
+    if esquema_cache not in BACKENDS_CACHE:
+        raise ImproperlyConfigured(f'DJANGO_CACHE_URL: esquema "{esquema_cache}" não suportado (use redis:// ou memcached://)')
+    CACHES = {
+        'default': {
+            'BACKEND': BACKENDS_CACHE[esquema_cache],
+            # RedisCache aceita a URL; o memcached recebe host:porta
+            'LOCATION': CACHE_URL if esquema_cache.startswith('redis') else endereco_cache,
+            'KEY_PREFIX': 'reflex-som',
+        }
+    }
+else:
+    # Desenvolvimento com um processo
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'reflex-som',
+        }
+    }
 
-# Configuração alternativa para PostgreSQL (comentada para desenvolvimento)
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': 'reflex_som_db',
-#         'USER': 'postgres',
-#         'PASSWORD': 'password',
-#         'HOST': 'localhost',
-#         'PORT': '5432',
-#     }
-# }
+# Tempo (segundos) que dados derivados do catálogo ficam em cache
+CATALOGO_CACHE_TIMEOUT = 300
+
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simples': {
+            'format': '{asctime} {levelname} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'consultas_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': CONSULTAS_LENTAS_ARQUIVO,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'simples',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'consultas_lentas': {
+            'handlers': ['consultas_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation
@@ -162,10 +380,24 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# Renderers/parsers rápidos (opcionais): orjson para JSON e MessagePack via Accept
+if find_spec('orjson'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'backend.renderers.ORJSONRenderer'
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = 'backend.renderers.ORJSONParser'
+
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('backend.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('backend.renderers.MessagePackParser')
+
 # Simple JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -209,6 +441,16 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Controle de concorrência otimista (backend/concorrencia.py) e idempotência (idempotencia/chaves.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['ETag', 'Idempotent-Replayed']
+
+# Esquema OpenAPI pré-calculado (backend/esquema.py): gerado no deploy com `manage.py gerar_esquema`
+ESQUEMA_OPENAPI_ARQUIVO = os.environ.get('ESQUEMA_OPENAPI_ARQUIVO', BASE_DIR / 'openapi.json')
+
+# Versão do código (ex: commit do deploy); vazio = hash dos fontes
+VERSAO_CODIGO = os.environ.get('VERSAO_CODIGO', '')
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -0,0 +1,690 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.utils import load_backend
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from clientes.models import Cliente
+from equipamentos.benchmark import popular
+from equipamentos.models import Equipamento, MovimentoEstoque, Orcamento, Reserva, ItemReserva
+from . import compressao, consultas_lentas, esquema, renderers, roteamento
+from .inicializacao import medir
+from .limite_queries import limite_da_view
+from .metricas import ARQUIVO_ACUMULADO, BUCKETS_LATENCIA, Registro
+from .middleware import CompressaoMiddleware, ReplicaMiddleware
+from .roteamento import CHAVE_USUARIO_PRIMARIO, COOKIE_PRIMARIO, RoteadorReplica
+
+
+TAMANHOS = (1, 10, 50)
+
+# Rotas sem acesso a dados da aplicação (admin do Django e documentação)
+ROTAS_IGNORADAS = {'schema-swagger-ui', 'schema-redoc', 'schema-json'}
+NAMESPACES_IGNORADOS = {'admin'}
+
+SENHA = 'Senha-Teste-123'
+
+
+def rotas(padroes=None, namespace=None):
+    """(nome, callback) de todas as rotas nomeadas de backend/urls.py"""
+    if padroes is None:
+        padroes = get_resolver().url_patterns
+    for padrao in padroes:
+        if isinstance(padrao, URLResolver):
+            if padrao.namespace in NAMESPACES_IGNORADOS:
+                continue
+            interno = padrao.namespace or namespace
+            yield from rotas(padrao.url_patterns, interno)
+        elif isinstance(padrao, URLPattern) and padrao.name and padrao.name not in ROTAS_IGNORADAS:
+            yield (f'{namespace}:{padrao.name}' if namespace else padrao.name), padrao.callback
+
+
+def abastecer_estoque(quantidade=100):
+    """Entrada no livro de estoque de todos os equipamentos (a criação de reserva confere o livro)"""
+    MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(equipamento_id=equipamento_id, tipo='ajuste', quantidade=quantidade)
+        for equipamento_id in Equipamento.objects.values_list('id', flat=True)
+    ])
+
+
+@skipUnless(renderers.orjson is not None and renderers.msgpack is not None, 'orjson e msgpack não instalados')
+class RenderersTests(TestCase):
+    """orjson como JSON padrão e MessagePack negociado por Accept / Content-Type (backend/renderers.py)"""
+    
+    def setUp(self):
+        self.cliente, _ = popular(3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.cliente)
+    
+    def test_orjson_gera_a_mesma_saida_do_json_renderer(self):
+        dados = {
+            'valor': Decimal('10.50'), 'quando': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc),
+            'dia': date(2024, 5, 1), 'texto': 'Som\u2028Luz ção', 'lista': [1, None, 2.5], 3: 'chave numérica',
+        }
+        self.assertEqual(renderers.ORJSONRenderer().render(dados), JSONRenderer().render(dados))
+        resposta = self.client.get(reverse('equipamento-list'))
+        self.assertIsInstance(resposta.accepted_renderer, renderers.ORJSONRenderer)
+        self.assertEqual(resposta['Content-Type'], 'application/json')
+    
+    def test_accept_msgpack_e_corpo_msgpack(self):
+        url = reverse('equipamento-list')
+        json = self.client.get(url).json()
+        resposta = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resposta['Content-Type'], 'application/msgpack')
+        self.assertEqual(renderers.msgpack.unpackb(resposta.content), json)
+        
+        resposta = self.client.post(
+            reverse('orcamento-create'), renderers.msgpack.packb({'observacoes': 'Via MessagePack'}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(renderers.msgpack.unpackb(resposta.content)['observacoes'], 'Via MessagePack')
+        
+        resposta = self.client.post(reverse('orcamento-create'), b'\xc1', content_type='application/msgpack')
+        self.assertEqual(resposta.status_code, 400)
+
+
+class CompressaoTests(TestCase):
+    """Content-Encoding negociado e ida e volta de cada codificador (backend/compressao.py)"""
+    
+    DESCOMPRIMIR = {
+        'gzip': gzip.decompress,
+        'br': lambda dados: compressao.brotli.decompress(dados),
+        'zstd': lambda dados: compressao.zstandard.ZstdDecompressor().decompressobj().decompress(dados),
+    }
+    
+    def setUp(self):
+        self.cliente, _ = popular(20)
+        self.client = APIClient()
+        self.client.force_authenticate(self.cliente)
+        self.url = reverse('equipamento-list')
+        self.original = self.client.get(self.url).content
+    
+    def codificacoes(self):
+        return [codificador.encoding for codificador in compressao.codificadores_disponiveis()]
+    
+    def test_cada_codificador_comprime_e_descomprime(self):
+        for encoding in self.codificacoes():
+            with self.subTest(encoding=encoding):
+                resposta = self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(resposta['Content-Encoding'], encoding)
+                self.assertIn('Accept-Encoding', resposta['Vary'])
+                self.assertEqual(int(resposta['Content-Length']), len(resposta.content))
+                self.assertLess(len(resposta.content), len(self.original))
+                self.assertEqual(self.DESCOMPRIMIR[encoding](resposta.content), self.original)
+    
+    def test_negociacao_respeita_q_e_tamanho_minimo(self):
+        resposta = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0.5, br;q=0, zstd;q=0, identity')
+        self.assertEqual(resposta['Content-Encoding'], 'gzip')
+        self.assertFalse(self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity').has_header('Content-Encoding'))
+        self.assertEqual(
+            self.client.get(self.url, HTTP_ACCEPT_ENCODING='*')['Content-Encoding'], self.codificacoes()[0]
+        )
+        equipamento = Equipamento.objects.first()
+        pequena = self.client.get(reverse('equipamento-detail', args=[equipamento.pk]), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(pequena.content), settings.COMPRESSAO_TAMANHO_MINIMO)
+        self.assertFalse(pequena.has_header('Content-Encoding'))
+    
+    def test_streaming_comprimido_por_chunks(self):
+        chunks = [f'linha {i:05d} '.encode() * 200 for i in range(50)]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=', '.join(self.codificacoes()))
+        for codificador in CompressaoMiddleware(lambda request: HttpResponse()).codificadores:
+            with self.subTest(encoding=codificador.encoding):
+                middleware = CompressaoMiddleware(lambda request: StreamingHttpResponse(iter(chunks)))
+                middleware.codificadores = [codificador]
+                resposta = middleware(request)
+                partes = list(resposta.streaming_content)
+                self.assertEqual(resposta['Content-Encoding'], codificador.encoding)
+                self.assertFalse(resposta.has_header('Content-Length'))
+                self.assertGreater(len(partes), 2)
+                self.assertEqual(self.DESCOMPRIMIR[codificador.encoding](b''.join(partes)), b''.join(chunks))
+
+
+class MetricasTests(SimpleTestCase):
+    """Acesso ao /metrics (backend/metricas.py)"""
+    
+    def test_token_obrigatorio_em_producao(self):
+        url = reverse('metrics')
+        with override_settings(PRODUCAO=False, METRICAS_TOKEN=None):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with override_settings(PRODUCAO=True, METRICAS_TOKEN=None):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        with override_settings(PRODUCAO=True, METRICAS_TOKEN='segredo'):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer outro').status_code, 403)
+            resposta = self.client.get(url, HTTP_AUTHORIZATION='Bearer segredo')
+            self.assertEqual(resposta.status_code, 200)
+            self.assertIn(b'http_requisicoes_total', resposta.content)
+    
+    def test_snapshots_de_processos_encerrados_vao_para_o_acumulado(self):
+        processo = subprocess.Popen([sys.executable, '-c', 'pass'])
+        processo.wait()
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(METRICAS_DIR_MULTIPROCESSO=diretorio):
+            diretorio = Path(diretorio)
+            (diretorio / f'{processo.pid}.json').write_text(json.dumps({
+                'series': [['/api/x', 'GET', {'requisicoes': 4, 'buckets': [4] + [0] * len(BUCKETS_LATENCIA)}]],
+                'contadores': {'job_total': [3, 'Linhas do job']},
+            }))
+            atual = Registro()
+            atual.incrementar('job_total', 2, 'Linhas do job')
+            
+            for _ in range(2):
+                series, contadores = atual.agregado()
+                self.assertEqual(contadores, {'job_total': [5, 'Linhas do job']})
+                self.assertEqual(series[('/api/x', 'GET')]['requisicoes'], 4)
+            self.assertEqual(
+                sorted(arquivo.name for arquivo in diretorio.glob('*.json')),
+                sorted([ARQUIVO_ACUMULADO, f'{os.getpid()}.json']),
+            )
+            
+            # Processo novo com o mesmo PID: o snapshot antigo é incorporado, não sobrescrito
+            reutilizado = Registro()
+            reutilizado.incrementar('job_total', 1, 'Linhas do job')
+            self.assertEqual(reutilizado.agregado()[1], {'job_total': [6, 'Linhas do job']})
+
+
+@override_settings(CONSULTAS_LENTAS_LIMITE_MS=1000, CONSULTAS_LENTAS_N_MAIS_1=3)
+class ConsultasLentasTests(SimpleTestCase):
+    """Monitor de consultas por requisição (backend/consultas_lentas.py)"""
+    
+    def setUp(self):
+        consultas_lentas.registro_consultas.limpar()
+        self.addCleanup(consultas_lentas.registro_consultas.limpar)
+        self.monitor = consultas_lentas.MonitorConsultas(RequestFactory().get('/api/'))
+    
+    def executar(self, sql, params=(1,)):
+        self.monitor(lambda *args: None, sql, params, False, {})
+    
+    def test_fingerprint_so_para_consultas_acima_dos_limites(self):
+        with mock.patch('backend.consultas_lentas.fingerprint', wraps=consultas_lentas.fingerprint) as fingerprint:
+            for tabela in ('a', 'b', 'c'):
+                self.executar(f'SELECT * FROM {tabela} WHERE id = %s')
+            self.executar('SELECT * FROM a WHERE id = %s', (2,))
+            fingerprint.assert_not_called()
+            
+            self.executar('SELECT * FROM a WHERE id = %s', (3,))
+            fingerprint.assert_called_once()
+        
+        grupo, = consultas_lentas.registro_consultas.listar()
+        self.assertEqual((grupo['tipo'], grupo['sql']), ('n_mais_1', 'SELECT * FROM a WHERE id = ?'))
+        self.assertEqual(grupo['ultima']['repeticoes'], 3)
+
+
+@override_settings(
+    LIMITE_QUERIES_MODO='erro',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LimiteQueriesTests(TestCase):
+    """
+    Cada rota declara um limite de queries (backend/limite_queries.py) e o
+    número de queries não pode crescer com o volume de dados: cada cenário é
+    executado com TAMANHOS linhas (página, itens do orçamento/reserva).
+    """
+    
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_todas_as_rotas_tem_limite_e_cenario(self):
+        for nome, callback in rotas():
+            with self.subTest(rota=nome):
+                self.assertIsNotNone(limite_da_view(callback), f'{nome} não declara limite_queries')
+                self.assertTrue(hasattr(self, self.nome_cenario(nome)), f'{nome} não tem cenário de teste')
+    
+    def test_queries_nao_crescem_com_os_dados(self):
+        for nome, _ in rotas():
+            cenario = getattr(self, self.nome_cenario(nome), None)
+            if cenario is None:
+                continue
+            with self.subTest(rota=nome):
+                contagens = [self.contar_queries(cenario, n) for n in TAMANHOS]
+                self.assertEqual(len(set(contagens)), 1, f'{nome}: {dict(zip(TAMANHOS, contagens))} queries')
+    
+    def nome_cenario(self, rota):
+        return 'cenario_' + rota.replace(':', '_').replace('-', '_')
+    
+    def contar_queries(self, cenario, n):
+        """Executa o cenário com `n` linhas e devolve as queries da requisição"""
+        with transaction.atomic():
+            self.cliente, self.orcamento = popular(n)
+            self.n = n
+            metodo, url, dados, usuario = cenario()
+            self.client.force_authenticate(usuario)
+            cache.clear()
+            
+            with CaptureQueriesContext(connection) as queries:
+                resposta = getattr(self.client, metodo)(url, dados, format='json')
+            
+            self.assertLess(resposta.status_code, 400, resposta.content[:500])
+            transaction.set_rollback(True)
+        return len(queries)
+    
+    # Dados auxiliares
+    
+    def admin(self):
+        return Cliente.objects.create(
+            username='admin@example.com', email='admin@example.com', nome_completo='Admin',
+            cpf_cnpj='999.999.999-99', is_staff=True,
+        )
+    
+    def com_senha(self):
+        self.cliente.set_password(SENHA)
+        self.cliente.save()
+        return self.cliente
+    
+    def reserva_com_itens(self, status='pendente'):
+        reserva = Reserva.objects.create(
+            cliente=self.cliente, data_uso=date.today() + timedelta(days=5),
+            local_evento='Salão', valor_total=Decimal('10.00') * self.n, status=status,
+        )
+        ItemReserva.objects.bulk_create([
+            ItemReserva(
+                reserva=reserva, equipamento=item.equipamento, quantidade=1, periodo=1,
+                valor_unitario=Decimal('10.00'), valor_total=Decimal('10.00'),
+            )
+            for item in self.orcamento.itens.select_related('equipamento')
+        ])
+        return reserva
+    
+    # Cenários: retornam (método, url, dados, usuário)
+    
+    def cenario_metrics(self):
+        return 'get', reverse('metrics'), None, None
+    
+    def cenario_consultas_lentas(self):
+        return 'get', reverse('consultas-lentas'), None, self.admin()
+    
+    def cenario_token_obtain_pair(self):
+        self.com_senha()
+        return 'post', reverse('token_obtain_pair'), {'username': self.cliente.username, 'password': SENHA}, None
+    
+    def cenario_token_refresh(self):
+        refresh = RefreshToken.for_user(self.cliente)
+        return 'post', reverse('token_refresh'), {'refresh': str(refresh)}, None
+    
+    def cenario_clientes_registro(self):
+        dados = {
+            'email': 'novo@example.com', 'password': SENHA, 'password_confirm': SENHA,
+            'nome_completo': 'Cliente Novo', 'cpf_cnpj': '123.456.789-09', 'telefone': '(11) 99999-9999',
+            'endereco': 'Rua A, 1', 'cidade': 'São Paulo', 'estado': 'SP', 'cep': '01000-000',
+        }
+        return 'post', reverse('clientes:registro'), dados, None
+    
+    def cenario_clientes_login(self):
+        self.com_senha()
+        return 'post', reverse('clientes:login'), {'email': self.cliente.email, 'password': SENHA}, None
+    
+    def cenario_clientes_logout(self):
+        return 'post', reverse('clientes:logout'), {}, self.cliente
+    
+    def cenario_clientes_perfil(self):
+        return 'get', reverse('clientes:perfil'), None, self.cliente
+    
+    def cenario_clientes_alterar_senha(self):
+        self.com_senha()
+        dados = {'senha_atual': SENHA, 'nova_senha': 'Outra-Senha-456', 'confirmar_nova_senha': 'Outra-Senha-456'}
+        return 'post', reverse('clientes:alterar-senha'), dados, self.cliente
+    
+    def cenario_clientes_info(self):
+        return 'get', reverse('clientes:info'), None, self.cliente
+    
+    def cenario_clientes_verificar_email(self):
+        return 'post', reverse('clientes:verificar-email'), {'email': self.cliente.email}, None
+    
+    def cenario_clientes_verificar_cpf_cnpj(self):
+        return 'post', reverse('clientes:verificar-cpf-cnpj'), {'cpf_cnpj': self.cliente.cpf_cnpj}, None
+    
+    def cenario_categoria_list_create(self):
+        return 'get', reverse('categoria-list-create'), None, self.cliente
+    
+    def cenario_categoria_detail(self):
+        equipamento = Equipamento.objects.first()
+        return 'get', reverse('categoria-detail', args=[equipamento.categoria_id]), None, self.admin()
+    
+    def cenario_equipamento_list(self):
+        return 'get', reverse('equipamento-list') + '?facets=true', None, self.cliente
+    
+    def cenario_equipamento_autocompletar(self):
+        return 'get', reverse('equipamento-autocompletar'), {'q': 'equip'}, self.cliente
+    
+    def cenario_equipamento_detail(self):
+        equipamento = Equipamento.objects.first()
+        return 'get', reverse('equipamento-detail', args=[equipamento.pk]), None, self.cliente
+    
+    def cenario_equipamento_create(self):
+        dados = {
+            'nome': 'Equipamento Novo', 'categoria': Equipamento.objects.first().categoria_id,
+            'descricao': 'Descrição', 'marca': 'Marca', 'modelo': 'Modelo',
+            'especificacoes_tecnicas': {'potencia': '100W'}, 'valor_diaria': '50.00',
+            'estado': 'disponivel', 'quantidade_total': 2, 'quantidade_disponivel': 2,
+        }
+        return 'post', reverse('equipamento-create'), dados, self.admin()
+    
+    def cenario_equipamento_update(self):
+        equipamento = Equipamento.objects.first()
+        return 'patch', reverse('equipamento-update', args=[equipamento.pk]), {'marca': 'Outra', 'valor_diaria': '20.00'}, self.admin()
+    
+    def cenario_equipamento_delete(self):
+        equipamento = Equipamento.objects.first()
+        return 'delete', reverse('equipamento-delete', args=[equipamento.pk]), None, self.admin()
+    
+    def cenario_orcamento_list(self):
+        return 'get', reverse('orcamento-list'), None, self.cliente
+    
+    def cenario_orcamento_create(self):
+        return 'post', reverse('orcamento-create'), {'observacoes': 'Festa'}, self.cliente
+    
+    def cenario_orcamento_detail(self):
+        return 'get', reverse('orcamento-detail', args=[self.orcamento.pk]), None, self.cliente
+    
+    def cenario_orcamento_adicionar_item(self):
+        equipamento = Equipamento.objects.first()
+        equipamento.pk = None
+        equipamento.numero_serie = None
+        equipamento.save()
+        dados = {
+            'equipamento': equipamento.pk, 'quantidade': 1, 'modalidade': 'diaria', 'periodo': 2,
+            'data_uso': (date.today() + timedelta(days=5)).isoformat(),
+        }
+        return 'post', reverse('orcamento-adicionar-item', args=[self.orcamento.pk]), dados, self.cliente
+    
+    def cenario_orcamento_remover_item(self):
+        item = self.orcamento.itens.first()
+        return 'delete', reverse('orcamento-remover-item', args=[self.orcamento.pk, item.pk]), None, self.cliente
+    
+    def cenario_orcamento_finalizar(self):
+        return 'post', reverse('orcamento-finalizar', args=[self.orcamento.pk]), None, self.cliente
+    
+    def cenario_reserva_list(self):
+        return 'get', reverse('reserva-list'), None, self.cliente
+    
+    def cenario_reserva_detail(self):
+        reserva = self.reserva_com_itens()
+        return 'get', reverse('reserva-detail', args=[reserva.pk]), None, self.cliente
+    
+    def cenario_criar_reserva_orcamento(self):
+        abastecer_estoque()
+        Orcamento.objects.filter(pk=self.orcamento.pk).update(status='finalizado')
+        dados = {'data_uso': (date.today() + timedelta(days=5)).isoformat(), 'local_evento': 'Salão de festas'}
+        return 'post', reverse('criar-reserva-orcamento', args=[self.orcamento.pk]), dados, self.cliente
+    
+    def cenario_reserva_admin_list(self):
+        return 'get', reverse('reserva-admin-list'), None, self.admin()
+    
+    def cenario_reserva_aprovar(self):
+        reserva = self.reserva_com_itens()
+        return 'post', reverse('reserva-aprovar', args=[reserva.pk]), None, self.admin()
+    
+    def cenario_reserva_rejeitar(self):
+        reserva = self.reserva_com_itens()
+        return 'post', reverse('reserva-rejeitar', args=[reserva.pk]), None, self.admin()
+    
+    def cenario_relatorio_mensal(self):
+        self.reserva_com_itens()
+        return 'get', reverse('relatorio-mensal'), None, self.admin()
+
+
+@mock.patch('backend.middleware.verificar_cache_compartilhado')
+@mock.patch('backend.middleware.replica_configurada', return_value=True)
+@mock.patch('backend.roteamento.replica_configurada', return_value=True)
+class RoteadorReplicaTests(SimpleTestCase):
+    """Escolha do banco por requisição (sem acessar o banco)"""
+    
+    def setUp(self):
+        self.roteador = RoteadorReplica()
+        self.factory = RequestFactory()
+        cache.clear()
+        self.addCleanup(cache.clear)
+    
+    def executar(self, request, escrever=False, usuario=None):
+        """Passa a requisição pelo middleware e devolve (banco das leituras antes/depois da escrita, response)"""
+        bancos = []
+        
+        def view(request):
+            if usuario is not None:
+                # Como o DRF depois de autenticar
+                request.user = usuario
+            bancos.append(self.roteador.db_for_read(Orcamento))
+            if escrever:
+                self.roteador.db_for_write(Orcamento)
+                bancos.append(self.roteador.db_for_read(Orcamento))
+            return HttpResponse()
+        
+        response = ReplicaMiddleware(view)(request)
+        return bancos, response
+    
+    def test_leitura_vai_para_replica(self, *mocks):
+        bancos, response = self.executar(self.factory.get('/'))
+        self.assertEqual(bancos, ['replica'])
+        self.assertNotIn(COOKIE_PRIMARIO, response.cookies)
+    
+    def test_escrita_usa_primario_e_fixa_cookie(self, *mocks):
+        bancos, response = self.executar(self.factory.post('/'))
+        self.assertEqual(bancos, ['default'])
+        self.assertEqual(response.cookies[COOKIE_PRIMARIO]['max-age'], settings.REPLICA_JANELA_PRIMARIO)
+    
+    def test_cookie_le_do_primario(self, *mocks):
+        request = self.factory.get('/')
+        request.COOKIES[COOKIE_PRIMARIO] = '1'
+        bancos, _ = self.executar(request)
+        self.assertEqual(bancos, ['default'])
+    
+    def test_usuario_le_do_primario_apos_escrever_sem_cookie(self, *mocks):
+        usuario, outro = Cliente(pk=7), Cliente(pk=8)
+        jwt = lambda cliente: {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(cliente)}'}
+        
+        bancos, _ = self.executar(self.factory.post('/', **jwt(usuario)), escrever=True, usuario=usuario)
+        self.assertEqual(bancos, ['default', 'default'])
+        # Cross-origin sem withCredentials: o cookie não volta, só o JWT
+        self.assertEqual(self.executar(self.factory.get('/', **jwt(usuario)))[0], ['default'])
+        self.assertEqual(self.executar(self.factory.get('/', **jwt(outro)))[0], ['replica'])
+        self.assertEqual(self.executar(self.factory.get('/', HTTP_AUTHORIZATION='Bearer invalido'))[0], ['replica'])
+        
+        cache.delete(CHAVE_USUARIO_PRIMARIO.format(usuario.pk))
+        self.assertEqual(self.executar(self.factory.get('/', **jwt(usuario)))[0], ['replica'])
+    
+    def test_avisa_quando_o_cache_nao_e_compartilhado(self, *mocks):
+        with self.assertLogs('backend.roteamento', 'WARNING'):
+            self.assertFalse(roteamento.verificar_cache_compartilhado())
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio,
+        }}):
+            self.assertTrue(roteamento.verificar_cache_compartilhado())
+    
+    def test_escrita_durante_leitura_fixa_primario(self, *mocks):
+        bancos, _ = self.executar(self.factory.get('/'), escrever=True)
+        self.assertEqual(bancos, ['replica', 'default'])
+    
+    def test_fora_de_requisicao_usa_primario(self, *mocks):
+        self.assertEqual(self.roteador.db_for_read(Orcamento), 'default')
+
+
+@skipUnless('replica' in settings.DATABASES, 'Defina DB_REPLICA_NAME para testar com dois arquivos SQLite')
+class ReplicaIntegracaoTests(TransactionTestCase):
+    """Com a réplica configurada (espelho do banco de teste), confere o alias usado pelas views"""
+    databases = '__all__'
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.cliente, self.orcamento = popular(3)
+        # JWT e sem cookies, como o frontend (cross-origin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.cliente)}')
+        cache.clear()
+    
+    def contar(self, metodo, url, dados=None):
+        with CaptureQueriesContext(connections['default']) as primario, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            resposta = getattr(self.client, metodo)(url, dados, format='json')
+        self.assertLess(resposta.status_code, 400)
+        return len(primario), len(replica)
+    
+    def test_listagem_le_da_replica(self):
+        primario, replica = self.contar('get', reverse('orcamento-list'))
+        self.assertEqual(primario, 0)
+        self.assertGreater(replica, 0)
+    
+    def test_escrita_e_leitura_seguinte_no_primario(self):
+        primario, replica = self.contar('post', reverse('orcamento-create'), {'observacoes': 'Festa'})
+        self.assertEqual(replica, 0)
+        self.client.cookies.clear()
+        
+        primario, replica = self.contar('get', reverse('orcamento-list'))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primario, 0)
+    
+    def test_criar_reserva_fica_no_primario(self):
+        abastecer_estoque()
+        Orcamento.objects.filter(pk=self.orcamento.pk).update(status='finalizado')
+        dados = {'data_uso': (date.today() + timedelta(days=5)).isoformat(), 'local_evento': 'Salão'}
+        primario, replica = self.contar('post', reverse('criar-reserva-orcamento', args=[self.orcamento.pk]), dados)
+        self.assertEqual(replica, 0)
+
+
+class EsquemaTests(SimpleTestCase):
+    """Esquema OpenAPI gerado uma vez por versão do código (backend/esquema.py)"""
+    
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.arquivo = Path(pasta.name) / 'openapi.json'
+        configuracao = override_settings(ESQUEMA_OPENAPI_ARQUIVO=self.arquivo)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        esquema._documentos.clear()
+        self.addCleanup(esquema._documentos.clear)
+    
+    def test_gera_uma_vez_e_responde_304_com_etag(self):
+        with mock.patch('backend.esquema.gerar', wraps=esquema.gerar) as gerar:
+            with self.assertLogs('backend.esquema', 'WARNING'):
+                resposta = self.client.get(reverse('schema-json'), {'format': 'json'})
+            self.assertEqual(resposta.status_code, 200)
+            self.assertIn('/equipamentos/equipamentos/', resposta.json()['paths'])
+            self.assertEqual(self.client.get(reverse('schema-swagger-ui'), {'format': 'openapi'}).content, resposta.content)
+            self.assertEqual(self.client.get(reverse('schema-json'), {'format': 'yaml'}).status_code, 200)
+        self.assertEqual(gerar.call_count, 1)
+        
+        resposta = self.client.get(reverse('schema-json'), {'format': 'json'}, HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(resposta.status_code, 304)
+    
+    def test_usa_o_arquivo_gerado_no_deploy_so_da_mesma_versao(self):
+        documento = esquema.gravar()
+        with mock.patch('backend.esquema.gerar') as gerar:
+            self.assertEqual(self.client.get(reverse('schema-json'), {'format': 'json'}).json(), documento)
+        gerar.assert_not_called()
+        
+        esquema._documentos.clear()
+        with mock.patch('backend.esquema.versao_codigo', return_value='outra'), \
+                mock.patch('backend.esquema.gerar', return_value={'paths': {}}) as gerar, \
+                self.assertLogs('backend.esquema', 'WARNING'):
+            self.assertEqual(self.client.get(reverse('schema-json'), {'format': 'json'}).json(), {'paths': {}})
+        gerar.assert_called_once()
+
+
+@skipUnless(settings.DATABASES['default']['ENGINE'].endswith('sqlite3'), 'Configuração específica do SQLite')
+class SqliteConfiguracaoTests(SimpleTestCase):
+    """PRAGMAs e modo de transação do SQLite, num arquivo novo com as OPTIONS de settings"""
+    ALIAS = 'sqlite_configuracao'
+    
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.caminho = str(Path(pasta.name) / 'teste.sqlite3')
+    
+    def conectar(self):
+        """Registra no thread atual uma conexão ao arquivo de teste (o transaction.atomic usa o alias)"""
+        configuracao = {**connections.settings['default'], 'NAME': self.caminho}
+        conexao = load_backend(configuracao['ENGINE']).DatabaseWrapper(configuracao, self.ALIAS)
+        connections[self.ALIAS] = conexao
+        return conexao
+    
+    def desconectar(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+    
+    def test_pragmas_aplicados_a_cada_conexao(self):
+        conexao = self.conectar()
+        self.addCleanup(self.desconectar)
+        with conexao.cursor() as cursor:
+            lidos = {}
+            for pragma in ['journal_mode', 'busy_timeout', 'synchronous', 'cache_size', 'temp_store']:
+                cursor.execute(f'PRAGMA {pragma}')
+                lidos[pragma] = cursor.fetchone()[0]
+        self.assertEqual(lidos, {
+            'journal_mode': 'wal', 'busy_timeout': 20000, 'synchronous': 1, 'cache_size': -20000, 'temp_store': 2,
+        })
+    
+    def test_escritas_concorrentes_sem_database_is_locked(self):
+        conexao = self.conectar()
+        with conexao.cursor() as cursor:
+            cursor.execute('CREATE TABLE contador (valor INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO contador VALUES (0)')
+        self.desconectar()
+        
+        erros = []
+        barreira = threading.Barrier(8)
+        
+        def incrementar():
+            conexao = self.conectar()
+            try:
+                barreira.wait()
+                for _ in range(5):
+                    # Lê e depois escreve: em modo DEFERRED a promoção do lock falharia na hora
+                    with transaction.atomic(using=self.ALIAS), conexao.cursor() as cursor:
+                        cursor.execute('SELECT valor FROM contador')
+                        valor = cursor.fetchone()[0]
+                        time.sleep(0.001)
+                        cursor.execute('UPDATE contador SET valor = %s', [valor + 1])
+            except Exception as erro:
+                erros.append(erro)
+            finally:
+                self.desconectar()
+        
+        threads = [threading.Thread(target=incrementar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(erros, [])
+        conexao = self.conectar()
+        self.addCleanup(self.desconectar)
+        with conexao.cursor() as cursor:
+            cursor.execute('SELECT valor FROM contador')
+            self.assertEqual(cursor.fetchone()[0], 40)
+
+
+class InicializacaoTests(SimpleTestCase):
+    """
+    Módulos carregados no cold start de um worker no perfil API (DJANGO_PERFIL=api), num processo
+    novo. O tempo depende da máquina e fica com `manage.py perfil_inicializacao --perfil api --verificar-meta`.
+    """
+    # Admin (autodiscover e apps) e documentação OpenAPI
+    FORA_DO_PERFIL_API = {
+        'drf_yasg', 'backend.esquema', 'django.contrib.admin.apps', 'django.contrib.staticfiles',
+        'equipamentos.admin', 'clientes.admin', 'tarefas.admin', 'idempotencia.admin',
+    }
+    
+    def test_perfil_api_nao_carrega_admin_nem_documentacao(self):
+        completo = set(medir('completo')['modulos'])
+        api = set(medir('api')['modulos'])
+        
+        # Confere que a lista ainda corresponde a módulos que o perfil completo carrega
+        self.assertEqual(self.FORA_DO_PERFIL_API - completo, set())
+        self.assertEqual(self.FORA_DO_PERFIL_API & api, set())
+        # As views já carregadas pelo aquecimento
+        self.assertIn('equipamentos.views', api)
@@ -14,45 +14,44 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from .metricas import metricas_view
+from .consultas_lentas import consultas_lentas_view
+from .limite_queries import limite_queries
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
-# Configuração do Swagger
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Reflex Som API",
-        default_version='v1',
-        description="API para o sistema de locação de equipamentos da Reflex Som",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contato@reflexsom.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
-    # Admin
-    path('admin/', admin.site.urls),
-    
     # API endpoints
     path('api/clientes/', include('clientes.urls')),
     path('api/equipamentos/', include('equipamentos.urls')),
     
-    # Documentação da API
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    # Métricas Prometheus
+    path('metrics', metricas_view, name='metrics'),
+    
+    # Consultas lentas (apenas staff)
+    path('api/admin/consultas-lentas/', consultas_lentas_view, name='consultas-lentas'),
     
     # JWT Token endpoints
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/', limite_queries(2)(TokenObtainPairView.as_view()), name='token_obtain_pair'),
+    path('api/token/refresh/', limite_queries(2)(TokenRefreshView.as_view()), name='token_refresh'),
 ]
 
+# Admin e documentação só fora do perfil API (DJANGO_PERFIL=api): nem são importados
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if apps.is_installed('drf_yasg'):
+    # Documentação da API (esquema pré-calculado, backend/esquema.py)
+    from .esquema import EsquemaView
+    
+    urlpatterns += [
+        path('swagger/', EsquemaView.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+        path('redoc/', EsquemaView.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+        path('swagger.json', EsquemaView.without_ui(cache_timeout=0), name='schema-json'),
+    ]
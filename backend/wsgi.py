@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# URLconf, views e traduções carregadas antes da primeira requisição
+from backend.aquecimento import aquecer  # noqa: E402
+
+aquecer()
@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from django.contrib.auth import authenticate
+from backend.limite_queries import limite_queries
 from .models import Cliente
 from .serializers import (
     ClienteRegistroSerializer,
@@ -21,6 +22,7 @@ class ClienteRegistroView(generics.CreateAPIView):
     queryset = Cliente.objects.all()
     serializer_class = ClienteRegistroSerializer
     permission_classes = [permissions.AllowAny]
+    limite_queries = 5
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -53,6 +55,7 @@ class ClienteLoginView(APIView):
     View para login de clientes
     """
     permission_classes = [permissions.AllowAny]
+    limite_queries = 2
     
     def post(self, request):
         serializer = ClienteLoginSerializer(data=request.data)
@@ -85,6 +88,7 @@ class ClienteLogoutView(APIView):
     View para logout de clientes
     """
     permission_classes = [permissions.IsAuthenticated]
+    limite_queries = 4
     
     def post(self, request):
         try:
@@ -109,6 +113,7 @@ class ClientePerfilView(generics.RetrieveUpdateAPIView):
     """
     serializer_class = ClientePerfilSerializer
     permission_classes = [permissions.IsAuthenticated]
+    limite_queries = 4
     
     def get_object(self):
         return self.request.user
@@ -133,6 +138,7 @@ class ClienteAlterarSenhaView(APIView):
     View para alteração de senha do cliente
     """
     permission_classes = [permissions.IsAuthenticated]
+    limite_queries = 2
     
     def post(self, request):
         serializer = ClienteAlterarSenhaSerializer(
@@ -149,6 +155,7 @@ class ClienteAlterarSenhaView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@limite_queries(1)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def cliente_info_view(request):
@@ -169,6 +176,7 @@ def cliente_info_view(request):
     }, status=status.HTTP_200_OK)
 
 
+@limite_queries(1)
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def verificar_email_view(request):
@@ -188,6 +196,7 @@ def verificar_email_view(request):
     }, status=status.HTTP_200_OK)
 
 
+@limite_queries(1)
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def verificar_cpf_cnpj_view(request):
@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Categoria, Equipamento, Orcamento, ItemOrcamento, Reserva, ItemReserva
+from backend.paginacao import PaginadorEstimado
+from .estoque import registrar
+from .models import (
+    Categoria, Equipamento, MovimentoEstoque, Orcamento, ItemOrcamento, Reserva, ItemReserva,
+    OrcamentoArquivado, ReservaArquivada, ResumoArquivo
+)
 
 
 @admin.register(Categoria)
@@ -13,12 +18,14 @@ class CategoriaAdmin(admin.ModelAdmin):
 class ItemOrcamentoInline(admin.TabularInline):
     model = ItemOrcamento
     extra = 0
+    raw_id_fields = ['equipamento']
     readonly_fields = ['valor_unitario', 'valor_total']
 
 
 class ItemReservaInline(admin.TabularInline):
     model = ItemReserva
     extra = 0
+    raw_id_fields = ['equipamento']
     readonly_fields = ['valor_unitario', 'valor_total']
 
 
@@ -56,14 +63,58 @@ class EquipamentoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_readonly_fields(self, request, obj=None):
+        # Depois do cadastro o estoque muda por movimentos (MovimentoEstoqueAdmin)
+        if obj:
+            return self.readonly_fields + ['quantidade_disponivel']
+        return self.readonly_fields
+
+
+@admin.register(MovimentoEstoque)
+class MovimentoEstoqueAdmin(admin.ModelAdmin):
+    list_display = ['criado_em', 'equipamento', 'tipo', 'quantidade', 'reserva_id', 'usuario', 'observacao']
+    list_filter = ['tipo', 'criado_em']
+    list_select_related = ['equipamento', 'usuario']
+    search_fields = ['equipamento__nome', 'observacao']
+    raw_id_fields = ['equipamento', 'reserva']
+    fields = ['equipamento', 'tipo', 'quantidade', 'reserva', 'observacao']
+    
+    def save_model(self, request, obj, form, change):
+        # Só inclusão: o livro não aceita alterações
+        movimento = registrar(
+            obj.equipamento, obj.tipo, obj.quantidade,
+            reserva=obj.reserva, usuario=request.user, observacao=obj.observacao,
+        )
+        obj.pk = movimento.pk
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class TabelaGrandeAdmin(admin.ModelAdmin):
+    """
+    Listagens com número fixo de queries em tabelas com milhões de linhas:
+    relações usadas por list_display e __str__ em list_select_related, contagem
+    estimada sem filtros e sem o "N de M resultados" (backend/paginacao.py).
+    date_hierarchy e ordering só em colunas indexadas.
+    """
+    paginator = PaginadorEstimado
+    show_full_result_count = False
 
 
 @admin.register(Orcamento)
-class OrcamentoAdmin(admin.ModelAdmin):
+class OrcamentoAdmin(TabelaGrandeAdmin):
     list_display = ['id', 'cliente', 'status', 'valor_total', 'data_criacao']
     list_filter = ['status', 'data_criacao']
+    list_select_related = ['cliente']
     search_fields = ['cliente__nome_completo', 'cliente__email']
+    date_hierarchy = 'data_criacao'
     ordering = ['-data_criacao']
+    raw_id_fields = ['cliente']
     readonly_fields = ['valor_total', 'data_criacao', 'data_atualizacao']
     inlines = [ItemOrcamentoInline]
     
@@ -74,20 +125,23 @@ class OrcamentoAdmin(admin.ModelAdmin):
 
 
 @admin.register(Reserva)
-class ReservaAdmin(admin.ModelAdmin):
+class ReservaAdmin(TabelaGrandeAdmin):
     list_display = [
         'id', 'cliente', 'status', 'data_uso', 'local_evento', 
         'valor_total', 'data_criacao'
     ]
     list_filter = ['status', 'data_uso', 'data_criacao']
+    list_select_related = ['cliente']
     search_fields = ['cliente__nome_completo', 'cliente__email', 'local_evento']
+    date_hierarchy = 'data_uso'
     ordering = ['-data_criacao']
-    readonly_fields = ['data_criacao', 'data_atualizacao', 'data_aprovacao']
+    raw_id_fields = ['cliente', 'orcamento', 'aprovado_por']
+    readonly_fields = ['data_fim', 'data_criacao', 'data_atualizacao', 'data_aprovacao']
     inlines = [ItemReservaInline]
     
     fieldsets = (
         ('Informações da Reserva', {
-            'fields': ('cliente', 'orcamento', 'status', 'data_uso', 'local_evento')
+            'fields': ('cliente', 'orcamento', 'status', 'data_uso', 'data_fim', 'local_evento')
         }),
         ('Valores', {
             'fields': ('valor_total',)
@@ -113,26 +167,81 @@ class ReservaAdmin(admin.ModelAdmin):
                 from django.utils import timezone
                 obj.data_aprovacao = timezone.now()
         super().save_model(request, obj, form, change)
+    
+    def save_related(self, request, form, formsets, change):
+        """Recalcula a devolução depois de salvar os itens (data de uso ou períodos podem ter mudado)"""
+        super().save_related(request, form, formsets, change)
+        reserva = form.instance
+        reserva.data_fim = Reserva.calcular_data_fim(reserva.data_uso, reserva.itens.values_list('modalidade', 'periodo'))
+        reserva.save(update_fields=['data_fim'])
 
 
 @admin.register(ItemOrcamento)
-class ItemOrcamentoAdmin(admin.ModelAdmin):
+class ItemOrcamentoAdmin(TabelaGrandeAdmin):
     list_display = [
         'orcamento', 'equipamento', 'quantidade', 'modalidade', 
         'periodo', 'valor_total'
     ]
     list_filter = ['modalidade', 'data_uso']
+    list_select_related = ['orcamento__cliente', 'equipamento']
     search_fields = ['equipamento__nome', 'orcamento__cliente__nome_completo']
+    date_hierarchy = 'data_uso'
+    raw_id_fields = ['orcamento', 'equipamento']
     readonly_fields = ['valor_unitario', 'valor_total']
 
 
 @admin.register(ItemReserva)
-class ItemReservaAdmin(admin.ModelAdmin):
+class ItemReservaAdmin(TabelaGrandeAdmin):
     list_display = [
         'reserva', 'equipamento', 'quantidade', 'modalidade', 
         'periodo', 'valor_total'
     ]
     list_filter = ['modalidade']
+    list_select_related = ['reserva__cliente', 'equipamento']
     search_fields = ['equipamento__nome', 'reserva__cliente__nome_completo']
+    date_hierarchy = 'reserva__data_uso'
+    raw_id_fields = ['reserva', 'equipamento']
     readonly_fields = ['valor_unitario', 'valor_total']
 
+
+class ArquivoAdmin(TabelaGrandeAdmin):
+    """Somente leitura: o arquivo é escrito apenas por equipamentos/arquivamento.py"""
+    list_select_related = ['cliente']
+    search_fields = ['id', 'cliente__nome_completo', 'cliente__email']
+    ordering = ['-data_criacao']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OrcamentoArquivado)
+class OrcamentoArquivadoAdmin(ArquivoAdmin):
+    list_display = ['id', 'cliente', 'status', 'valor_total', 'data_criacao', 'data_arquivamento']
+    list_filter = ['status']
+
+
+@admin.register(ReservaArquivada)
+class ReservaArquivadaAdmin(ArquivoAdmin):
+    list_display = ['id', 'cliente', 'status', 'data_uso', 'valor_total', 'data_criacao', 'data_arquivamento']
+    list_filter = ['status']
+
+
+@admin.register(ResumoArquivo)
+class ResumoArquivoAdmin(admin.ModelAdmin):
+    list_display = ['tipo', 'mes', 'status', 'quantidade', 'valor_total']
+    list_filter = ['tipo', 'status']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,185 @@
+"""
+Arquivamento das reservas e orçamentos fechados.
+
+Reservas concluídas, canceladas ou rejeitadas com data de uso anterior a
+ARQUIVAMENTO_DIAS dias atrás, e orçamentos convertidos ou cancelados sem
+alterações nesse período, saem das tabelas principais:
+
+- a resposta do detalhe (com os itens) vai para ReservaArquivada /
+  OrcamentoArquivado, com o mesmo id;
+- a contagem e o valor entram em ResumoArquivo, por tipo, mês e status;
+- a linha e os itens são apagados.
+
+Tudo isso acontece por lote, numa transação, com as linhas travadas
+(FOR UPDATE SKIP LOCKED onde existe): um registro nunca fica nas duas tabelas
+nem fora do resumo. As reservas vão primeiro; um orçamento só é arquivado
+quando nenhuma reserva da tabela principal aponta para ele.
+
+As listagens e os filtros passam a ler apenas os registros em uso. O detalhe
+de um registro arquivado continua disponível pela API (`LeituraArquivoMixin`)
+e os relatórios somam o resumo aos totais da tabela principal
+(equipamentos/relatorios.py).
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Prefetch
+from django.http import Http404
+from django.utils import timezone
+from rest_framework.response import Response
+from .models import (
+    Orcamento, ItemOrcamento, Reserva, ItemReserva, OrcamentoArquivado, ReservaArquivada, ResumoArquivo
+)
+from .serializers import OrcamentoSerializer, ReservaSerializer
+
+
+logger = logging.getLogger(__name__)
+
+LOTE_PADRAO = 500
+
+STATUS_RESERVA_FECHADA = ['concluida', 'cancelada', 'rejeitada']
+STATUS_ORCAMENTO_FECHADO = ['convertido', 'cancelado']
+
+
+def limite_arquivamento(agora=None):
+    return (agora or timezone.now()) - timedelta(days=settings.ARQUIVAMENTO_DIAS)
+
+
+def reservas_arquivaveis(agora=None):
+    # Usa o índice (status, data_uso) das transições do ciclo
+    return Reserva.objects.filter(
+        status__in=STATUS_RESERVA_FECHADA, data_uso__lt=timezone.localdate(limite_arquivamento(agora))
+    )
+
+
+def orcamentos_arquivaveis(agora=None):
+    # Usa o índice (status, data_atualizacao) da expiração de rascunhos
+    return Orcamento.objects.filter(
+        status__in=STATUS_ORCAMENTO_FECHADO, data_atualizacao__lt=limite_arquivamento(agora), reservas__isnull=True
+    )
+
+
+def mes_da_reserva(reserva):
+    return reserva.data_uso.replace(day=1)
+
+
+def mes_do_orcamento(orcamento):
+    return timezone.localtime(orcamento.data_criacao).date().replace(day=1)
+
+
+def somar_ao_resumo(tipo, registros, mes):
+    """Acrescenta a quantidade e o valor dos registros ao ResumoArquivo de cada (mês, status)"""
+    totais = defaultdict(lambda: [0, Decimal('0.00')])
+    for registro in registros:
+        total = totais[mes(registro), registro.status]
+        total[0] += 1
+        total[1] += registro.valor_total
+    
+    # Cria as linhas que faltam e soma com UPDATE: arquivamentos concorrentes não perdem contagens
+    ResumoArquivo.objects.bulk_create(
+        [ResumoArquivo(tipo=tipo, mes=chave[0], status=chave[1]) for chave in totais],
+        ignore_conflicts=True,
+    )
+    for (mes_resumo, status), (quantidade, valor) in totais.items():
+        ResumoArquivo.objects.filter(tipo=tipo, mes=mes_resumo, status=status).update(
+            quantidade=F('quantidade') + quantidade, valor_total=F('valor_total') + valor
+        )
+
+
+def arquivar_em_lotes(tipo, arquivaveis, carregar, arquivar, lote):
+    """Arquiva os registros de `arquivaveis` em lotes de `lote`; retorna o total arquivado"""
+    total = 0
+    while True:
+        with transaction.atomic():
+            pendentes = arquivaveis.order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                pendentes = pendentes.select_for_update(skip_locked=True, of=('self',))
+            ids = list(pendentes.values_list('id', flat=True)[:lote])
+            if not ids:
+                return total
+            
+            registros = list(carregar(ids))
+            arquivar(registros)
+        
+        total += len(registros)
+        logger.info('%s arquivados: %s (total %s)', tipo, len(registros), total)
+
+
+def carregar_reservas(ids):
+    return Reserva.objects.filter(id__in=ids).select_related('cliente').prefetch_related(
+        Prefetch('itens', queryset=ItemReserva.objects.select_related('equipamento'))
+    )
+
+
+def arquivar_reservas(reservas):
+    ReservaArquivada.objects.bulk_create([
+        ReservaArquivada(
+            id=reserva.id, cliente_id=reserva.cliente_id, status=reserva.status, data_uso=reserva.data_uso,
+            valor_total=reserva.valor_total, data_criacao=reserva.data_criacao, dados=dados,
+        )
+        for reserva, dados in zip(reservas, ReservaSerializer(reservas, many=True).data)
+    ])
+    somar_ao_resumo('reserva', reservas, mes_da_reserva)
+    ids = [reserva.id for reserva in reservas]
+    ItemReserva.objects.filter(reserva_id__in=ids).delete()
+    Reserva.objects.filter(id__in=ids).delete()
+
+
+def carregar_orcamentos(ids):
+    return Orcamento.objects.filter(id__in=ids).select_related('cliente').prefetch_related(
+        Prefetch('itens', queryset=ItemOrcamento.objects.select_related('equipamento'))
+    )
+
+
+def arquivar_orcamentos(orcamentos):
+    OrcamentoArquivado.objects.bulk_create([
+        OrcamentoArquivado(
+            id=orcamento.id, cliente_id=orcamento.cliente_id, status=orcamento.status,
+            valor_total=orcamento.valor_total, data_criacao=orcamento.data_criacao, dados=dados,
+        )
+        for orcamento, dados in zip(orcamentos, OrcamentoSerializer(orcamentos, many=True).data)
+    ])
+    somar_ao_resumo('orcamento', orcamentos, mes_do_orcamento)
+    ids = [orcamento.id for orcamento in orcamentos]
+    ItemOrcamento.objects.filter(orcamento_id__in=ids).delete()
+    Orcamento.objects.filter(id__in=ids).delete()
+
+
+def arquivar(lote=LOTE_PADRAO, agora=None):
+    """Arquiva as reservas e depois os orçamentos fechados; retorna os totais"""
+    agora = agora or timezone.now()
+    return {
+        'reservas': arquivar_em_lotes(
+            'Reservas', reservas_arquivaveis(agora), carregar_reservas, arquivar_reservas, lote
+        ),
+        'orcamentos': arquivar_em_lotes(
+            'Orçamentos', orcamentos_arquivaveis(agora), carregar_orcamentos, arquivar_orcamentos, lote
+        ),
+    }
+
+
+class LeituraArquivoMixin:
+    """
+    Para as views de detalhe: se o registro não está na tabela principal,
+    responde com a cópia arquivada do mesmo cliente (`modelo_arquivo`), com
+    `Arquivado: true` e os campos de `?fields=`/`?exclude=`.
+    """
+    modelo_arquivo = None
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            dados = self.modelo_arquivo.objects.filter(
+                pk=kwargs[self.lookup_url_kwarg or self.lookup_field], cliente=request.user
+            ).values_list('dados', flat=True).first()
+            if dados is None:
+                raise
+        
+        campos = self.get_campos()
+        if campos is not None:
+            dados = {nome: valor for nome, valor in dados.items() if nome in campos}
+        return Response(dados, headers={'Arquivado': 'true'})
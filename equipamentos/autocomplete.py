@@ -0,0 +1,75 @@
+import heapq
+import threading
+from bisect import bisect_left
+from .catalogo import versao_catalogo
+from .models import Equipamento
+from .utils import normalizar_texto
+
+
+class IndicePrefixos:
+    """
+    Índice em memória para autocompletar nomes de equipamentos.
+    
+    Mantém um array ordenado de (palavra, id) com as palavras sem acento de
+    nome, marca e modelo dos equipamentos não inativos. A busca por prefixo é
+    feita com bisect, sem acessar o banco, e só as `limite` primeiras
+    sugestões são ordenadas (heap). O índice é reconstruído sob demanda quando
+    a versão do catálogo muda (ver signals.py).
+    """
+    
+    def __init__(self):
+        self.versao = None
+        self.palavras = []
+        self.sugestoes = {}
+        self.lock = threading.Lock()
+    
+    def reconstruir(self, versao):
+        palavras = []
+        sugestoes = {}
+        equipamentos = (
+            Equipamento.objects.exclude(estado='inativo').order_by().values_list('id', 'nome', 'marca', 'modelo')
+        )
+        for id, nome, marca, modelo in equipamentos.iterator():
+            sugestoes[id] = {'id': id, 'nome': nome, 'marca': marca, 'modelo': modelo}
+            for palavra in set(normalizar_texto(f'{nome} {marca} {modelo}').split()):
+                palavras.append((palavra, id))
+        palavras.sort()
+        
+        self.palavras, self.sugestoes, self.versao = palavras, sugestoes, versao
+    
+    def atualizar(self):
+        versao = versao_catalogo()
+        if versao != self.versao:
+            with self.lock:
+                if versao != self.versao:
+                    self.reconstruir(versao)
+    
+    def ids_com_prefixo(self, prefixo):
+        ids = set()
+        palavras = self.palavras
+        i = bisect_left(palavras, (prefixo,))
+        while i < len(palavras) and palavras[i][0].startswith(prefixo):
+            ids.add(palavras[i][1])
+            i += 1
+        return ids
+    
+    def buscar(self, termo, limite=10):
+        """Retorna até `limite` sugestões cujas palavras começam com os termos buscados"""
+        self.atualizar()
+        
+        termos = normalizar_texto(termo).split()
+        if not termos:
+            return []
+        
+        ids = None
+        for prefixo in sorted(termos, key=len, reverse=True):
+            encontrados = self.ids_com_prefixo(prefixo)
+            ids = encontrados if ids is None else ids & encontrados
+            if not ids:
+                return []
+        
+        # Um prefixo curto casa com quase todo o catálogo: só os `limite` primeiros são ordenados
+        return heapq.nsmallest(limite, (self.sugestoes[id] for id in ids), key=lambda s: (s['nome'], s['id']))
+
+
+indice_equipamentos = IndicePrefixos()
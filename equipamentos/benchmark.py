@@ -0,0 +1,161 @@
+"""
+Utilitários compartilhados pelos comandos de benchmark.
+
+Os dados criados aqui devem ser usados dentro de uma transação desfeita ao
+final (`transaction.set_rollback(True)`), para não poluir o banco.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from clientes.models import Cliente
+from .models import Categoria, Equipamento, MovimentoEstoque, Orcamento, ItemOrcamento, Reserva, ItemReserva
+
+
+def medir(funcao, repeticoes):
+    """Menor tempo (segundos) entre as repetições de `funcao`"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def saldo_inicial(equipamentos):
+    """Lança no livro de estoque a quantidade disponível dos equipamentos criados com bulk_create"""
+    MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(equipamento=equipamento, tipo='ajuste', quantidade=equipamento.quantidade_disponivel,
+                         observacao='Saldo inicial')
+        for equipamento in equipamentos if equipamento.quantidade_disponivel
+    ], batch_size=1000)
+
+
+def popular(linhas):
+    """
+    Cria `linhas` equipamentos, orçamentos (com um item cada) e reservas para
+    um cliente de benchmark, além de um orçamento com `linhas` itens.
+    Retorna (cliente, orcamento_grande).
+    """
+    categoria = Categoria.objects.create(nome='Benchmark', descricao='')
+    equipamentos = Equipamento.objects.bulk_create([
+        Equipamento(
+            nome=f'Equipamento {i}', categoria=categoria, descricao='Descrição ' * 20,
+            marca=f'Marca {i % 10}', modelo=f'M-{i}', valor_diaria=Decimal('10.00') + i,
+            estado='disponivel' if i % 4 else 'manutencao', quantidade_disponivel=i % 3,
+            especificacoes_tecnicas={'potencia': f'{i * 10}W', 'canais': i % 32},
+        )
+        for i in range(linhas)
+    ])
+    saldo_inicial(equipamentos)
+    cliente = Cliente.objects.create(
+        username='benchmark@example.com', email='benchmark@example.com',
+        nome_completo='Cliente Benchmark', cpf_cnpj='000.000.000-00',
+        telefone='(00) 00000-0000', endereco='Rua', cidade='Cidade', estado='SP', cep='00000-000',
+    )
+    orcamentos = Orcamento.objects.bulk_create([
+        Orcamento(cliente=cliente, valor_total=Decimal('100.50') * i) for i in range(linhas)
+    ])
+    data_uso = date.today() + timedelta(days=1)
+    ItemOrcamento.objects.bulk_create([
+        ItemOrcamento(
+            orcamento=orcamento, equipamento=equipamentos[i], quantidade=1, periodo=1,
+            data_uso=data_uso, valor_unitario=Decimal('10.00'), valor_total=Decimal('10.00'),
+        )
+        for i, orcamento in enumerate(orcamentos)
+    ])
+    Reserva.objects.bulk_create([
+        Reserva(
+            cliente=cliente, orcamento=orcamento, data_uso=date.today() + timedelta(days=i % 60),
+            local_evento=f'Local {i}', valor_total=orcamento.valor_total,
+        )
+        for i, orcamento in enumerate(orcamentos)
+    ])
+    
+    orcamento_grande = Orcamento.objects.create(cliente=cliente, valor_total=Decimal('10.00') * linhas)
+    ItemOrcamento.objects.bulk_create([
+        ItemOrcamento(
+            orcamento=orcamento_grande, equipamento=equipamento, quantidade=2, periodo=3,
+            data_uso=data_uso, valor_unitario=equipamento.valor_diaria,
+            valor_total=equipamento.valor_diaria * 6,
+        )
+        for equipamento in equipamentos
+    ])
+    
+    return cliente, orcamento_grande
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por interpolação linear"""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def cpf_sintetico(numero):
+    """CPF no formato XXX.XXX.XXX-XX derivado de um número (não é um CPF válido)"""
+    digitos = f'{numero:011d}'
+    return f'{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}'
+
+
+def popular_fluxo(n_equipamentos, n_clientes, n_reservas, seed=42):
+    """
+    Massa de dados para o benchmark do fluxo de reservas: `n_equipamentos`
+    equipamentos em 4 categorias, `n_clientes` clientes e `n_reservas`
+    reservas (com 1 a 3 itens) distribuídas entre eles.
+    Retorna (equipamentos, clientes).
+    """
+    rnd = random.Random(seed)
+    
+    categorias = Categoria.objects.bulk_create([
+        Categoria(nome=f'Benchmark {nome}') for nome in ['Som', 'Iluminação', 'Estrutura', 'DJ']
+    ])
+    marcas = ['JBL', 'Yamaha', 'Pioneer', 'Shure', 'Behringer', 'Electro-Voice', 'Sennheiser']
+    equipamentos = Equipamento.objects.bulk_create([
+        Equipamento(
+            nome=f'Equipamento {i}', categoria=rnd.choice(categorias), descricao='Descrição ' * 20,
+            marca=rnd.choice(marcas), modelo=f'M-{i}',
+            valor_diaria=Decimal(rnd.randint(20, 2000)), valor_semanal=Decimal(rnd.randint(100, 9000)),
+            estado=rnd.choices(['disponivel', 'manutencao', 'inativo'], [90, 7, 3])[0],
+            quantidade_total=100, quantidade_disponivel=rnd.randint(50, 100),
+            especificacoes_tecnicas={'potencia': f'{rnd.randint(1, 40) * 50}W', 'canais': rnd.choice([2, 4, 8, 16, 32])},
+        )
+        for i in range(n_equipamentos)
+    ])
+    saldo_inicial(equipamentos)
+    
+    senha = make_password('benchmark')
+    clientes = Cliente.objects.bulk_create([
+        Cliente(
+            username=f'cliente{i}@benchmark.com', email=f'cliente{i}@benchmark.com', password=senha,
+            nome_completo=f'Cliente {i}', cpf_cnpj=cpf_sintetico(i),
+            telefone='(11) 99999-0000', endereco='Rua', cidade='São Paulo', estado='SP', cep='01000-000',
+        )
+        for i in range(n_clientes)
+    ])
+    
+    hoje = date.today()
+    reservas = Reserva.objects.bulk_create([
+        Reserva(
+            cliente=rnd.choice(clientes), data_uso=hoje + timedelta(days=rnd.randint(-365, 180)),
+            status=rnd.choices(['pendente', 'aprovada', 'ativa', 'concluida', 'cancelada', 'rejeitada'],
+                               [15, 25, 5, 45, 5, 5])[0],
+            local_evento=f'Local {i}', valor_total=Decimal('0.00'),
+        )
+        for i in range(n_reservas)
+    ])
+    itens = []
+    for reserva in reservas:
+        for equipamento in rnd.sample(equipamentos, min(rnd.randint(1, 3), len(equipamentos))):
+            itens.append(ItemReserva(
+                reserva=reserva, equipamento=equipamento, quantidade=1, periodo=1,
+                valor_unitario=equipamento.valor_diaria, valor_total=equipamento.valor_diaria,
+            ))
+    ItemReserva.objects.bulk_create(itens, batch_size=1000)
+    
+    return equipamentos, clientes
@@ -0,0 +1,37 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSAO_KEY = 'catalogo:versao'
+
+
+def versao_catalogo():
+    """Versão atual do catálogo; muda sempre que um equipamento ou categoria é alterado"""
+    return cache.get_or_set(VERSAO_KEY, lambda: int(time.time() * 1000), None)
+
+
+def invalidar_catalogo():
+    """Invalida todas as entradas de cache derivadas do catálogo"""
+    try:
+        cache.incr(VERSAO_KEY)
+    except ValueError:
+        cache.set(VERSAO_KEY, int(time.time() * 1000), None)
+
+
+def chave_catalogo(nome, params=None):
+    """Monta uma chave de cache vinculada à versão atual do catálogo"""
+    partes = sorted((params or {}).items())
+    assinatura = hashlib.md5(repr(partes).encode()).hexdigest()
+    return f'catalogo:{versao_catalogo()}:{nome}:{assinatura}'
+
+
+def obter_ou_calcular(nome, params, calcular):
+    """Busca um valor derivado do catálogo no cache ou o calcula e armazena"""
+    chave = chave_catalogo(nome, params)
+    valor = cache.get(chave)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave, valor, settings.CATALOGO_CACHE_TIMEOUT)
+    return valor
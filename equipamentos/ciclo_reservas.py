@@ -0,0 +1,89 @@
+"""
+Transições de status das reservas pelas datas de uso e de devolução.
+
+A devolução (`data_fim`) é o último dia do item de período mais longo (ex: 2
+semanas a partir de data_uso); reservas sem data_fim usam só a data_uso.
+
+- aprovada com fim < hoje           -> concluida (atrasadas: nunca saíram pelo
+  ciclo, então o estoque não é alterado)
+- aprovada com data_uso <= hoje     -> ativa     (movimentos 'reserva': saem do estoque)
+- ativa com fim < hoje              -> concluida (movimentos 'liberacao': voltam ao estoque)
+
+Cada etapa processa lotes de reservas com UPDATEs em conjunto, cada lote na
+sua própria transação. O próprio status é o progresso: rodar de novo (ou
+continuar depois de uma interrupção) só pega o que ainda não mudou. As linhas
+do lote são travadas (FOR UPDATE SKIP LOCKED onde existe), então execuções
+concorrentes não processam a mesma reserva duas vezes.
+"""
+import logging
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from .estoque import agendar_atualizacao
+from .models import MovimentoEstoque, Reserva, ItemReserva
+
+
+logger = logging.getLogger(__name__)
+
+LOTE_PADRAO = 1000
+
+
+def ajustar_estoque(reserva_ids, sinal):
+    """Registra no livro a saída (sinal=-1) ou o retorno (sinal=1) dos itens das reservas (só INSERTs)"""
+    itens = (
+        ItemReserva.objects.filter(reserva_id__in=reserva_ids)
+        .values_list('reserva_id', 'equipamento_id')
+        .annotate(total=Sum('quantidade'))
+        .order_by()
+    )
+    tipo = 'reserva' if sinal < 0 else 'liberacao'
+    movimentos = MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(equipamento_id=equipamento_id, reserva_id=reserva_id, tipo=tipo, quantidade=sinal * total)
+        for reserva_id, equipamento_id, total in itens
+    ])
+    if movimentos:
+        agendar_atualizacao(movimento.equipamento_id for movimento in movimentos)
+
+
+def encerradas_antes(hoje):
+    """Reservas cujo último dia de uso já passou (usa os índices (status, data_fim) e (status, data_uso))"""
+    return Q(data_fim__lt=hoje) | Q(data_fim__isnull=True, data_uso__lt=hoje)
+
+
+def transicionar(filtro, novo_status, sinal_estoque=0, lote=LOTE_PADRAO):
+    """Move as reservas do filtro (Q) para `novo_status` em lotes; retorna o total movido"""
+    total = 0
+    while True:
+        with transaction.atomic():
+            pendentes = Reserva.objects.filter(filtro).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                pendentes = pendentes.select_for_update(skip_locked=True)
+            ids = list(pendentes.values_list('id', flat=True)[:lote])
+            if not ids:
+                return total
+            
+            movidas = Reserva.objects.filter(filtro, id__in=ids).update(
+                status=novo_status, data_atualizacao=timezone.now()
+            )
+            if sinal_estoque:
+                ajustar_estoque(ids, sinal_estoque)
+        
+        total += movidas
+        logger.info('Reservas -> %s: %s (total %s)', novo_status, movidas, total)
+
+
+def atualizar_ciclo_reservas(hoje=None, lote=LOTE_PADRAO):
+    """Executa todas as transições vencidas até `hoje`; retorna a contagem por etapa"""
+    hoje = hoje or timezone.localdate()
+    return {
+        'atrasadas_concluidas': transicionar(
+            Q(status='aprovada') & encerradas_antes(hoje), 'concluida', lote=lote
+        ),
+        # Inclui as aprovadas com data_uso passada que ainda estão no período de uso
+        'ativadas': transicionar(
+            Q(status='aprovada', data_uso__lte=hoje), 'ativa', sinal_estoque=-1, lote=lote
+        ),
+        'concluidas': transicionar(
+            Q(status='ativa') & encerradas_antes(hoje), 'concluida', sinal_estoque=1, lote=lote
+        ),
+    }
@@ -0,0 +1,192 @@
+"""
+Livro de estoque dos equipamentos.
+
+Toda entrada e saída é uma linha nova de MovimentoEstoque: registrar um
+movimento são só INSERTs (o movimento e a tarefa que atualiza as projeções),
+sem travar nem atualizar a linha do equipamento. De tempos em
+tempos `consolidar` grava um SaldoEstoque para cada equipamento que teve
+movimentos, e a partir dele:
+
+    saldo atual       = último saldo + movimentos com id > saldo.ate_movimento
+    saldo em uma data = último saldo até a data + movimentos até a data
+
+As duas leituras usam os índices (equipamento, ate_movimento) e
+(equipamento, id) e só somam os movimentos desde a última consolidação.
+
+A marca d'água de uma consolidação é o maior id entre os movimentos criados há
+mais de ESTOQUE_MARGEM_CONSOLIDACAO segundos. Sem a margem, um movimento de id
+menor cuja transação ainda não terminou ficaria de fora do saldo para sempre.
+
+`Equipamento.quantidade_disponivel` e `quantidade_total` são projeções do
+livro usadas pelas listagens e filtros, recalculadas fora da transação do
+movimento pela tarefa `equipamentos.atualizar_estoque` (`atualizar_projecoes`)
+e corrigidas por `consolidar` quando divergirem. O total é a parte editada
+diretamente mais a soma de todas as compras e baixas do livro
+(`quantidade_total_livro` guarda a soma já aplicada), então a atualização é
+idempotente e uma tarefa perdida ou repetida não altera o resultado.
+Entre o movimento e a execução da tarefa as projeções ficam defasadas; quem
+decide com base no estoque (ex: criar uma reserva) usa `saldo_atual`.
+As projeções não mudam a `versao` do equipamento (ver `Versionado.campos_projecao`).
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+from tarefas.fila import enfileirar
+from .catalogo import invalidar_catalogo
+from .models import Equipamento, MovimentoEstoque, SaldoEstoque
+
+
+logger = logging.getLogger(__name__)
+
+LOTE_PADRAO = 1000
+
+# Tipos que também alteram a quantidade total (o equipamento entra ou sai do patrimônio)
+TIPOS_PATRIMONIO = {'compra', 'baixa'}
+
+TAREFA_ATUALIZACAO = 'equipamentos.atualizar_estoque'
+
+
+def agendar_atualizacao(equipamento_ids):
+    """Enfileira a atualização das projeções dos equipamentos"""
+    return enfileirar(TAREFA_ATUALIZACAO, {'equipamento_ids': sorted(set(equipamento_ids))}, prioridade=10)
+
+
+def registrar(equipamento, tipo, quantidade, reserva=None, usuario=None, observacao=''):
+    """Acrescenta um movimento (quantidade negativa = saída) e agenda a atualização das projeções"""
+    equipamento_id = getattr(equipamento, 'pk', equipamento)
+    with transaction.atomic():
+        movimento = MovimentoEstoque.objects.create(
+            equipamento_id=equipamento_id, tipo=tipo, quantidade=quantidade,
+            reserva=reserva, usuario=usuario, observacao=observacao,
+        )
+        agendar_atualizacao([equipamento_id])
+    return movimento
+
+
+def ultimos_saldos(equipamento_ids, momento=None):
+    """{equipamento_id: (quantidade, ate_movimento)} do último SaldoEstoque (até `momento`, se dado)"""
+    anteriores = SaldoEstoque.objects.filter(equipamento=OuterRef('equipamento'))
+    if momento is not None:
+        anteriores = anteriores.filter(data__lte=momento)
+    ultimo = Subquery(anteriores.order_by('-ate_movimento').values('id')[:1])
+    return {
+        equipamento_id: (quantidade, ate_movimento)
+        for equipamento_id, quantidade, ate_movimento in SaldoEstoque.objects.filter(
+            equipamento_id__in=equipamento_ids, id=ultimo
+        ).values_list('equipamento_id', 'quantidade', 'ate_movimento')
+    }
+
+
+def somar(equipamento_ids, momento=None, ate_movimento=None):
+    """{equipamento_id: (saldo, movimentos somados após o último saldo)}"""
+    equipamento_ids = list(equipamento_ids)
+    base = ultimos_saldos(equipamento_ids, momento)
+    resultado = {equipamento_id: [base.get(equipamento_id, (0, 0))[0], 0] for equipamento_id in equipamento_ids}
+    
+    # Depois de uma consolidação quase todos compartilham a mesma marca d'água: uma consulta por marca
+    por_marca = defaultdict(list)
+    for equipamento_id in equipamento_ids:
+        por_marca[base.get(equipamento_id, (0, 0))[1]].append(equipamento_id)
+    
+    for marca, grupo in por_marca.items():
+        movimentos = MovimentoEstoque.objects.filter(equipamento_id__in=grupo, id__gt=marca)
+        if momento is not None:
+            movimentos = movimentos.filter(criado_em__lte=momento)
+        if ate_movimento is not None:
+            movimentos = movimentos.filter(id__lte=ate_movimento)
+        for equipamento_id, total, quantidade in (
+            movimentos.values_list('equipamento_id').annotate(Sum('quantidade'), Count('id')).order_by()
+        ):
+            resultado[equipamento_id][0] += total
+            resultado[equipamento_id][1] = quantidade
+    
+    return {equipamento_id: tuple(valores) for equipamento_id, valores in resultado.items()}
+
+
+def saldo_atual(equipamento_ids):
+    """{equipamento_id: saldo} segundo o livro de estoque"""
+    return {equipamento_id: saldo for equipamento_id, (saldo, _) in somar(equipamento_ids).items()}
+
+
+def saldo_em(equipamento_ids, momento):
+    """{equipamento_id: saldo} no instante `momento` (datetime)"""
+    return {equipamento_id: saldo for equipamento_id, (saldo, _) in somar(equipamento_ids, momento).items()}
+
+
+def atualizar_projecoes(equipamento_ids):
+    """
+    Recalcula quantidade_total e quantidade_disponivel a partir do livro; retorna quantos mudaram.
+    
+    Idempotente: a parte do total que vem do livro é sempre a soma de todas as compras e
+    baixas, então rodar de novo (tarefa repetida, consolidação) não soma duas vezes.
+    """
+    with transaction.atomic():
+        atuais = Equipamento.objects.select_for_update().filter(id__in=equipamento_ids).order_by('id')
+        atuais = list(atuais.values_list('id', 'quantidade_disponivel', 'quantidade_total', 'quantidade_total_livro'))
+        ids = [linha[0] for linha in atuais]
+        saldos = saldo_atual(ids)
+        patrimonio = dict(
+            MovimentoEstoque.objects.filter(equipamento_id__in=ids, tipo__in=TIPOS_PATRIMONIO)
+            .values_list('equipamento_id').annotate(Sum('quantidade')).order_by()
+        )
+        
+        corrigidos = {}
+        for equipamento_id, disponivel, total, livro in atuais:
+            novo_livro = patrimonio.get(equipamento_id, 0)
+            novo_total = max(0, total - livro + novo_livro)
+            saldo = max(0, min(saldos[equipamento_id], novo_total))
+            if (saldo, novo_total, novo_livro) != (disponivel, total, livro):
+                corrigidos[equipamento_id] = (saldo, novo_total, novo_livro)
+        if corrigidos:
+            Equipamento.objects.filter(id__in=corrigidos).update(
+                quantidade_disponivel=por_id(corrigidos, 0),
+                quantidade_total=por_id(corrigidos, 1),
+                quantidade_total_livro=por_id(corrigidos, 2),
+            )
+    if corrigidos:
+        # O UPDATE em massa não dispara post_save: a faceta de disponibilidade ficaria velha
+        invalidar_catalogo()
+    return len(corrigidos)
+
+
+def por_id(valores, posicao):
+    """CASE id WHEN ... com o valor na `posicao` de cada tupla: várias linhas num único UPDATE"""
+    return Case(
+        *[When(id=equipamento_id, then=Value(tupla[posicao])) for equipamento_id, tupla in valores.items()],
+        output_field=IntegerField(),
+    )
+
+
+def consolidar(lote=LOTE_PADRAO):
+    """Grava os saldos de quem teve movimentos e corrige as projeções; retorna as contagens"""
+    corte = timezone.now() - timedelta(seconds=getattr(settings, 'ESTOQUE_MARGEM_CONSOLIDACAO', 60))
+    marca = MovimentoEstoque.objects.filter(criado_em__lte=corte).aggregate(marca=Max('id'))['marca']
+    totais = {'saldos': 0, 'corrigidos': 0}
+    
+    ultimo_id = 0
+    while True:
+        ids = list(
+            Equipamento.objects.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            break
+        ultimo_id = ids[-1]
+        
+        if marca is not None:
+            novos = [
+                SaldoEstoque(equipamento_id=equipamento_id, quantidade=saldo, ate_movimento=marca, data=corte)
+                for equipamento_id, (saldo, movimentos) in somar(ids, ate_movimento=marca).items()
+                if movimentos
+            ]
+            # Consolidações concorrentes com a mesma marca gravam o mesmo saldo
+            SaldoEstoque.objects.bulk_create(novos, ignore_conflicts=True)
+            totais['saldos'] += len(novos)
+        totais['corrigidos'] += atualizar_projecoes(ids)
+    
+    if totais['corrigidos']:
+        logger.warning('Estoque: %s equipamentos divergiam do livro e foram corrigidos', totais['corrigidos'])
+    return totais
@@ -0,0 +1,63 @@
+"""
+Expiração dos orçamentos em rascunho.
+
+Um rascunho sem alterações há ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS dias foi
+abandonado (a tela de novo orçamento cria outro quando não encontra um).
+`purgar_rascunhos` apaga esses orçamentos e seus itens em lotes, cada lote
+numa transação curta: nenhum DELETE trava milhares de linhas de uma vez nem
+dispara uma cascata proporcional à tabela inteira. As linhas do lote ficam
+travadas (FOR UPDATE SKIP LOCKED onde existe) até o fim da transação, então
+um rascunho em edição no momento fica para a próxima execução.
+
+Os totais apagados vão para as métricas (`registro.incrementar`) e para o log.
+"""
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from backend.metricas import registro
+from .models import Orcamento, ItemOrcamento
+
+
+logger = logging.getLogger(__name__)
+
+LOTE_PADRAO = 500
+
+
+def limite_expiracao(agora=None):
+    return (agora or timezone.now()) - timedelta(days=settings.ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS)
+
+
+def rascunhos_expirados(agora=None):
+    return Orcamento.objects.filter(status='rascunho', data_atualizacao__lt=limite_expiracao(agora))
+
+
+def purgar_rascunhos(lote=LOTE_PADRAO, agora=None, pausa=0.0):
+    """Apaga os rascunhos expirados em lotes de `lote` orçamentos; retorna os totais apagados"""
+    expirados = rascunhos_expirados(agora)
+    totais = {'orcamentos': 0, 'itens': 0}
+    
+    while True:
+        with transaction.atomic():
+            pendentes = expirados.order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                pendentes = pendentes.select_for_update(skip_locked=True)
+            ids = list(pendentes.values_list('id', flat=True)[:lote])
+            if not ids:
+                break
+            
+            itens = ItemOrcamento.objects.filter(orcamento_id__in=ids).delete()[0]
+            orcamentos = expirados.filter(id__in=ids).delete()[1].get(Orcamento._meta.label, 0)
+        
+        totais['orcamentos'] += orcamentos
+        totais['itens'] += itens
+        registro.incrementar('orcamentos_rascunho_purgados_total', orcamentos, 'Orçamentos em rascunho expirados apagados')
+        registro.incrementar('itens_orcamento_purgados_total', itens, 'Itens de orçamentos expirados apagados')
+        logger.info('Rascunhos expirados apagados: %s orçamentos, %s itens (total %s)', orcamentos, itens, totais)
+        
+        if pausa:
+            time.sleep(pausa)
+    
+    return totais
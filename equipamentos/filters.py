@@ -0,0 +1,58 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import EspecificacaoTecnica
+from .utils import normalizar_texto, converter_numero
+
+
+class EspecificacaoFilterBackend(BaseFilterBackend):
+    """
+    Filtra equipamentos pelas especificações técnicas usando o índice
+    EspecificacaoTecnica (sem interpretar o JSON linha a linha).
+    
+    Parâmetros aceitos:
+        spec__<chave>=<valor>          igualdade (numérica quando o valor é só um número)
+        spec__<chave>__gte=<número>    também __gt, __lte e __lt
+    
+    Ex: ?spec__potencia__gte=1000&spec__canais=16
+    
+    Operador desconhecido ou valor não numérico em comparação resultam em 400.
+    """
+    prefixo = 'spec__'
+    operadores = ['gte', 'gt', 'lte', 'lt']
+    
+    def filter_queryset(self, request, queryset, view):
+        for parametro, valor in request.query_params.items():
+            if not parametro.startswith(self.prefixo) or valor == '':
+                continue
+            
+            chave, _, operador = parametro[len(self.prefixo):].partition('__')
+            chave = normalizar_texto(chave)
+            if not chave:
+                continue
+            
+            condicoes = self.montar_condicoes(parametro, operador, valor)
+            queryset = queryset.filter(
+                id__in=EspecificacaoTecnica.objects.filter(
+                    chave=chave, **condicoes
+                ).values('equipamento_id')
+            )
+        
+        return queryset
+    
+    def montar_condicoes(self, parametro, operador, valor):
+        """Converte operador/valor da query string em lookups do índice"""
+        numero = converter_numero(valor)
+        
+        if operador in self.operadores:
+            if numero is None:
+                raise ValidationError({parametro: f"Valor numérico esperado, recebido '{valor}'."})
+            return {f'valor_numerico__{operador}': numero}
+        
+        if operador:
+            raise ValidationError({
+                parametro: f"Operador '{operador}' inválido. Use {', '.join(self.operadores)}."
+            })
+        
+        if numero is not None:
+            return {'valor_numerico': numero}
+        return {'valor_texto': normalizar_texto(valor)}
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from equipamentos.arquivamento import LOTE_PADRAO, arquivar, orcamentos_arquivaveis, reservas_arquivaveis
+
+
+class Command(BaseCommand):
+    help = (
+        'Move para as tabelas de arquivo, em lotes, as reservas e os orçamentos '
+        'fechados há mais de ARQUIVAMENTO_DIAS dias. Agende no cron (ex: '
+        'semanalmente) ou enfileire a tarefa equipamentos.arquivar.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Registros por transação')
+        parser.add_argument('--simular', action='store_true', help='Só conta os registros a arquivar')
+    
+    def handle(self, *args, **options):
+        if options['simular']:
+            # Os orçamentos convertidos só entram depois que as suas reservas forem arquivadas
+            self.stdout.write(f'{reservas_arquivaveis().count()} reservas e {orcamentos_arquivaveis().count()} orçamentos a arquivar')
+            return
+        
+        resultado = arquivar(lote=options['lote'])
+        for tipo, total in resultado.items():
+            self.stdout.write(f'{tipo:<12} {total}')
@@ -0,0 +1,20 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from equipamentos.ciclo_reservas import LOTE_PADRAO, atualizar_ciclo_reservas
+
+
+class Command(BaseCommand):
+    help = (
+        'Ativa as reservas aprovadas que chegaram à data de uso e conclui as que '
+        'já passaram, ajustando o estoque. Idempotente: agende no cron '
+        '(ex: a cada hora) ou enfileire a tarefa equipamentos.atualizar_ciclo_reservas.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--data', type=date.fromisoformat, help='Data de referência (AAAA-MM-DD); padrão: hoje')
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO)
+    
+    def handle(self, *args, **options):
+        resultado = atualizar_ciclo_reservas(hoje=options['data'], lote=options['lote'])
+        for etapa, total in resultado.items():
+            self.stdout.write(f'{etapa:<22} {total}')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from backend.compressao import codificadores_disponiveis
+from equipamentos.benchmark import medir, popular
+from equipamentos.serializers import OrcamentoSerializer
+from equipamentos.views import EquipamentoListView
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de CPU e os bytes economizados por cada codificador e nível '
+        'de compressão para o catálogo e um orçamento grande. '
+        'Os dados de teste são desfeitos ao final.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        repeticoes = options['repeticoes']
+        niveis = {'gzip': [1, 6, 9], 'br': [1, 4, 8], 'zstd': [1, 3, 10]}
+        
+        with transaction.atomic():
+            _, orcamento_grande = popular(options['linhas'])
+            
+            projecao = EquipamentoListView.projecao
+            renderer = JSONRenderer()
+            payloads = [
+                ('catálogo', renderer.render(
+                    projecao.converter(projecao.aplicar(EquipamentoListView.queryset.all()))
+                )),
+                ('orçamento grande', renderer.render(OrcamentoSerializer(orcamento_grande).data)),
+            ]
+            
+            for nome, conteudo in payloads:
+                self.stdout.write(f'{nome}: {len(conteudo)} bytes')
+                for classe in codificadores_disponiveis():
+                    for nivel in niveis[classe.encoding]:
+                        codificador = classe(nivel)
+                        tempo = medir(lambda: codificador.comprimir(conteudo), repeticoes)
+                        tamanho = len(codificador.comprimir(conteudo))
+                        self.stdout.write(
+                            f'  {classe.encoding:<5} nível {nivel:<2} {tempo * 1000:>8.2f} ms | '
+                            f'{tamanho:>9} bytes | economia {1 - tamanho / len(conteudo):>6.1%} | '
+                            f'{len(conteudo) / tempo / 1e6:>7.1f} MB/s'
+                        )
+            
+            transaction.set_rollback(True)
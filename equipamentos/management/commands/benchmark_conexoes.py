@@ -0,0 +1,60 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from equipamentos.benchmark import percentil
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de obter uma conexão por requisição: conexão nova a cada '
+        'requisição (CONN_MAX_AGE=0), conexão persistente com e sem health check '
+        'e, se configurado, o pool do psycopg 3.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=200)
+        parser.add_argument('--database', default='default')
+    
+    def handle(self, *args, **options):
+        conexao = connections[options['database']]
+        repeticoes = options['repeticoes']
+        pool = 'pool' in conexao.settings_dict.get('OPTIONS', {})
+        
+        def consultar():
+            with conexao.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        
+        def nova_conexao():
+            conexao.close()
+            consultar()
+        
+        def persistente():
+            consultar()
+        
+        def persistente_health_check():
+            conexao.health_check_enabled = True
+            conexao.health_check_done = False
+            consultar()
+        
+        cenarios = [
+            ('pool (checkout por requisição)' if pool else 'conexão nova por requisição', nova_conexao),
+            ('persistente', persistente),
+            ('persistente + health check', persistente_health_check),
+        ]
+        
+        self.stdout.write(f'{conexao.vendor} ({conexao.settings_dict["NAME"]})')
+        try:
+            for nome, funcao in cenarios:
+                consultar()
+                tempos = []
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    funcao()
+                    tempos.append(time.perf_counter() - inicio)
+                self.stdout.write(
+                    f'  {nome:<32} p50 {percentil(tempos, 50) * 1000:>8.3f} ms | '
+                    f'p95 {percentil(tempos, 95) * 1000:>8.3f} ms'
+                )
+        finally:
+            conexao.close()
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from equipamentos.benchmark import medir, popular
+from equipamentos.models import Orcamento, Reserva
+from equipamentos.serializers import (
+    EquipamentoListSerializer, OrcamentoListSerializer, ReservaListSerializer
+)
+from equipamentos.views import EquipamentoListView, OrcamentoListView, ReservaListView
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a serialização das listagens via ModelSerializer e via projeção '
+        '(values() + conversores), verificando que o JSON é idêntico. '
+        'Os dados de teste são criados em uma transação desfeita ao final.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        linhas = options['linhas']
+        repeticoes = options['repeticoes']
+        
+        with transaction.atomic():
+            cliente, _ = popular(linhas)
+            
+            casos = [
+                ('equipamentos', EquipamentoListView.queryset.order_by('categoria__nome', 'nome', 'id'),
+                 EquipamentoListSerializer, EquipamentoListView.projecao),
+                ('orcamentos', Orcamento.objects.filter(cliente=cliente).order_by('-data_criacao', '-id'),
+                 OrcamentoListSerializer, OrcamentoListView.projecao),
+                ('reservas', Reserva.objects.filter(cliente=cliente).order_by('-data_criacao', '-id'),
+                 ReservaListSerializer, ReservaListView.projecao),
+            ]
+            
+            # JSONRenderer do DRF para comparar apenas a serialização
+            renderer = JSONRenderer()
+            for nome, queryset, serializer_class, projecao in casos:
+                def via_serializer():
+                    return renderer.render(serializer_class(queryset.all(), many=True).data)
+                
+                def via_projecao():
+                    return renderer.render(projecao.converter(projecao.aplicar(queryset.all())))
+                
+                if via_serializer() != via_projecao():
+                    raise CommandError(f'{nome}: saída da projeção difere do serializer.')
+                
+                total = queryset.count()
+                tempo_serializer = medir(via_serializer, repeticoes)
+                tempo_projecao = medir(via_projecao, repeticoes)
+                self.stdout.write(
+                    f'{nome:<14} {total:>7} linhas | '
+                    f'serializer {total / tempo_serializer:>10.0f} linhas/s | '
+                    f'projeção {total / tempo_projecao:>10.0f} linhas/s | '
+                    f'ganho {tempo_serializer / tempo_projecao:.1f}x'
+                )
+            
+            transaction.set_rollback(True)
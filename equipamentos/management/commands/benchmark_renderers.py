@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from backend import renderers
+from equipamentos.benchmark import medir, popular
+from equipamentos.serializers import OrcamentoSerializer
+from equipamentos.views import EquipamentoListView
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara tempo de codificação e tamanho da resposta entre o JSONRenderer '
+        'do DRF, o ORJSONRenderer e o MessagePackRenderer para o catálogo e um '
+        'orçamento grande. Os dados de teste são desfeitos ao final.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1000)
+        parser.add_argument('--repeticoes', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        repeticoes = options['repeticoes']
+        
+        candidatos = [('json (DRF)', JSONRenderer())]
+        if renderers.orjson is not None:
+            candidatos.append(('orjson', renderers.ORJSONRenderer()))
+        if renderers.msgpack is not None:
+            candidatos.append(('msgpack', renderers.MessagePackRenderer()))
+        
+        with transaction.atomic():
+            _, orcamento_grande = popular(options['linhas'])
+            
+            projecao = EquipamentoListView.projecao
+            payloads = [
+                ('catálogo', projecao.converter(projecao.aplicar(EquipamentoListView.queryset.all()))),
+                ('orçamento grande', OrcamentoSerializer(orcamento_grande).data),
+            ]
+            
+            for nome, data in payloads:
+                referencia = JSONRenderer().render(data)
+                if renderers.orjson is not None and renderers.ORJSONRenderer().render(data) != referencia:
+                    raise CommandError(f'{nome}: saída do ORJSONRenderer difere do JSONRenderer.')
+                
+                self.stdout.write(nome)
+                for rotulo, renderer in candidatos:
+                    tempo = medir(lambda: renderer.render(data), repeticoes)
+                    tamanho = len(renderer.render(data))
+                    self.stdout.write(
+                        f'  {rotulo:<12} {tempo * 1000:>9.2f} ms | {tamanho:>10} bytes'
+                    )
+            
+            transaction.set_rollback(True)
@@ -0,0 +1,215 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from clientes.models import Cliente
+from equipamentos.benchmark import percentil, popular_fluxo, cpf_sintetico
+
+
+# Baseline versionado com o código; gerado com os parâmetros padrão
+BASELINE_PADRAO = settings.BASE_DIR / 'benchmarks' / 'baseline_reservas.json'
+
+PARAMETROS = ['equipamentos', 'clientes', 'reservas', 'repeticoes', 'tamanhos_orcamento', 'seed']
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark reproduzível do fluxo de reservas: catálogo, detalhe, montagem de '
+        'orçamentos, finalização, criação de reserva e listagem administrativa. '
+        'Gera p50/p95 de latência e número de queries em JSON e compara com o baseline '
+        'versionado em benchmarks/: falha se o número de queries aumentar; a latência depende '
+        'da máquina e só gera aviso (use --falhar-latencia com um baseline gerado na mesma máquina). '
+        'Os dados são criados em uma transação desfeita ao final.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--equipamentos', type=int, default=500)
+        parser.add_argument('--clientes', type=int, default=200)
+        parser.add_argument('--reservas', type=int, default=2000)
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--tamanhos-orcamento', default='1,10,50',
+                            help='Quantidade de itens dos orçamentos montados (separados por vírgula)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--saida', default='benchmark_reservas.json')
+        parser.add_argument('--baseline', default=str(BASELINE_PADRAO),
+                            help='JSON de uma execução anterior para comparação (padrão: o baseline versionado)')
+        parser.add_argument('--sem-baseline', action='store_true', help='Apenas mede, sem comparar')
+        parser.add_argument('--atualizar-baseline', action='store_true',
+                            help='Grava o resultado como novo baseline em vez de comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento relativo de p95 aceito antes de acusar regressão')
+        parser.add_argument('--tolerancia-ms', type=float, default=5.0,
+                            help='Aumento absoluto de p95 (ms) sempre aceito, para o ruído de operações rápidas')
+        parser.add_argument('--falhar-latencia', action='store_true',
+                            help='Falha também quando o p95 passa das tolerâncias (baseline da mesma máquina)')
+    
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.amostras = {}
+        tamanhos = [int(t) for t in options['tamanhos_orcamento'].split(',')]
+        
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            equipamentos, clientes = popular_fluxo(
+                options['equipamentos'], options['clientes'], options['reservas'], options['seed']
+            )
+            self.stdout.write(f'Massa de dados criada em {time.perf_counter() - inicio:.1f}s')
+            
+            self.equipamentos = [e for e in equipamentos if e.estado == 'disponivel']
+            self.cliente = APIClient()
+            self.cliente.force_authenticate(clientes[0])
+            self.admin = APIClient()
+            self.admin.force_authenticate(self.criar_staff())
+            
+            self.medir_catalogo(options['repeticoes'])
+            self.medir_fluxo_orcamento(tamanhos, options['repeticoes'])
+            self.medir_admin(options['repeticoes'])
+            
+            transaction.set_rollback(True)
+        
+        resultado = {
+            'parametros': {chave: options[chave] for chave in PARAMETROS},
+            'operacoes': {nome: self.resumir(medidas) for nome, medidas in sorted(self.amostras.items())},
+        }
+        conteudo = json.dumps(resultado, indent=2, ensure_ascii=False) + '\n'
+        Path(options['saida']).write_text(conteudo)
+        self.exibir(resultado['operacoes'])
+        self.stdout.write(f'Resultado salvo em {options["saida"]}')
+        
+        if options['atualizar_baseline']:
+            Path(options['baseline']).parent.mkdir(parents=True, exist_ok=True)
+            Path(options['baseline']).write_text(conteudo)
+            self.stdout.write(self.style.SUCCESS(f'Baseline atualizado em {options["baseline"]}.'))
+        elif not options['sem_baseline']:
+            self.comparar(
+                resultado, options['baseline'], options['tolerancia'], options['tolerancia_ms'],
+                options['falhar_latencia'],
+            )
+    
+    def criar_staff(self):
+        return Cliente.objects.create(
+            username='staff@benchmark.com', email='staff@benchmark.com', nome_completo='Staff Benchmark',
+            cpf_cnpj=cpf_sintetico(99999999999), telefone='(11) 99999-0000', endereco='Rua',
+            cidade='São Paulo', estado='SP', cep='01000-000', is_staff=True,
+        )
+    
+    def requisitar(self, nome, cliente, metodo, url, data=None, status_esperado=200):
+        """Executa a requisição registrando latência e número de queries"""
+        with CaptureQueriesContext(connection) as queries:
+            inicio = time.perf_counter()
+            response = getattr(cliente, metodo)(url, data, format='json')
+            duracao = (time.perf_counter() - inicio) * 1000
+        
+        if response.status_code != status_esperado:
+            raise CommandError(f'{nome}: status {response.status_code} ({response.content[:200]!r})')
+        
+        self.amostras.setdefault(nome, []).append((duracao, len(queries)))
+        return response
+    
+    def medir_catalogo(self, repeticoes):
+        url = reverse('equipamento-list')
+        consultas = {
+            'catalogo_lista': {},
+            'catalogo_filtros': {'disponivel': 'true', 'preco_min': 100, 'preco_max': 1500, 'marca': 'JBL'},
+            'catalogo_busca': {'search': 'Equipamento 1'},
+            'catalogo_facetas': {'facets': 'true', 'disponivel': 'true'},
+        }
+        for _ in range(repeticoes):
+            for nome, params in consultas.items():
+                self.requisitar(nome, self.cliente, 'get', url, params)
+            equipamento = self.rnd.choice(self.equipamentos)
+            self.requisitar('equipamento_detalhe', self.cliente, 'get',
+                            reverse('equipamento-detail', args=[equipamento.id]))
+    
+    def medir_fluxo_orcamento(self, tamanhos, repeticoes):
+        data_uso = (date.today() + timedelta(days=30)).isoformat()
+        
+        for tamanho in tamanhos:
+            for _ in range(max(1, repeticoes // tamanho)):
+                orcamento = self.requisitar('orcamento_criar', self.cliente, 'post',
+                                            reverse('orcamento-create'), {}, 201).json()
+                
+                for equipamento in self.rnd.sample(self.equipamentos, min(tamanho, len(self.equipamentos))):
+                    self.requisitar(
+                        f'orcamento_adicionar_item_{tamanho}', self.cliente, 'post',
+                        reverse('orcamento-adicionar-item', args=[orcamento['id']]),
+                        {'equipamento': equipamento.id, 'quantidade': 1, 'modalidade': 'diaria',
+                         'periodo': 2, 'data_uso': data_uso},
+                        201,
+                    )
+                
+                self.requisitar(f'orcamento_finalizar_{tamanho}', self.cliente, 'post',
+                                reverse('orcamento-finalizar', args=[orcamento['id']]))
+                self.requisitar(
+                    f'reserva_criar_{tamanho}', self.cliente, 'post',
+                    reverse('criar-reserva-orcamento', args=[orcamento['id']]),
+                    {'data_uso': data_uso, 'local_evento': 'Benchmark'},
+                    201,
+                )
+    
+    def medir_admin(self, repeticoes):
+        url = reverse('reserva-admin-list')
+        for _ in range(repeticoes):
+            self.requisitar('admin_reservas', self.admin, 'get', url)
+            self.requisitar('admin_reservas_filtro', self.admin, 'get', url, {'status': 'pendente'})
+    
+    def resumir(self, medidas):
+        duracoes = [duracao for duracao, _ in medidas]
+        queries = [quantidade for _, quantidade in medidas]
+        return {
+            'amostras': len(medidas),
+            'p50_ms': round(percentil(duracoes, 50), 3),
+            'p95_ms': round(percentil(duracoes, 95), 3),
+            'queries_media': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+    
+    def exibir(self, operacoes):
+        for nome, r in operacoes.items():
+            self.stdout.write(
+                f'{nome:<32} p50 {r["p50_ms"]:>9.2f} ms | p95 {r["p95_ms"]:>9.2f} ms | '
+                f'queries {r["queries_media"]:>6.1f} (máx {r["queries_max"]})'
+            )
+    
+    def comparar(self, resultado, caminho, tolerancia, tolerancia_ms, falhar_latencia=False):
+        try:
+            baseline = json.loads(Path(caminho).read_text())
+        except FileNotFoundError:
+            raise CommandError(f'Baseline {caminho} não encontrado (gere com --atualizar-baseline).')
+        
+        # Números de outra massa de dados não são comparáveis
+        if baseline['parametros'] != resultado['parametros']:
+            raise CommandError(
+                f'Parâmetros diferentes do baseline {caminho}: {baseline["parametros"]}. '
+                'Use os mesmos parâmetros, outro --baseline ou --sem-baseline.'
+            )
+        
+        regressoes = []
+        lentas = []
+        for nome, atual in resultado['operacoes'].items():
+            anterior = baseline['operacoes'].get(nome)
+            if anterior is None:
+                continue
+            if atual['queries_max'] > anterior['queries_max']:
+                regressoes.append(f'{nome}: queries {anterior["queries_max"]} -> {atual["queries_max"]}')
+            # O número de queries é exato em qualquer máquina; a latência só é comparável na mesma
+            limite = max(anterior['p95_ms'] * (1 + tolerancia), anterior['p95_ms'] + tolerancia_ms)
+            if atual['p95_ms'] > limite:
+                lentas.append(f'{nome}: p95 {anterior["p95_ms"]:.2f} -> {atual["p95_ms"]:.2f} ms')
+        
+        if falhar_latencia:
+            regressoes += lentas
+        elif lentas:
+            self.stdout.write(self.style.WARNING(
+                'p95 acima do baseline (aviso; o baseline pode ser de outra máquina):\n  ' + '\n  '.join(lentas)
+            ))
+        if regressoes:
+            raise CommandError('Regressões em relação ao baseline:\n  ' + '\n  '.join(regressoes))
+        self.stdout.write(self.style.SUCCESS(f'Sem regressões em relação a {caminho}.'))
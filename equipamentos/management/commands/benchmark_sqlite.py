@@ -0,0 +1,102 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de concorrência no SQLite: escritores fazem leitura + escrita na '
+        'mesma transação (como a criação de reservas) enquanto leitores consultam. '
+        'Compara a configuração padrão do Django (journal DELETE, BEGIN DEFERRED, '
+        'timeout 5s) com a de backend/settings.py (WAL, BEGIN IMMEDIATE, PRAGMAs).'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8)
+        parser.add_argument('--leitores', type=int, default=4)
+        parser.add_argument('--segundos', type=float, default=3.0)
+    
+    def handle(self, *args, **options):
+        opcoes = settings.DATABASES['default'].get('OPTIONS', {})
+        configuracoes = [
+            ('padrão', [], 5, 'BEGIN'),
+            ('ajustado', self.pragmas(opcoes.get('init_command', '')), opcoes.get('timeout', 5),
+             f'BEGIN {opcoes.get("transaction_mode", "DEFERRED")}'),
+        ]
+        
+        for nome, pragmas, timeout, begin in configuracoes:
+            with tempfile.TemporaryDirectory() as diretorio:
+                resultado = self.executar(Path(diretorio) / 'bench.sqlite3', pragmas, timeout, begin, options)
+            self.stdout.write(
+                f'{nome:<10} escritas {resultado["escritas"] / options["segundos"]:>8.0f}/s | '
+                f'erros de lock {resultado["erros"]:>6} | '
+                f'leituras {resultado["leituras"] / options["segundos"]:>8.0f}/s'
+            )
+    
+    def pragmas(self, init_command):
+        return [comando.strip() for comando in init_command.split(';') if comando.strip()]
+    
+    def conectar(self, caminho, pragmas, timeout):
+        conexao = sqlite3.connect(caminho, timeout=timeout, isolation_level=None, check_same_thread=False)
+        for pragma in pragmas:
+            conexao.execute(pragma)
+        return conexao
+    
+    def executar(self, caminho, pragmas, timeout, begin, options):
+        conexao = self.conectar(caminho, pragmas, timeout)
+        conexao.execute('CREATE TABLE estoque (id INTEGER PRIMARY KEY, quantidade INTEGER)')
+        conexao.execute('CREATE TABLE reserva (id INTEGER PRIMARY KEY, equipamento_id INTEGER, quantidade INTEGER)')
+        conexao.executemany('INSERT INTO estoque VALUES (?, ?)', [(i, 10 ** 6) for i in range(100)])
+        conexao.close()
+        
+        contagem = {'escritas': 0, 'erros': 0, 'leituras': 0}
+        lock = threading.Lock()
+        fim = time.monotonic() + options['segundos']
+        
+        def escritor(numero):
+            conexao = self.conectar(caminho, pragmas, timeout)
+            escritas = erros = 0
+            equipamento = numero % 100
+            while time.monotonic() < fim:
+                try:
+                    conexao.execute(begin)
+                    conexao.execute('SELECT quantidade FROM estoque WHERE id = ?', [equipamento]).fetchone()
+                    conexao.execute('INSERT INTO reserva (equipamento_id, quantidade) VALUES (?, 1)', [equipamento])
+                    conexao.execute('UPDATE estoque SET quantidade = quantidade - 1 WHERE id = ?', [equipamento])
+                    conexao.execute('COMMIT')
+                    escritas += 1
+                except sqlite3.OperationalError:
+                    erros += 1
+                    if conexao.in_transaction:
+                        conexao.execute('ROLLBACK')
+            conexao.close()
+            with lock:
+                contagem['escritas'] += escritas
+                contagem['erros'] += erros
+        
+        def leitor():
+            conexao = self.conectar(caminho, pragmas, timeout)
+            leituras = 0
+            while time.monotonic() < fim:
+                try:
+                    conexao.execute('SELECT COUNT(*), SUM(quantidade) FROM reserva').fetchone()
+                    leituras += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        contagem['erros'] += 1
+            conexao.close()
+            with lock:
+                contagem['leituras'] += leituras
+        
+        threads = [threading.Thread(target=escritor, args=[i]) for i in range(options['escritores'])]
+        threads += [threading.Thread(target=leitor) for _ in range(options['leitores'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        return contagem
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from equipamentos.estoque import LOTE_PADRAO, consolidar
+
+
+class Command(BaseCommand):
+    help = (
+        'Grava um saldo de estoque para cada equipamento que teve movimentos desde '
+        'a última consolidação e corrige as quantidades disponíveis que divergirem '
+        'do livro. Agende no cron (ex: a cada hora) ou enfileire a tarefa '
+        'equipamentos.consolidar_estoque.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Equipamentos por lote')
+    
+    def handle(self, *args, **options):
+        resultado = consolidar(lote=options['lote'])
+        for etapa, total in resultado.items():
+            self.stdout.write(f'{etapa:<12} {total}')
@@ -0,0 +1,401 @@
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from clientes.models import Cliente
+from equipamentos import estoque
+from equipamentos.catalogo import invalidar_catalogo
+from equipamentos.models import (
+    Categoria, Equipamento, EspecificacaoTecnica, MovimentoEstoque, Orcamento, ItemOrcamento, Reserva, ItemReserva
+)
+
+
+CATALOGO = {
+    'Som e Áudio': {
+        'itens': ['Caixa de Som Ativa', 'Caixa de Som Passiva', 'Subwoofer', 'Mesa de Som',
+                  'Amplificador', 'Microfone Sem Fio', 'Microfone Vocal', 'Monitor de Palco'],
+        'marcas': ['JBL', 'Yamaha', 'Shure', 'Behringer', 'Electro-Voice', 'QSC', 'Sennheiser'],
+        'diaria': (40, 600),
+    },
+    'Iluminação': {
+        'itens': ['Par LED RGB', 'Moving Head Beam', 'Moving Head Spot', 'Ribalta LED',
+                  'Strobo', 'Máquina de Fumaça', 'Refletor Elipsoidal'],
+        'marcas': ['Lighttech', 'Stage Light', 'Chauvet', 'Star', 'PLS'],
+        'diaria': (30, 400),
+    },
+    'Estrutura': {
+        'itens': ['Treliça Q30', 'Treliça Q25', 'Box Truss', 'Praticável', 'Talha Elétrica', 'Grid'],
+        'marcas': ['Prolyte', 'Lyco', 'Metalúrgica Ribeiro', 'Alumitec'],
+        'diaria': (20, 300),
+    },
+    'DJ e Música': {
+        'itens': ['CDJ', 'Mixer DJ', 'Controladora DJ', 'Toca-discos', 'Teclado Sintetizador'],
+        'marcas': ['Pioneer', 'Denon', 'Technics', 'Roland', 'Korg'],
+        'diaria': (80, 800),
+    },
+    'Vídeo e Projeção': {
+        'itens': ['Projetor', 'Painel de LED', 'Tela de Projeção', 'TV 75 polegadas', 'Switcher de Vídeo'],
+        'marcas': ['Epson', 'Sony', 'Samsung', 'LG', 'Blackmagic'],
+        'diaria': (100, 2500),
+    },
+    'Energia': {
+        'itens': ['Gerador', 'Distribuidor de Energia', 'Nobreak', 'Cabo de Força 30m'],
+        'marcas': ['Toyama', 'Branco', 'SMS', 'Stanley'],
+        'diaria': (25, 1500),
+    },
+}
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+         'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sabrina', 'Thiago',
+         'Vanessa', 'Wagner', 'Beatriz', 'Lucas', 'Mariana', 'Pedro', 'Juliana', 'Gustavo']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes',
+              'Soares', 'Fernandes', 'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade']
+CIDADES = [('São Paulo', 'SP', 30), ('Campinas', 'SP', 8), ('Rio de Janeiro', 'RJ', 15),
+           ('Belo Horizonte', 'MG', 10), ('Curitiba', 'PR', 8), ('Porto Alegre', 'RS', 7),
+           ('Salvador', 'BA', 7), ('Recife', 'PE', 5), ('Fortaleza', 'CE', 5), ('Goiânia', 'GO', 5)]
+LOCAIS = ['Salão de Festas', 'Centro de Convenções', 'Clube', 'Chácara', 'Hotel', 'Casa de Shows',
+          'Igreja', 'Praça', 'Auditório', 'Espaço de Eventos']
+
+
+@contextmanager
+def datas_manuais(*campos):
+    """Desliga auto_now/auto_now_add dos campos para gravar datas históricas"""
+    originais = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo, _, _ in originais:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originais:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def campos_data(model, *nomes):
+    return [model._meta.get_field(nome) for nome in nomes]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos realistas em escala (clientes, equipamentos, orçamentos, '
+        'reservas e itens) com bulk_create em lotes. Determinístico a partir do --seed '
+        'para um mesmo estado inicial do banco.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=1000)
+        parser.add_argument('--equipamentos', type=int, default=500)
+        parser.add_argument('--orcamentos', type=int, default=5000)
+        parser.add_argument('--reservas-avulsas', type=int, default=1000,
+                            help='Reservas sem orçamento de origem (além das convertidas de orçamentos)')
+        parser.add_argument('--max-itens', type=int, default=6, help='Máximo de itens por orçamento/reserva')
+        parser.add_argument('--anos', type=int, default=3, help='Janela de histórico em anos')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+    
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.max_itens = options['max_itens']
+        self.agora = timezone.now()
+        self.inicio_historico = self.agora - timedelta(days=365 * options['anos'])
+        self.hoje = timezone.localdate()
+        
+        inicio = time.perf_counter()
+        self.gerar_categorias()
+        self.gerar_equipamentos(options['equipamentos'])
+        self.gerar_clientes(options['clientes'])
+        self.gerar_orcamentos(options['orcamentos'])
+        self.gerar_reservas_avulsas(options['reservas_avulsas'])
+        # As projeções refletem as saídas das reservas ativas geradas
+        estoque.consolidar()
+        invalidar_catalogo()
+        
+        self.stdout.write(self.style.SUCCESS(f'Dados gerados em {time.perf_counter() - inicio:.1f}s'))
+    
+    # Utilitários
+    
+    def lotes(self, total):
+        for inicio in range(0, total, self.batch_size):
+            yield range(inicio, min(inicio + self.batch_size, total))
+    
+    def data_historica(self):
+        """Data no histórico, com mais registros recentes (crescimento do negócio)"""
+        dias = (self.agora - self.inicio_historico).days
+        deslocamento = self.rnd.triangular(0, dias, dias)
+        data = self.inicio_historico + timedelta(days=deslocamento, seconds=self.rnd.randint(0, 86399))
+        return min(data, self.agora)
+    
+    def informar(self, nome, total, inicio):
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(f'{nome:<22} {total:>10} linhas em {duracao:>6.1f}s ({total / max(duracao, 1e-9):>9.0f}/s)')
+    
+    # Geração
+    
+    def gerar_categorias(self):
+        existentes = set(Categoria.objects.values_list('nome', flat=True))
+        Categoria.objects.bulk_create([
+            Categoria(nome=nome, descricao=f'Equipamentos de {nome.lower()}')
+            for nome in CATALOGO if nome not in existentes
+        ])
+        self.categorias = {c.nome: c.id for c in Categoria.objects.filter(nome__in=CATALOGO)}
+    
+    def gerar_equipamentos(self, total):
+        inicio = time.perf_counter()
+        base = Equipamento.objects.count()
+        
+        with datas_manuais(*campos_data(Equipamento, 'data_cadastro', 'data_atualizacao'),
+                           *campos_data(MovimentoEstoque, 'criado_em')):
+            for lote in self.lotes(total):
+                equipamentos = []
+                for i in lote:
+                    categoria = self.rnd.choice(list(CATALOGO))
+                    dados = CATALOGO[categoria]
+                    item = self.rnd.choice(dados['itens'])
+                    marca = self.rnd.choice(dados['marcas'])
+                    minimo, maximo = dados['diaria']
+                    # Distribuição log-normal: muitos itens baratos, poucos caros
+                    diaria = min(max(self.rnd.lognormvariate(0, 0.6) * (minimo + maximo) / 4, minimo), maximo)
+                    diaria = Decimal(diaria).quantize(Decimal('1.00'))
+                    quantidade_total = self.rnd.choice([1, 2, 4, 6, 10, 20, 50])
+                    cadastro = self.data_historica()
+                    equipamentos.append(Equipamento(
+                        nome=f'{item} {marca} {base + i}',
+                        categoria_id=self.categorias[categoria],
+                        descricao=f'{item} {marca} para eventos. ' * 3,
+                        marca=marca,
+                        modelo=f'{marca[:3].upper()}-{self.rnd.randint(100, 9999)}',
+                        especificacoes_tecnicas={
+                            'potencia': f'{self.rnd.choice([100, 250, 500, 1000, 1500, 2000, 3000])}W',
+                            'peso': f'{self.rnd.randint(1, 80)} kg',
+                            'voltagem': self.rnd.choice(['110V', '220V', 'Bivolt']),
+                        },
+                        valor_diaria=diaria,
+                        valor_semanal=(diaria * 5) if self.rnd.random() < 0.7 else None,
+                        valor_mensal=(diaria * 18) if self.rnd.random() < 0.4 else None,
+                        estado=self.rnd.choices(['disponivel', 'locado', 'manutencao', 'inativo'], [80, 10, 7, 3])[0],
+                        quantidade_total=quantidade_total,
+                        quantidade_total_livro=quantidade_total,
+                        quantidade_disponivel=self.rnd.randint(0, quantidade_total),
+                        numero_serie=f'SN-{base + i:09d}',
+                        data_cadastro=cadastro,
+                        data_atualizacao=cadastro,
+                    ))
+                with transaction.atomic():
+                    equipamentos = Equipamento.objects.bulk_create(equipamentos)
+                    EspecificacaoTecnica.objects.bulk_create([
+                        linha for equipamento in equipamentos
+                        for linha in EspecificacaoTecnica.a_partir_de(equipamento)
+                    ])
+                    MovimentoEstoque.objects.bulk_create(self.movimentos_iniciais(equipamentos))
+        
+        self.equipamentos = list(Equipamento.objects.exclude(estado='inativo').values_list(
+            'id', 'valor_diaria', 'valor_semanal', 'valor_mensal'
+        ))
+        self.informar('Equipamentos', total, inicio)
+    
+    def movimentos_iniciais(self, equipamentos):
+        """Compra no cadastro; o que não está disponível saiu para manutenção"""
+        movimentos = []
+        for equipamento in equipamentos:
+            movimentos.append(MovimentoEstoque(
+                equipamento=equipamento, tipo='compra', quantidade=equipamento.quantidade_total,
+                observacao='Cadastro', criado_em=equipamento.data_cadastro,
+            ))
+            fora = equipamento.quantidade_total - equipamento.quantidade_disponivel
+            if fora:
+                movimentos.append(MovimentoEstoque(
+                    equipamento=equipamento, tipo='manutencao', quantidade=-fora,
+                    criado_em=min(equipamento.data_cadastro + timedelta(days=self.rnd.randint(1, 90)), timezone.now()),
+                ))
+        return movimentos
+    
+    def gerar_clientes(self, total):
+        inicio = time.perf_counter()
+        base = Cliente.objects.count()
+        senha = make_password('senha123')
+        pesos_cidades = [peso for _, _, peso in CIDADES]
+        
+        with datas_manuais(*campos_data(Cliente, 'data_cadastro', 'data_atualizacao')):
+            for lote in self.lotes(total):
+                clientes = []
+                for i in lote:
+                    numero = base + i
+                    nome = f'{self.rnd.choice(NOMES)} {self.rnd.choice(SOBRENOMES)} {self.rnd.choice(SOBRENOMES)}'
+                    email = f'cliente{numero}@exemplo.com.br'
+                    cidade, uf, _ = self.rnd.choices(CIDADES, pesos_cidades)[0]
+                    digitos = f'{numero:011d}'
+                    cadastro = self.data_historica()
+                    clientes.append(Cliente(
+                        username=email, email=email, password=senha, nome_completo=nome,
+                        cpf_cnpj=f'{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}',
+                        telefone=f'({self.rnd.randint(11, 99)}) 9{self.rnd.randint(1000, 9999)}-{self.rnd.randint(1000, 9999)}',
+                        endereco=f'Rua {self.rnd.choice(SOBRENOMES)}, {self.rnd.randint(1, 3000)}',
+                        cidade=cidade, estado=uf, cep=f'{self.rnd.randint(10000, 99999)}-{self.rnd.randint(100, 999)}',
+                        date_joined=cadastro, data_cadastro=cadastro, data_atualizacao=cadastro,
+                    ))
+                with transaction.atomic():
+                    Cliente.objects.bulk_create(clientes)
+        
+        self.clientes = list(Cliente.objects.filter(is_staff=False).values_list('id', flat=True))
+        self.staff = list(Cliente.objects.filter(is_staff=True).values_list('id', flat=True))
+        self.informar('Clientes', total, inicio)
+    
+    def montar_itens(self):
+        """Sorteia os itens de um orçamento/reserva: (equipamento_id, quantidade, modalidade, periodo, unitario, total)"""
+        itens = []
+        quantidade_itens = min(self.rnd.randint(1, self.max_itens), len(self.equipamentos))
+        for id, diaria, semanal, mensal in self.rnd.sample(self.equipamentos, quantidade_itens):
+            opcoes = [('diaria', diaria)] * 8
+            if semanal:
+                opcoes += [('semanal', semanal)] * 2
+            if mensal:
+                opcoes.append(('mensal', mensal))
+            modalidade, unitario = self.rnd.choice(opcoes)
+            quantidade = self.rnd.choice([1, 1, 1, 2, 2, 4])
+            periodo = self.rnd.choice([1, 1, 2, 3]) if modalidade == 'diaria' else 1
+            itens.append((id, quantidade, modalidade, periodo, unitario, unitario * periodo * quantidade))
+        return itens
+    
+    def status_reserva(self, data_uso, data_fim):
+        """Status coerente com o período de uso (passado, em andamento ou futuro)"""
+        if data_fim < self.hoje:
+            return self.rnd.choices(['concluida', 'cancelada', 'rejeitada'], [85, 10, 5])[0]
+        if data_uso <= self.hoje:
+            return 'ativa'
+        return self.rnd.choices(['pendente', 'aprovada', 'cancelada'], [30, 65, 5])[0]
+    
+    def nova_reserva(self, cliente_id, orcamento_id, criacao, itens):
+        data_uso = (criacao + timedelta(days=self.rnd.randint(3, 90))).date()
+        data_fim = Reserva.calcular_data_fim(data_uso, [(item[2], item[3]) for item in itens])
+        status = self.status_reserva(data_uso, data_fim)
+        aprovada = status in ['aprovada', 'ativa', 'concluida']
+        return Reserva(
+            cliente_id=cliente_id, orcamento_id=orcamento_id, status=status,
+            data_uso=data_uso, data_fim=data_fim,
+            local_evento=f'{self.rnd.choice(LOCAIS)} {self.rnd.choice(SOBRENOMES)}',
+            valor_total=sum(item[5] for item in itens), data_criacao=criacao, data_atualizacao=criacao,
+            data_aprovacao=criacao + timedelta(hours=self.rnd.randint(1, 48)) if aprovada else None,
+            aprovado_por_id=self.rnd.choice(self.staff) if aprovada and self.staff else None,
+        )
+    
+    def movimentos_reservas_ativas(self, reservas, itens_por_reserva):
+        """Saídas do livro das reservas geradas já ativas, como faria o ciclo ao ativá-las"""
+        movimentos = []
+        for reserva, itens in zip(reservas, itens_por_reserva):
+            if reserva.status != 'ativa':
+                continue
+            quantidades = defaultdict(int)
+            for id, quantidade, *_ in itens:
+                quantidades[id] += quantidade
+            movimentos.extend(
+                MovimentoEstoque(equipamento_id=id, reserva_id=reserva.id, tipo='reserva', quantidade=-quantidade)
+                for id, quantidade in quantidades.items()
+            )
+        return movimentos
+    
+    def gerar_orcamentos(self, total):
+        inicio = time.perf_counter()
+        total_itens = total_reservas = 0
+        
+        campos = (
+            campos_data(Orcamento, 'data_criacao', 'data_atualizacao')
+            + campos_data(Reserva, 'data_criacao', 'data_atualizacao')
+        )
+        with datas_manuais(*campos):
+            for lote in self.lotes(total):
+                orcamentos, itens_por_orcamento = [], []
+                for _ in lote:
+                    criacao = self.data_historica()
+                    itens = self.montar_itens()
+                    # Rascunhos antigos são abandonados; os recentes ainda estão em montagem
+                    status = self.rnd.choices(['rascunho', 'finalizado', 'convertido', 'cancelado'], [25, 20, 45, 10])[0]
+                    orcamentos.append(Orcamento(
+                        cliente_id=self.rnd.choice(self.clientes), status=status,
+                        valor_total=sum(item[5] for item in itens),
+                        data_criacao=criacao, data_atualizacao=criacao,
+                    ))
+                    itens_por_orcamento.append(itens)
+                
+                with transaction.atomic():
+                    orcamentos = Orcamento.objects.bulk_create(orcamentos)
+                    data_uso = {}
+                    itens_orcamento = []
+                    for orcamento, itens in zip(orcamentos, itens_por_orcamento):
+                        data_uso[orcamento.id] = (orcamento.data_criacao + timedelta(days=self.rnd.randint(3, 90))).date()
+                        itens_orcamento.extend(
+                            ItemOrcamento(
+                                orcamento_id=orcamento.id, equipamento_id=id, quantidade=quantidade,
+                                modalidade=modalidade, periodo=periodo, data_uso=data_uso[orcamento.id],
+                                valor_unitario=unitario, valor_total=valor,
+                            )
+                            for id, quantidade, modalidade, periodo, unitario, valor in itens
+                        )
+                    ItemOrcamento.objects.bulk_create(itens_orcamento)
+                    total_itens += len(itens_orcamento)
+                    
+                    convertidos = [
+                        (orcamento, itens) for orcamento, itens in zip(orcamentos, itens_por_orcamento)
+                        if orcamento.status == 'convertido'
+                    ]
+                    reservas = Reserva.objects.bulk_create([
+                        self.nova_reserva(
+                            orcamento.cliente_id, orcamento.id,
+                            orcamento.data_criacao + timedelta(hours=self.rnd.randint(1, 72)), itens,
+                        )
+                        for orcamento, itens in convertidos
+                    ])
+                    itens_reserva = [
+                        ItemReserva(
+                            reserva_id=reserva.id, equipamento_id=id, quantidade=quantidade,
+                            modalidade=modalidade, periodo=periodo, valor_unitario=unitario, valor_total=valor,
+                        )
+                        for reserva, (_, itens) in zip(reservas, convertidos)
+                        for id, quantidade, modalidade, periodo, unitario, valor in itens
+                    ]
+                    ItemReserva.objects.bulk_create(itens_reserva)
+                    MovimentoEstoque.objects.bulk_create(self.movimentos_reservas_ativas(
+                        reservas, [itens for _, itens in convertidos]
+                    ))
+                    total_reservas += len(reservas)
+                    total_itens += len(itens_reserva)
+        
+        self.informar('Orçamentos', total, inicio)
+        self.stdout.write(f'  + {total_reservas} reservas convertidas e {total_itens} itens')
+    
+    def gerar_reservas_avulsas(self, total):
+        inicio = time.perf_counter()
+        total_itens = 0
+        
+        with datas_manuais(*campos_data(Reserva, 'data_criacao', 'data_atualizacao')):
+            for lote in self.lotes(total):
+                reservas, itens_por_reserva = [], []
+                for _ in lote:
+                    itens = self.montar_itens()
+                    reservas.append(self.nova_reserva(
+                        self.rnd.choice(self.clientes), None, self.data_historica(), itens,
+                    ))
+                    itens_por_reserva.append(itens)
+                
+                with transaction.atomic():
+                    reservas = Reserva.objects.bulk_create(reservas)
+                    itens_reserva = [
+                        ItemReserva(
+                            reserva_id=reserva.id, equipamento_id=id, quantidade=quantidade,
+                            modalidade=modalidade, periodo=periodo, valor_unitario=unitario, valor_total=valor,
+                        )
+                        for reserva, itens in zip(reservas, itens_por_reserva)
+                        for id, quantidade, modalidade, periodo, unitario, valor in itens
+                    ]
+                    ItemReserva.objects.bulk_create(itens_reserva)
+                    MovimentoEstoque.objects.bulk_create(self.movimentos_reservas_ativas(reservas, itens_por_reserva))
+                    total_itens += len(itens_reserva)
+        
+        self.informar('Reservas avulsas', total, inicio)
+        self.stdout.write(f'  + {total_itens} itens')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from backend.esquema import CHAVE_VERSAO, gravar, ler_arquivo, versao_codigo
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o esquema OpenAPI e grava em ESQUEMA_OPENAPI_ARQUIVO, de onde o '
+        '/swagger.json, o Swagger UI e o ReDoc o servem sem percorrer as views. '
+        'Rode no build/deploy, depois de instalar o código.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--arquivo', default=None, help='Caminho de saída (padrão: ESQUEMA_OPENAPI_ARQUIVO)')
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Não grava; termina com erro se o arquivo não for da versão atual do código'
+        )
+    
+    def handle(self, *args, **options):
+        if options['verificar']:
+            gravada = ler_arquivo().get(CHAVE_VERSAO)
+            if gravada != versao_codigo():
+                raise CommandError(f'Esquema desatualizado: arquivo {gravada}, código {versao_codigo()}')
+            self.stdout.write(f'Esquema em dia (versão {gravada})')
+            return
+        
+        documento = gravar(options['arquivo'])
+        self.stdout.write(
+            f"{options['arquivo'] or settings.ESQUEMA_OPENAPI_ARQUIVO}: {len(documento['paths'])} caminhos, "
+            f"versão {documento[CHAVE_VERSAO]}"
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from equipamentos.models import Equipamento, EspecificacaoTecnica
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de especificações técnicas dos equipamentos'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        
+        with transaction.atomic():
+            EspecificacaoTecnica.objects.all().delete()
+            linhas = []
+            for equipamento in Equipamento.objects.only('id', 'especificacoes_tecnicas').iterator():
+                linhas.extend(EspecificacaoTecnica.a_partir_de(equipamento))
+                if len(linhas) >= batch_size:
+                    EspecificacaoTecnica.objects.bulk_create(linhas)
+                    total += len(linhas)
+                    linhas = []
+            EspecificacaoTecnica.objects.bulk_create(linhas)
+            total += len(linhas)
+        
+        self.stdout.write(self.style.SUCCESS(f'{total} especificações indexadas.'))
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from backend.inicializacao import medir, por_pacote
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o tempo de inicialização (django.setup(), WSGI e aquecimento) num '
+        'processo novo e lista os imports mais caros. Compare os perfis com '
+        '--perfil completo e --perfil api (DJANGO_PERFIL). No perfil API o total é '
+        'comparado com INICIALIZACAO_META_MS; com --verificar-meta, passar da meta é erro.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=['completo', 'api'], default='completo')
+        parser.add_argument('--top', type=int, default=20, help='Imports e pacotes listados')
+        parser.add_argument('--sem-aquecimento', action='store_true', help='Mede só o django.setup()')
+        parser.add_argument('--verificar-meta', action='store_true',
+                            help='Falha se o perfil API passar de INICIALIZACAO_META_MS (use na máquina de deploy)')
+    
+    def handle(self, *args, **options):
+        resultado = medir(options['perfil'], aquecer=not options['sem_aquecimento'])
+        top = options['top']
+        
+        self.stdout.write(f"Perfil {options['perfil']}: {len(resultado['modulos'])} módulos carregados")
+        self.stdout.write(f"  setup + WSGI   {resultado['setup_ms']:8.0f} ms")
+        self.stdout.write(f"  aquecimento    {resultado['aquecimento_ms']:8.0f} ms")
+        self.stdout.write(f"  total          {resultado['total_ms']:8.0f} ms (meta do perfil API: {settings.INICIALIZACAO_META_MS} ms)")
+        
+        self.stdout.write('\nImports mais caros (acumulado, inclui dependências):')
+        for nome, proprio, acumulado, profundidade in sorted(resultado['importacoes'], key=lambda item: -item[2])[:top]:
+            self.stdout.write(f'  {acumulado / 1000:8.1f} ms  {"  " * profundidade}{nome}')
+        
+        self.stdout.write('\nPacotes (tempo próprio somado):')
+        for pacote, proprio in list(por_pacote(resultado['importacoes']).items())[:top]:
+            self.stdout.write(f'  {proprio / 1000:8.1f} ms  {pacote}')
+        
+        if options['perfil'] != 'api' or resultado['total_ms'] <= settings.INICIALIZACAO_META_MS:
+            return
+        mensagem = f"Inicialização de {resultado['total_ms']:.0f} ms acima da meta de {settings.INICIALIZACAO_META_MS} ms"
+        if options['verificar_meta']:
+            raise CommandError(mensagem)
+        self.stdout.write(self.style.WARNING(f'\n{mensagem}'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from equipamentos.expiracao_orcamentos import LOTE_PADRAO, purgar_rascunhos, rascunhos_expirados
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga em lotes os orçamentos em rascunho sem alterações há mais de '
+        'ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS dias, com seus itens. Agende no cron '
+        '(ex: diariamente) ou enfileire a tarefa equipamentos.purgar_rascunhos.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Orçamentos por transação')
+        parser.add_argument('--pausa', type=float, default=0.0, help='Espera (s) entre os lotes')
+        parser.add_argument('--simular', action='store_true', help='Só conta os rascunhos expirados')
+    
+    def handle(self, *args, **options):
+        if options['simular']:
+            self.stdout.write(f'{rascunhos_expirados().count()} rascunhos expirados')
+            return
+        
+        resultado = purgar_rascunhos(lote=options['lote'], pausa=options['pausa'])
+        for tipo, total in resultado.items():
+            self.stdout.write(f'{tipo:<12} {total}')
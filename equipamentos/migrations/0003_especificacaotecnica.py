@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from equipamentos.utils import achatar_especificacoes
+
+
+def indexar_especificacoes(apps, schema_editor):
+    Equipamento = apps.get_model('equipamentos', 'Equipamento')
+    EspecificacaoTecnica = apps.get_model('equipamentos', 'EspecificacaoTecnica')
+    
+    linhas = [
+        EspecificacaoTecnica(
+            equipamento_id=equipamento_id, chave=chave,
+            valor_texto=texto, valor_numerico=numero
+        )
+        for equipamento_id, especificacoes in Equipamento.objects.values_list('id', 'especificacoes_tecnicas').iterator()
+        for chave, texto, numero in achatar_especificacoes(especificacoes)
+    ]
+    EspecificacaoTecnica.objects.bulk_create(linhas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0002_orcamento_reserva_itemorcamento_itemreserva'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EspecificacaoTecnica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=100, verbose_name='Chave')),
+                ('valor_texto', models.CharField(blank=True, max_length=255, verbose_name='Valor (texto)')),
+                ('valor_numerico', models.FloatField(blank=True, null=True, verbose_name='Valor (numérico)')),
+                ('equipamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='especificacoes_indexadas', to='equipamentos.equipamento', verbose_name='Equipamento')),
+            ],
+            options={
+                'verbose_name': 'Especificação Técnica',
+                'verbose_name_plural': 'Especificações Técnicas',
+                'indexes': [models.Index(fields=['chave', 'valor_numerico'], name='espec_chave_numerico_idx'), models.Index(fields=['chave', 'valor_texto'], name='espec_chave_texto_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_especificacoes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0003_especificacaotecnica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['status', 'data_uso'], name='reserva_status_data_uso_idx'),
+        ),
+    ]
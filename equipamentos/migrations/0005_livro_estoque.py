@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def registrar_saldo_inicial(apps, schema_editor):
+    Equipamento = apps.get_model('equipamentos', 'Equipamento')
+    MovimentoEstoque = apps.get_model('equipamentos', 'MovimentoEstoque')
+    
+    MovimentoEstoque.objects.bulk_create([
+        MovimentoEstoque(equipamento_id=equipamento_id, tipo='ajuste', quantidade=quantidade, observacao='Saldo inicial')
+        for equipamento_id, quantidade in Equipamento.objects.filter(quantidade_disponivel__gt=0)
+        .values_list('id', 'quantidade_disponivel').iterator()
+    ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0004_reserva_status_data_uso_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='MovimentoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('reserva', 'Saída para Reserva'), ('liberacao', 'Retorno de Reserva'), ('manutencao', 'Manutenção'), ('compra', 'Compra'), ('baixa', 'Baixa'), ('ajuste', 'Ajuste de Inventário')], max_length=20, verbose_name='Tipo')),
+                ('quantidade', models.IntegerField(verbose_name='Quantidade')),
+                ('observacao', models.CharField(blank=True, max_length=255, verbose_name='Observação')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Data')),
+                ('equipamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentos_estoque', to='equipamentos.equipamento', verbose_name='Equipamento')),
+                ('reserva', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos_estoque', to='equipamentos.reserva', verbose_name='Reserva')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimentos_estoque', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Movimento de Estoque',
+                'verbose_name_plural': 'Movimentos de Estoque',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['equipamento', 'id'], name='movimento_equip_id_idx'), models.Index(fields=['criado_em'], name='movimento_criado_em_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.IntegerField(verbose_name='Quantidade')),
+                ('ate_movimento', models.BigIntegerField(verbose_name='Até o Movimento')),
+                ('data', models.DateTimeField(verbose_name='Data')),
+                ('equipamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_estoque', to='equipamentos.equipamento', verbose_name='Equipamento')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Estoque',
+                'verbose_name_plural': 'Saldos de Estoque',
+                'ordering': ['-ate_movimento'],
+                'indexes': [models.Index(fields=['equipamento', 'data'], name='saldo_equip_data_idx')],
+                'unique_together': {('equipamento', 'ate_movimento')},
+            },
+        ),
+        migrations.RunPython(registrar_saldo_inicial, migrations.RunPython.noop),
+    ]
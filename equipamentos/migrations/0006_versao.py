@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0005_livro_estoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipamento',
+            name='versao',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versão'),
+        ),
+        migrations.AddField(
+            model_name='orcamento',
+            name='versao',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Versão'),
+        ),
+    ]
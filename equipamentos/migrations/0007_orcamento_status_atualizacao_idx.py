@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0006_versao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orcamento',
+            index=models.Index(fields=['status', 'data_atualizacao'], name='orcamento_status_atualiz_idx'),
+        ),
+    ]
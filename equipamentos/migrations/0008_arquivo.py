@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:05
+
+import django.core.serializers.json
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0007_orcamento_status_atualizacao_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimentoestoque',
+            name='reserva',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimentos_estoque', to='equipamentos.reserva', verbose_name='Reserva'),
+        ),
+        migrations.CreateModel(
+            name='ResumoArquivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('reserva', 'Reserva'), ('orcamento', 'Orçamento')], max_length=20, verbose_name='Tipo')),
+                ('mes', models.DateField(verbose_name='Mês')),
+                ('status', models.CharField(max_length=20, verbose_name='Status')),
+                ('quantidade', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('valor_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Valor Total')),
+            ],
+            options={
+                'verbose_name': 'Resumo do Arquivo',
+                'verbose_name_plural': 'Resumos do Arquivo',
+                'ordering': ['-mes', 'tipo', 'status'],
+                'unique_together': {('tipo', 'mes', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OrcamentoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('rascunho', 'Rascunho'), ('finalizado', 'Finalizado'), ('convertido', 'Convertido em Reserva'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('valor_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Valor Total')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data de Criação')),
+                ('data_arquivamento', models.DateTimeField(auto_now_add=True, verbose_name='Data de Arquivamento')),
+                ('dados', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Dados')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orcamentos_arquivados', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Orçamento Arquivado',
+                'verbose_name_plural': 'Orçamentos Arquivados',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['cliente', 'data_criacao'], name='orcamento_arq_cliente_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReservaArquivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente de Aprovação'), ('aprovada', 'Aprovada'), ('rejeitada', 'Rejeitada'), ('ativa', 'Ativa'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], max_length=20, verbose_name='Status')),
+                ('data_uso', models.DateField(verbose_name='Data de Uso')),
+                ('valor_total', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Valor Total')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data de Criação')),
+                ('data_arquivamento', models.DateTimeField(auto_now_add=True, verbose_name='Data de Arquivamento')),
+                ('dados', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Dados')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas_arquivadas', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Reserva Arquivada',
+                'verbose_name_plural': 'Reservas Arquivadas',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['cliente', 'data_criacao'], name='reserva_arq_cliente_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0008_arquivo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemorcamento',
+            index=models.Index(fields=['data_uso'], name='item_orcamento_data_uso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orcamento',
+            index=models.Index(fields=['data_criacao'], name='orcamento_data_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['data_criacao'], name='reserva_data_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['data_uso'], name='reserva_data_uso_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:40
+
+from datetime import timedelta
+from django.db import migrations, models
+
+
+DIAS_MODALIDADE = {'diaria': 1, 'semanal': 7, 'mensal': 30}
+
+
+def preencher_data_fim(apps, schema_editor):
+    Reserva = apps.get_model('equipamentos', 'Reserva')
+    ItemReserva = apps.get_model('equipamentos', 'ItemReserva')
+    
+    dias = {}
+    for reserva_id, modalidade, periodo in ItemReserva.objects.values_list('reserva_id', 'modalidade', 'periodo').iterator():
+        dias[reserva_id] = max(dias.get(reserva_id, 1), DIAS_MODALIDADE[modalidade] * periodo)
+    
+    reservas = [
+        Reserva(id=reserva_id, data_fim=data_uso + timedelta(days=dias.get(reserva_id, 1) - 1))
+        for reserva_id, data_uso in Reserva.objects.values_list('id', 'data_uso').iterator()
+    ]
+    Reserva.objects.bulk_update(reservas, ['data_fim'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0009_indices_admin'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='data_fim',
+            field=models.DateField(blank=True, null=True, verbose_name='Data de Devolução'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['status', 'data_fim'], name='reserva_status_data_fim_idx'),
+        ),
+        migrations.RunPython(preencher_data_fim, migrations.RunPython.noop),
+    ]
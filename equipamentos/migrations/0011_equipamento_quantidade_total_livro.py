@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def registrar_total_do_livro(apps, schema_editor):
+    # Os totais atuais já incluem as compras e baixas registradas até aqui
+    Equipamento = apps.get_model('equipamentos', 'Equipamento')
+    MovimentoEstoque = apps.get_model('equipamentos', 'MovimentoEstoque')
+    
+    somas = (
+        MovimentoEstoque.objects.filter(tipo__in=['compra', 'baixa'])
+        .values_list('equipamento_id').annotate(Sum('quantidade')).order_by()
+    )
+    Equipamento.objects.bulk_update([
+        Equipamento(id=equipamento_id, quantidade_total_livro=total)
+        for equipamento_id, total in somas.iterator()
+    ], ['quantidade_total_livro'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0010_reserva_data_fim'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='equipamento',
+            name='quantidade_total_livro',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Quantidade Total (Livro)'),
+        ),
+        migrations.RunPython(registrar_total_do_livro, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
+import copy
+from datetime import timedelta
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from backend.concorrencia import Versionado
+from .utils import achatar_especificacoes
 
 
 class Categoria(models.Model):
@@ -21,7 +26,7 @@ class Categoria(models.Model):
         return self.nome
 
 
-class Equipamento(models.Model):
+class Equipamento(Versionado):
     """
     Modelo de Equipamento para locação
     """
@@ -98,6 +103,14 @@ class Equipamento(models.Model):
         verbose_name="Quantidade Total"
     )
     
+    # Parte de quantidade_total que veio de compras e baixas do livro de estoque
+    # (equipamentos/estoque.py); o resto são edições diretas do campo
+    quantidade_total_livro = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Quantidade Total (Livro)"
+    )
+    
     # Informações adicionais
     numero_serie = models.CharField(
         max_length=100, 
@@ -126,6 +139,9 @@ class Equipamento(models.Model):
     data_cadastro = models.DateTimeField(auto_now_add=True, verbose_name="Data de Cadastro")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
     
+    # Recalculadas a partir do livro de estoque (estoque.atualizar_projecoes)
+    campos_projecao = (('quantidade_disponivel',), ('quantidade_total', 'quantidade_total_livro'))
+    
     class Meta:
         verbose_name = "Equipamento"
         verbose_name_plural = "Equipamentos"
@@ -134,6 +150,59 @@ class Equipamento(models.Model):
     def __str__(self):
         return f"{self.nome} - {self.marca} {self.modelo}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Base para registrar no livro de estoque as alterações manuais da quantidade
+        carregados = dict(zip(field_names, values))
+        instance._quantidade_registrada = carregados.get('quantidade_disponivel')
+        # Base para só reindexar as especificações quando o JSON mudar
+        if 'especificacoes_tecnicas' in carregados:
+            instance._especificacoes_indexadas = copy.deepcopy(instance.especificacoes_tecnicas)
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None or 'quantidade_disponivel' in fields:
+            self._quantidade_registrada = self.quantidade_disponivel
+        if 'especificacoes_tecnicas' in self.__dict__ and (fields is None or 'especificacoes_tecnicas' in fields):
+            self._especificacoes_indexadas = copy.deepcopy(self.especificacoes_tecnicas)
+    
+    def save(self, *args, **kwargs):
+        """Salva o equipamento, registra a alteração de estoque e reindexa as especificações técnicas alteradas"""
+        cadastro = self._state.adding
+        anterior = 0 if cadastro else getattr(self, '_quantidade_registrada', None)
+        update_fields = kwargs.get('update_fields')
+        # Campo adiado e não atribuído não é gravado; atribuído sem leitura (sem base), reindexa
+        reindexar = cadastro or (
+            'especificacoes_tecnicas' in self.__dict__
+            and (update_fields is None or 'especificacoes_tecnicas' in update_fields)
+            and getattr(self, '_especificacoes_indexadas', None) != self.especificacoes_tecnicas
+        )
+        if cadastro:
+            # O cadastro vira uma compra no livro, já contada em quantidade_total
+            self.quantidade_total_livro = self.quantidade_disponivel
+        super().save(*args, **kwargs)
+        
+        if anterior is not None and self.quantidade_disponivel != anterior:
+            MovimentoEstoque.objects.create(
+                equipamento=self,
+                tipo='compra' if cadastro else 'ajuste',
+                quantidade=self.quantidade_disponivel - anterior,
+                observacao='Cadastro' if cadastro else 'Alteração manual da quantidade disponível',
+            )
+        self._quantidade_registrada = self.quantidade_disponivel
+        if reindexar:
+            self.indexar_especificacoes()
+            self._especificacoes_indexadas = copy.deepcopy(self.especificacoes_tecnicas)
+    
+    def indexar_especificacoes(self):
+        """Regrava as linhas de EspecificacaoTecnica a partir do JSON"""
+        self.especificacoes_indexadas.all().delete()
+        EspecificacaoTecnica.objects.bulk_create(
+            EspecificacaoTecnica.a_partir_de(self)
+        )
+    
     @property
     def disponivel(self):
         """Verifica se o equipamento está disponível para locação"""
@@ -153,7 +222,147 @@ class Equipamento(models.Model):
             return dias * self.valor_diaria
 
 
-class Orcamento(models.Model):
+class EspecificacaoTecnica(models.Model):
+    """
+    Índice chave/valor das especificações técnicas de um equipamento.
+    
+    Espelha `Equipamento.especificacoes_tecnicas` em linhas indexadas para que
+    os filtros por especificação não precisem interpretar o JSON linha a linha.
+    """
+    equipamento = models.ForeignKey(
+        Equipamento,
+        on_delete=models.CASCADE,
+        related_name='especificacoes_indexadas',
+        verbose_name="Equipamento"
+    )
+    
+    chave = models.CharField(max_length=100, verbose_name="Chave")
+    valor_texto = models.CharField(max_length=255, blank=True, verbose_name="Valor (texto)")
+    valor_numerico = models.FloatField(null=True, blank=True, verbose_name="Valor (numérico)")
+    
+    class Meta:
+        verbose_name = "Especificação Técnica"
+        verbose_name_plural = "Especificações Técnicas"
+        indexes = [
+            models.Index(fields=['chave', 'valor_numerico'], name='espec_chave_numerico_idx'),
+            models.Index(fields=['chave', 'valor_texto'], name='espec_chave_texto_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.chave}: {self.valor_texto}"
+    
+    @classmethod
+    def a_partir_de(cls, equipamento):
+        """Gera (sem salvar) as linhas de índice de um equipamento"""
+        return [
+            cls(equipamento=equipamento, chave=chave, valor_texto=texto, valor_numerico=numero)
+            for chave, texto, numero in achatar_especificacoes(equipamento.especificacoes_tecnicas)
+        ]
+
+
+class MovimentoEstoque(models.Model):
+    """
+    Livro de estoque: cada entrada ou saída de um equipamento é uma linha nova.
+    
+    As linhas nunca são alteradas nem apagadas. `quantidade` é a variação da
+    quantidade disponível (negativa nas saídas); o saldo é o último
+    SaldoEstoque mais os movimentos posteriores (equipamentos/estoque.py).
+    """
+    TIPO_CHOICES = [
+        ('reserva', 'Saída para Reserva'),
+        ('liberacao', 'Retorno de Reserva'),
+        ('manutencao', 'Manutenção'),
+        ('compra', 'Compra'),
+        ('baixa', 'Baixa'),
+        ('ajuste', 'Ajuste de Inventário'),
+    ]
+    
+    equipamento = models.ForeignKey(
+        Equipamento,
+        on_delete=models.CASCADE,
+        related_name='movimentos_estoque',
+        verbose_name="Equipamento"
+    )
+    
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    quantidade = models.IntegerField(verbose_name="Quantidade")
+    
+    # Sem constraint: a reserva pode ter ido para ReservaArquivada (mesmo id) e o livro não muda
+    reserva = models.ForeignKey(
+        'Reserva',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='movimentos_estoque',
+        verbose_name="Reserva"
+    )
+    
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimentos_estoque',
+        verbose_name="Usuário"
+    )
+    
+    observacao = models.CharField(max_length=255, blank=True, verbose_name="Observação")
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Data")
+    
+    class Meta:
+        verbose_name = "Movimento de Estoque"
+        verbose_name_plural = "Movimentos de Estoque"
+        ordering = ['-id']
+        indexes = [
+            # Movimentos de um equipamento depois do último saldo
+            models.Index(fields=['equipamento', 'id'], name='movimento_equip_id_idx'),
+            # Marca d'água dos saldos
+            models.Index(fields=['criado_em'], name='movimento_criado_em_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.quantidade:+d} - {self.equipamento.nome}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Movimentos de estoque não podem ser alterados; registre um ajuste.')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Movimentos de estoque não podem ser apagados; registre um ajuste.')
+
+
+class SaldoEstoque(models.Model):
+    """
+    Saldo consolidado de um equipamento: soma dos movimentos com id até
+    `ate_movimento`, todos criados até `data`.
+    """
+    equipamento = models.ForeignKey(
+        Equipamento,
+        on_delete=models.CASCADE,
+        related_name='saldos_estoque',
+        verbose_name="Equipamento"
+    )
+    
+    quantidade = models.IntegerField(verbose_name="Quantidade")
+    ate_movimento = models.BigIntegerField(verbose_name="Até o Movimento")
+    data = models.DateTimeField(verbose_name="Data")
+    
+    class Meta:
+        verbose_name = "Saldo de Estoque"
+        verbose_name_plural = "Saldos de Estoque"
+        ordering = ['-ate_movimento']
+        unique_together = ['equipamento', 'ate_movimento']
+        indexes = [
+            models.Index(fields=['equipamento', 'data'], name='saldo_equip_data_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipamento.nome}: {self.quantidade} em {self.data:%d/%m/%Y %H:%M}"
+
+
+class Orcamento(Versionado):
     """
     Modelo para orçamentos personalizados
     """
@@ -194,6 +403,12 @@ class Orcamento(models.Model):
         verbose_name = "Orçamento"
         verbose_name_plural = "Orçamentos"
         ordering = ['-data_criacao']
+        indexes = [
+            # Rascunhos expirados (equipamentos/expiracao_orcamentos.py)
+            models.Index(fields=['status', 'data_atualizacao'], name='orcamento_status_atualiz_idx'),
+            # Ordenação e date_hierarchy do admin
+            models.Index(fields=['data_criacao'], name='orcamento_data_criacao_idx'),
+        ]
     
     def __str__(self):
         return f"Orçamento #{self.id} - {self.cliente.nome_completo}"
@@ -216,6 +431,9 @@ class ItemOrcamento(models.Model):
         ('mensal', 'Mensal'),
     ]
     
+    # Dias de uso por unidade de `periodo` (o mês de 30 dias, como em calcular_valor_periodo)
+    DIAS_MODALIDADE = {'diaria': 1, 'semanal': 7, 'mensal': 30}
+    
     orcamento = models.ForeignKey(
         Orcamento,
         on_delete=models.CASCADE,
@@ -264,6 +482,10 @@ class ItemOrcamento(models.Model):
         verbose_name = "Item do Orçamento"
         verbose_name_plural = "Itens do Orçamento"
         unique_together = ['orcamento', 'equipamento']
+        indexes = [
+            # date_hierarchy do admin
+            models.Index(fields=['data_uso'], name='item_orcamento_data_uso_idx'),
+        ]
     
     def __str__(self):
         return f"{self.equipamento.nome} - Qtd: {self.quantidade}"
@@ -326,6 +548,8 @@ class Reserva(models.Model):
     )
     
     data_uso = models.DateField(verbose_name="Data de Uso")
+    # Último dia de uso, pelo maior período dos itens; vazio em reservas sem itens (só data_uso)
+    data_fim = models.DateField(null=True, blank=True, verbose_name="Data de Devolução")
     local_evento = models.CharField(max_length=255, verbose_name="Local do Evento")
     observacoes = models.TextField(blank=True, verbose_name="Observações")
     
@@ -353,9 +577,25 @@ class Reserva(models.Model):
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
         ordering = ['-data_criacao']
+        indexes = [
+            # Transições por data (equipamentos/ciclo_reservas.py)
+            models.Index(fields=['status', 'data_uso'], name='reserva_status_data_uso_idx'),
+            models.Index(fields=['status', 'data_fim'], name='reserva_status_data_fim_idx'),
+            # Ordenação e date_hierarchy do admin (também dos itens, por reserva__data_uso)
+            models.Index(fields=['data_criacao'], name='reserva_data_criacao_idx'),
+            models.Index(fields=['data_uso'], name='reserva_data_uso_idx'),
+        ]
     
     def __str__(self):
         return f"Reserva #{self.id} - {self.cliente.nome_completo} - {self.status}"
+    
+    @staticmethod
+    def calcular_data_fim(data_uso, periodos):
+        """Último dia de uso a partir dos pares (modalidade, periodo) dos itens: vale o mais longo"""
+        dias = max(
+            (ItemOrcamento.DIAS_MODALIDADE[modalidade] * periodo for modalidade, periodo in periodos), default=1
+        )
+        return data_uso + timedelta(days=dias - 1)
 
 
 class ItemReserva(models.Model):
@@ -412,3 +652,98 @@ class ItemReserva(models.Model):
     def __str__(self):
         return f"{self.equipamento.nome} - Qtd: {self.quantidade}"
 
+
+class OrcamentoArquivado(models.Model):
+    """
+    Orçamento fechado movido da tabela principal (equipamentos/arquivamento.py).
+    
+    Mantém o id original e, em `dados`, a resposta do detalhe no momento do
+    arquivamento (com os itens), servida pela API quando o orçamento não está
+    mais na tabela principal.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    
+    cliente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='orcamentos_arquivados',
+        verbose_name="Cliente"
+    )
+    
+    status = models.CharField(max_length=20, choices=Orcamento.STATUS_CHOICES, verbose_name="Status")
+    valor_total = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Valor Total")
+    data_criacao = models.DateTimeField(verbose_name="Data de Criação")
+    data_arquivamento = models.DateTimeField(auto_now_add=True, verbose_name="Data de Arquivamento")
+    dados = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Dados")
+    
+    class Meta:
+        verbose_name = "Orçamento Arquivado"
+        verbose_name_plural = "Orçamentos Arquivados"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['cliente', 'data_criacao'], name='orcamento_arq_cliente_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Orçamento #{self.id} (arquivado)"
+
+
+class ReservaArquivada(models.Model):
+    """
+    Reserva fechada movida da tabela principal (equipamentos/arquivamento.py).
+    
+    Mesmo formato de OrcamentoArquivado: id original e resposta do detalhe em `dados`.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    
+    cliente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reservas_arquivadas',
+        verbose_name="Cliente"
+    )
+    
+    status = models.CharField(max_length=20, choices=Reserva.STATUS_CHOICES, verbose_name="Status")
+    data_uso = models.DateField(verbose_name="Data de Uso")
+    valor_total = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Valor Total")
+    data_criacao = models.DateTimeField(verbose_name="Data de Criação")
+    data_arquivamento = models.DateTimeField(auto_now_add=True, verbose_name="Data de Arquivamento")
+    dados = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Dados")
+    
+    class Meta:
+        verbose_name = "Reserva Arquivada"
+        verbose_name_plural = "Reservas Arquivadas"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['cliente', 'data_criacao'], name='reserva_arq_cliente_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Reserva #{self.id} (arquivada)"
+
+
+class ResumoArquivo(models.Model):
+    """
+    Totais mensais dos registros arquivados, somados aos da tabela principal
+    nos relatórios (equipamentos/relatorios.py). Reservas contam no mês da data
+    de uso; orçamentos, no mês de criação.
+    """
+    TIPO_CHOICES = [
+        ('reserva', 'Reserva'),
+        ('orcamento', 'Orçamento'),
+    ]
+    
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    mes = models.DateField(verbose_name="Mês")
+    status = models.CharField(max_length=20, verbose_name="Status")
+    quantidade = models.PositiveIntegerField(default=0, verbose_name="Quantidade")
+    valor_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), verbose_name="Valor Total")
+    
+    class Meta:
+        verbose_name = "Resumo do Arquivo"
+        verbose_name_plural = "Resumos do Arquivo"
+        ordering = ['-mes', 'tipo', 'status']
+        unique_together = ['tipo', 'mes', 'status']
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.mes:%m/%Y} {self.status}: {self.quantidade}"
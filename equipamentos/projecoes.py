@@ -0,0 +1,182 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.response import Response
+from rest_framework.serializers import SerializerMethodField
+
+
+def _identidade(valor):
+    return valor
+
+
+class Projecao:
+    """
+    Serialização rápida para listagens.
+    
+    Em vez de instanciar um model e passar pelos campos do ModelSerializer para
+    cada linha, busca apenas as colunas necessárias com `values()` e monta os
+    dicts com conversores pré-compilados a partir dos próprios campos do
+    serializer, garantindo a mesma saída JSON.
+    
+    `fontes` mapeia o nome do campo de saída para um caminho do `values()`
+    (ex: 'categoria__nome') ou para uma expressão a ser anotada (ex: Count).
+    Campos não mapeados usam o próprio nome como caminho. O valor anotado para
+    um SerializerMethodField é usado como está.
+    """
+    
+    def __init__(self, serializer_class, fontes=None):
+        self.serializer_class = serializer_class
+        self.fontes = fontes or {}
+        self._conversores = None
+    
+    @property
+    def conversores(self):
+        """Lista de (campo_saida, chave_values, to_representation), montada uma única vez"""
+        if self._conversores is None:
+            conversores = []
+            for nome, campo in self.serializer_class().fields.items():
+                if campo.write_only:
+                    continue
+                fonte = self.fontes.get(nome, nome)
+                chave = fonte if isinstance(fonte, str) else f'{nome}_projecao'
+                if isinstance(campo, SerializerMethodField):
+                    conversor = _identidade
+                else:
+                    conversor = campo.to_representation
+                conversores.append((nome, chave, conversor))
+            self._conversores = conversores
+        return self._conversores
+    
+    def selecionar(self, campos=None):
+        """Conversores dos campos pedidos (todos quando `campos` é None)"""
+        if campos is None:
+            return self.conversores
+        return [conversor for conversor in self.conversores if conversor[0] in campos]
+    
+    def aplicar(self, queryset, campos=None):
+        """Converte o queryset em um `values()` com as colunas e anotações necessárias"""
+        conversores = self.selecionar(campos)
+        nomes = {nome for nome, _, _ in conversores}
+        anotacoes = {
+            f'{nome}_projecao': fonte
+            for nome, fonte in self.fontes.items()
+            if not isinstance(fonte, str) and nome in nomes
+        }
+        if anotacoes:
+            # Agregações descartam o Meta.ordering; torna a ordenação explícita
+            if not queryset.query.order_by:
+                queryset = queryset.order_by(*queryset.model._meta.ordering)
+            queryset = queryset.annotate(**anotacoes)
+        return queryset.values(*[chave for _, chave, _ in conversores])
+    
+    def converter(self, linhas, campos=None):
+        """Monta os dicts de saída a partir das linhas do `values()`"""
+        conversores = self.selecionar(campos)
+        resultado = []
+        for linha in linhas:
+            item = {}
+            for nome, chave, to_representation in conversores:
+                valor = linha[chave]
+                item[nome] = None if valor is None else to_representation(valor)
+            resultado.append(item)
+        return resultado
+
+
+class CamposEsparsosMixin:
+    """
+    Permite escolher os campos da resposta com `?fields=id,nome` ou
+    `?exclude=descricao`. Os campos são removidos do serializer e, em leituras,
+    o queryset carrega apenas as colunas necessárias com `.only()`.
+    
+    `dependencias_campos` informa as colunas usadas por campos que não
+    correspondem diretamente a uma coluna (ex: properties do model).
+    """
+    dependencias_campos = {}
+    
+    def get_campos(self):
+        """Nomes dos campos pedidos, na ordem do serializer, ou None para todos"""
+        if not hasattr(self, '_campos'):
+            fields = self.request.query_params.get('fields')
+            exclude = self.request.query_params.get('exclude')
+            self._campos = None
+            
+            if fields or exclude:
+                nomes = list(self.get_serializer_class().Meta.fields)
+                if fields:
+                    pedidos = {nome.strip() for nome in fields.split(',')}
+                    nomes = [nome for nome in nomes if nome in pedidos]
+                if exclude:
+                    excluidos = {nome.strip() for nome in exclude.split(',')}
+                    nomes = [nome for nome in nomes if nome not in excluidos]
+                self._campos = nomes
+        
+        return self._campos
+    
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.get_campos()
+        if campos is not None:
+            alvo = getattr(serializer, 'child', serializer)
+            for nome in list(alvo.fields):
+                if nome not in campos:
+                    alvo.fields.pop(nome)
+        return serializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        campos = self.get_campos()
+        if campos is None or self.request.method != 'GET':
+            return queryset
+        
+        colunas, relacoes = self.colunas_necessarias(queryset.model, campos)
+        # Só as relações dos campos pedidos: o select_related da view sobre uma FK adiada é FieldError
+        queryset = queryset.select_related(None)
+        if relacoes:
+            queryset = queryset.select_related(*relacoes)
+        return queryset.only(*colunas)
+    
+    def colunas_necessarias(self, model, campos):
+        """Traduz os campos do serializer em colunas para `.only()` e relações para `select_related()`"""
+        colunas = {model._meta.pk.name}
+        relacoes = set()
+        fields = self.get_serializer_class()().fields
+        
+        for nome in campos:
+            if nome in self.dependencias_campos:
+                colunas.update(self.dependencias_campos[nome])
+                continue
+            
+            source = fields[nome].source
+            if source == '*':
+                continue
+            
+            partes = source.split('.')
+            try:
+                campo_model = model._meta.get_field(partes[0])
+            except FieldDoesNotExist:
+                continue
+            if not campo_model.concrete or campo_model.many_to_many:
+                continue
+            
+            colunas.add(partes[0])
+            if len(partes) > 1:
+                relacoes.add(partes[0])
+                colunas.add('__'.join(partes))
+        
+        return colunas, relacoes
+
+
+class ListaProjetadaMixin(CamposEsparsosMixin):
+    """Usa `projecao` (quando definida) no lugar do serializer nas listagens"""
+    projecao = None
+    
+    def list(self, request, *args, **kwargs):
+        if self.projecao is None:
+            return super().list(request, *args, **kwargs)
+        
+        campos = self.get_campos()
+        queryset = self.projecao.aplicar(self.filter_queryset(self.get_queryset()), campos)
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.projecao.converter(page, campos))
+        
+        return Response(self.projecao.converter(queryset, campos))
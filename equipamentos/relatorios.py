@@ -0,0 +1,45 @@
+"""
+Relatórios agregados de reservas e orçamentos.
+
+Os totais juntam a tabela principal com o ResumoArquivo dos registros já
+arquivados (equipamentos/arquivamento.py), então não mudam quando um registro
+é arquivado. Reservas contam no mês da data de uso; orçamentos, no mês de
+criação.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from .models import Orcamento, Reserva, ResumoArquivo
+
+
+def resumo_mensal(ano=None):
+    """Lista de {'tipo', 'mes', 'status', 'quantidade', 'valor_total'}, do mês mais recente ao mais antigo"""
+    reservas = Reserva.objects.annotate(mes=TruncMonth('data_uso'))
+    orcamentos = Orcamento.objects.annotate(mes=TruncMonth('data_criacao', output_field=DateField()))
+    arquivados = ResumoArquivo.objects.all()
+    if ano is not None:
+        reservas = reservas.filter(data_uso__year=ano)
+        orcamentos = orcamentos.filter(data_criacao__year=ano)
+        arquivados = arquivados.filter(mes__year=ano)
+    
+    totais = defaultdict(lambda: [0, Decimal('0.00')])
+    for tipo, queryset in [('reserva', reservas), ('orcamento', orcamentos)]:
+        linhas = queryset.values_list('mes', 'status').annotate(Count('id'), Sum('valor_total')).order_by()
+        for mes, status, quantidade, valor in linhas:
+            total = totais[tipo, mes, status]
+            total[0] += quantidade
+            total[1] += valor or 0
+    for tipo, mes, status, quantidade, valor in arquivados.values_list(
+        'tipo', 'mes', 'status', 'quantidade', 'valor_total'
+    ):
+        total = totais[tipo, mes, status]
+        total[0] += quantidade
+        total[1] += valor
+    
+    return [
+        {'tipo': tipo, 'mes': mes, 'status': status, 'quantidade': quantidade, 'valor_total': valor}
+        for (tipo, mes, status), (quantidade, valor) in sorted(
+            totais.items(), key=lambda item: (-item[0][1].toordinal(), item[0][0], item[0][2])
+        )
+    ]
@@ -21,9 +21,9 @@ class EquipamentoSerializer(serializers.ModelSerializer):
             'especificacoes_tecnicas', 'valor_diaria', 'valor_semanal', 'valor_mensal',
             'estado', 'quantidade_disponivel', 'quantidade_total', 'numero_serie',
             'observacoes', 'imagem_principal', 'imagens_adicionais', 'disponivel',
-            'data_cadastro', 'data_atualizacao'
+            'data_cadastro', 'data_atualizacao', 'versao'
         ]
-        read_only_fields = ['data_cadastro', 'data_atualizacao']
+        read_only_fields = ['data_cadastro', 'data_atualizacao', 'versao']
     
     def validate_quantidade_disponivel(self, value):
         """Valida que a quantidade disponível não seja maior que a total"""
@@ -50,8 +50,9 @@ class EquipamentoCreateSerializer(serializers.ModelSerializer):
             'nome', 'categoria', 'descricao', 'marca', 'modelo',
             'especificacoes_tecnicas', 'valor_diaria', 'valor_semanal', 'valor_mensal',
             'estado', 'quantidade_disponivel', 'quantidade_total', 'numero_serie',
-            'observacoes', 'imagem_principal', 'imagens_adicionais'
+            'observacoes', 'imagem_principal', 'imagens_adicionais', 'versao'
         ]
+        read_only_fields = ['versao']
     
     def validate(self, data):
         """Validações gerais do equipamento"""
@@ -135,9 +136,9 @@ class OrcamentoSerializer(serializers.ModelSerializer):
         model = Orcamento
         fields = [
             'id', 'cliente', 'cliente_nome', 'status', 'valor_total', 'observacoes',
-            'data_criacao', 'data_atualizacao', 'itens'
+            'data_criacao', 'data_atualizacao', 'versao', 'itens'
         ]
-        read_only_fields = ['cliente', 'valor_total', 'data_criacao', 'data_atualizacao']
+        read_only_fields = ['cliente', 'valor_total', 'data_criacao', 'data_atualizacao', 'versao']
 
 
 class ItemReservaSerializer(serializers.ModelSerializer):
@@ -160,11 +161,13 @@ class ReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reserva
         fields = [
-            'id', 'cliente', 'cliente_nome', 'orcamento', 'status', 'data_uso',
+            'id', 'cliente', 'cliente_nome', 'orcamento', 'status', 'data_uso', 'data_fim',
             'local_evento', 'observacoes', 'valor_total', 'data_criacao',
             'data_atualizacao', 'data_aprovacao', 'aprovado_por', 'itens'
         ]
-        read_only_fields = ['cliente', 'data_criacao', 'data_atualizacao', 'data_aprovacao', 'aprovado_por']
+        read_only_fields = [
+            'cliente', 'data_fim', 'data_criacao', 'data_atualizacao', 'data_aprovacao', 'aprovado_por'
+        ]
 
 
 class ReservaCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Categoria, Equipamento
+from .catalogo import invalidar_catalogo
+
+
+@receiver([post_save, post_delete], sender=Equipamento)
+@receiver([post_save, post_delete], sender=Categoria)
+def catalogo_alterado(sender, **kwargs):
+    """Invalida os caches do catálogo quando equipamentos ou categorias mudam"""
+    invalidar_catalogo()
@@ -0,0 +1,28 @@
+from tarefas.fila import tarefa
+from . import arquivamento, estoque, expiracao_orcamentos
+from .ciclo_reservas import LOTE_PADRAO, atualizar_ciclo_reservas
+
+
+@tarefa(nome='equipamentos.atualizar_ciclo_reservas')
+def atualizar_ciclo(lote=LOTE_PADRAO):
+    atualizar_ciclo_reservas(lote=lote)
+
+
+@tarefa(nome=estoque.TAREFA_ATUALIZACAO, max_tentativas=5)
+def atualizar_estoque(equipamento_ids):
+    estoque.atualizar_projecoes(equipamento_ids)
+
+
+@tarefa(nome='equipamentos.consolidar_estoque')
+def consolidar_estoque(lote=estoque.LOTE_PADRAO):
+    estoque.consolidar(lote=lote)
+
+
+@tarefa(nome='equipamentos.purgar_rascunhos')
+def purgar_rascunhos(lote=expiracao_orcamentos.LOTE_PADRAO):
+    expiracao_orcamentos.purgar_rascunhos(lote=lote)
+
+
+@tarefa(nome='equipamentos.arquivar')
+def arquivar(lote=arquivamento.LOTE_PADRAO):
+    arquivamento.arquivar(lote=lote)
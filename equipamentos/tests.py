@@ -1,3 +1,783 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+from backend.concorrencia import ConflitoVersao
+from backend.metricas import registro
+from clientes.models import Cliente
+from tarefas.models import Tarefa
+from . import estoque
+from .admin import EquipamentoAdmin
+from .arquivamento import arquivar
+from .benchmark import popular
+from .management.commands.benchmark_reservas import BASELINE_PADRAO, Command as BenchmarkReservas
+from .ciclo_reservas import atualizar_ciclo_reservas
+from .expiracao_orcamentos import purgar_rascunhos
+from .models import (
+    Categoria, Equipamento, EspecificacaoTecnica, MovimentoEstoque, Orcamento, SaldoEstoque, Reserva, ItemReserva,
+    ReservaArquivada,
+)
+from .serializers import EquipamentoListSerializer, OrcamentoListSerializer, ReservaListSerializer
+from .views import EquipamentoListView, OrcamentoListView, ReservaListView
 
-# Create your tests here.
+
+def processar_fila():
+    call_command('processar_tarefas', '--uma-vez', stdout=StringIO())
+
+
+class EspecificacoesTests(TestCase):
+    def setUp(self):
+        popular(1)
+        Equipamento.objects.get().indexar_especificacoes()
+    
+    def indice(self):
+        return list(EspecificacaoTecnica.objects.order_by('chave').values_list('id', 'chave', 'valor_texto'))
+    
+    def test_reindexa_so_quando_o_json_muda(self):
+        indice = self.indice()
+        self.assertEqual([chave for _, chave, _ in indice], ['canais', 'potencia'])
+        
+        equipamento = Equipamento.objects.get()
+        equipamento.quantidade_disponivel += 1
+        equipamento.valor_diaria = Decimal('99.00')
+        with CaptureQueriesContext(connection) as queries:
+            equipamento.save()
+        self.assertFalse([q for q in queries if 'especificacaotecnica' in q['sql']])
+        Equipamento.objects.only('id', 'versao').get().save()
+        self.assertEqual(self.indice(), indice)
+        
+        equipamento = Equipamento.objects.get()
+        equipamento.especificacoes_tecnicas['potencia'] = '500W'
+        equipamento.save()
+        self.assertEqual(
+            [(chave, valor) for _, chave, valor in self.indice()], [('canais', '0'), ('potencia', '500w')]
+        )
+
+
+class FiltroEspecificacoesTests(APITestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nome='Som')
+        for nome, especificacoes in [
+            ('Caixa Grande', {'potencia': '2000W', 'falantes': '2x15 polegadas', 'canais': 2}),
+            ('Caixa Media', {'potencia': '1000W', 'falantes': '1x12 polegadas', 'canais': '2'}),
+            ('Mesa', {'potencia': 500, 'canais': '16 canais'}),
+        ]:
+            Equipamento.objects.create(
+                nome=nome, categoria=categoria, marca='JBL', modelo=nome, descricao='',
+                valor_diaria=Decimal('10.00'), especificacoes_tecnicas=especificacoes,
+            )
+        self.client.force_authenticate(Cliente.objects.create(username='a@a.com', email='a@a.com'))
+    
+    def buscar(self, **params):
+        return self.client.get(reverse('equipamento-list'), params)
+    
+    def nomes(self, **params):
+        resposta = self.buscar(**params)
+        self.assertEqual(resposta.status_code, 200)
+        return sorted(equipamento['nome'] for equipamento in resposta.json()['results'])
+    
+    def test_igualdade_numerica_so_quando_o_valor_e_um_numero(self):
+        self.assertEqual(self.nomes(spec__canais='2'), ['Caixa Grande', 'Caixa Media'])
+        self.assertEqual(self.nomes(spec__canais='16'), ['Mesa'])
+        self.assertEqual(self.nomes(spec__falantes='2x15 Polegadas'), ['Caixa Grande'])
+        self.assertEqual(self.nomes(spec__potencia='1000w'), ['Caixa Media'])
+        self.assertEqual(self.nomes(spec__potencia='500'), ['Mesa'])
+    
+    def test_operadores_de_faixa(self):
+        self.assertEqual(self.nomes(spec__potencia__gte='1000'), ['Caixa Grande', 'Caixa Media'])
+        self.assertEqual(self.nomes(spec__potencia__gt='1000'), ['Caixa Grande'])
+        self.assertEqual(self.nomes(spec__potencia__lte='1000'), ['Caixa Media', 'Mesa'])
+        self.assertEqual(self.nomes(spec__potencia__lt='1000'), ['Mesa'])
+        self.assertEqual(self.nomes(spec__potencia__gte='500', spec__canais='2'), ['Caixa Grande', 'Caixa Media'])
+    
+    def test_entradas_invalidas_retornam_400(self):
+        for params in [
+            {'spec__potencia__foo': '1'},
+            {'spec__potencia__gte': 'muito'},
+            {'spec__potencia__lt': '1000W'},
+        ]:
+            with self.subTest(params=params):
+                resposta = self.buscar(**params)
+                self.assertEqual(resposta.status_code, 400)
+                self.assertIn(next(iter(params)), resposta.json())
+
+
+class AutocompletarTests(APITestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nome='Som')
+        for nome, marca, modelo, estado in [
+            ('Caixa de Som Ativa', 'JBL', 'EON 715', 'disponivel'),
+            ('Caixa Acústica Passiva', 'Yamaha', 'CZR 12', 'disponivel'),
+            ('Caixa de Retorno', 'JBL', 'PRX 812', 'manutencao'),
+            ('Caixa Antiga', 'JBL', 'CX 1', 'inativo'),
+            ('Microfone sem Fio', 'Shure', 'SLX 24', 'disponivel'),
+        ]:
+            Equipamento.objects.create(
+                nome=nome, categoria=categoria, marca=marca, modelo=modelo, estado=estado,
+                descricao='', valor_diaria=Decimal('10.00'),
+            )
+        self.client.force_authenticate(Cliente.objects.create(username='a@a.com', email='a@a.com'))
+    
+    def nomes(self, termo, limite=10):
+        resposta = self.client.get(reverse('equipamento-autocompletar'), {'q': termo, 'limite': limite})
+        self.assertEqual(resposta.status_code, 200)
+        return [sugestao['nome'] for sugestao in resposta.json()]
+    
+    def test_prefixo_sem_acento_e_sem_inativos(self):
+        self.assertEqual(
+            self.nomes('cai'), ['Caixa Acústica Passiva', 'Caixa de Retorno', 'Caixa de Som Ativa']
+        )
+        self.assertEqual(self.nomes('ACUS'), ['Caixa Acústica Passiva'])
+        self.assertEqual(self.nomes('xyz'), [])
+        self.assertEqual(self.nomes(''), [])
+    
+    def test_termos_se_intersectam_e_respeitam_o_limite(self):
+        self.assertEqual(self.nomes('caixa jbl'), ['Caixa de Retorno', 'Caixa de Som Ativa'])
+        self.assertEqual(self.nomes('jbl prx'), ['Caixa de Retorno'])
+        self.assertEqual(self.nomes('shure caixa'), [])
+        self.assertEqual(self.nomes('c', limite=2), ['Caixa Acústica Passiva', 'Caixa de Retorno'])
+    
+    def test_indice_reconstruido_apos_alteracoes(self):
+        self.assertEqual(self.nomes('mesa'), [])
+        mesa = Equipamento.objects.create(
+            nome='Mesa de Som', categoria=Categoria.objects.get(), marca='Behringer', modelo='X32',
+            descricao='', valor_diaria=Decimal('10.00'),
+        )
+        self.assertEqual(self.nomes('mesa'), ['Mesa de Som'])
+        
+        mesa.estado = 'inativo'
+        mesa.save()
+        self.assertEqual(self.nomes('mesa'), [])
+        
+        Equipamento.objects.get(nome='Microfone sem Fio').delete()
+        self.assertEqual(self.nomes('shure'), [])
+
+
+class FacetasTests(APITestCase):
+    def setUp(self):
+        self.som = Categoria.objects.create(nome='Som')
+        self.luz = Categoria.objects.create(nome='Luz')
+        for nome, categoria, marca, estado, valor in [
+            ('Caixa', self.som, 'JBL', 'disponivel', '80.00'),
+            ('Mesa', self.som, 'Yamaha', 'disponivel', '250.00'),
+            ('Microfone', self.som, 'JBL', 'manutencao', '50.00'),
+            ('Moving Head', self.luz, 'Star', 'disponivel', '1200.00'),
+        ]:
+            Equipamento.objects.create(
+                nome=nome, categoria=categoria, marca=marca, modelo=nome, estado=estado, descricao='',
+                valor_diaria=Decimal(valor), quantidade_disponivel=1, quantidade_total=1,
+            )
+        self.client.force_authenticate(Cliente.objects.create(username='a@a.com', email='a@a.com'))
+    
+    def facetas(self, **params):
+        resposta = self.client.get(reverse('equipamento-list'), {'facets': 'true', **params})
+        self.assertEqual(resposta.status_code, 200)
+        facetas = resposta.json()['facets']
+        return {
+            'categoria': {c['nome']: c['total'] for c in facetas['categoria']},
+            'marca': {m['valor']: m['total'] for m in facetas['marca']},
+            'estado': {e['valor']: e['total'] for e in facetas['estado']},
+            'disponivel': facetas['disponivel'],
+            'faixa_preco': {f['valor']: f['total'] for f in facetas['faixa_preco'] if f['total']},
+        }
+    
+    def test_contagens_respeitam_os_filtros(self):
+        self.assertEqual(self.facetas(), {
+            'categoria': {'Luz': 1, 'Som': 3},
+            'marca': {'JBL': 2, 'Star': 1, 'Yamaha': 1},
+            'estado': {'disponivel': 3, 'manutencao': 1},
+            'disponivel': {'true': 3, 'false': 1},
+            'faixa_preco': {'ate_100': 2, '100_300': 1, 'acima_1000': 1},
+        })
+        self.assertEqual(self.facetas(categoria=self.som.id, marca='JBL'), {
+            'categoria': {'Som': 2},
+            'marca': {'JBL': 2},
+            'estado': {'disponivel': 1, 'manutencao': 1},
+            'disponivel': {'true': 1, 'false': 1},
+            'faixa_preco': {'ate_100': 2},
+        })
+        facetas = self.facetas(disponivel='true', preco_min='100')
+        self.assertEqual(facetas['categoria'], {'Luz': 1, 'Som': 1})
+        self.assertEqual(facetas['faixa_preco'], {'100_300': 1, 'acima_1000': 1})
+        self.assertEqual(self.facetas(search='xyz')['categoria'], {})
+    
+    def test_invalidadas_ao_salvar_ou_excluir(self):
+        self.assertEqual(self.facetas()['marca'], {'JBL': 2, 'Star': 1, 'Yamaha': 1})
+        
+        equipamento = Equipamento.objects.get(nome='Mesa')
+        equipamento.marca = 'JBL'
+        equipamento.save()
+        self.assertEqual(self.facetas()['marca'], {'JBL': 3, 'Star': 1})
+        
+        Equipamento.objects.get(nome='Moving Head').delete()
+        self.assertEqual(self.facetas()['marca'], {'JBL': 3})
+        
+        caixa = Equipamento.objects.get(nome='Caixa')
+        caixa.categoria = self.luz
+        caixa.save()
+        self.assertEqual(self.facetas()['categoria'], {'Luz': 1, 'Som': 2})
+        
+        self.luz.nome = 'Iluminação'
+        self.luz.save()
+        self.assertEqual(self.facetas()['categoria'], {'Iluminação': 1, 'Som': 2})
+        
+        self.som.delete()
+        self.assertEqual(self.facetas()['categoria'], {'Iluminação': 1})
+    
+    def test_invalidadas_quando_o_estoque_muda(self):
+        self.assertEqual(self.facetas()['disponivel'], {'true': 3, 'false': 1})
+        caixa = Equipamento.objects.get(nome='Caixa')
+        estoque.registrar(caixa.id, 'reserva', -1)
+        processar_fila()
+        self.assertEqual(self.facetas()['disponivel'], {'true': 2, 'false': 2})
+
+
+class ProjecaoListagensTests(TestCase):
+    def setUp(self):
+        self.cliente, _ = popular(12)
+        # Categoria e preços variados: ordenação por categoria e decimais com centavos
+        outra = Categoria.objects.create(nome='Acústica')
+        Equipamento.objects.filter(id__in=Equipamento.objects.order_by('id').values('id')[:4]).update(
+            categoria=outra, valor_diaria=Decimal('1234.56')
+        )
+    
+    def casos(self):
+        return [
+            (EquipamentoListView.queryset.order_by(*EquipamentoListView.ordering), EquipamentoListSerializer,
+             EquipamentoListView.projecao),
+            (Orcamento.objects.filter(cliente=self.cliente).order_by('-data_criacao', '-id'), OrcamentoListSerializer,
+             OrcamentoListView.projecao),
+            (Reserva.objects.filter(cliente=self.cliente).order_by('-data_criacao', '-id'), ReservaListSerializer,
+             ReservaListView.projecao),
+        ]
+    
+    def test_projecao_gera_o_mesmo_json_que_o_serializer(self):
+        renderer = JSONRenderer()
+        for queryset, serializer_class, projecao in self.casos():
+            with self.subTest(serializer_class.__name__):
+                esperado = renderer.render(serializer_class(queryset.all(), many=True).data)
+                self.assertEqual(renderer.render(projecao.converter(projecao.aplicar(queryset.all()))), esperado)
+        
+        saida = EquipamentoListView.projecao.converter(EquipamentoListView.projecao.aplicar(self.casos()[0][0]))
+        self.assertEqual((saida[0]['categoria_nome'], saida[0]['valor_diaria']), ('Acústica', '1234.56'))
+    
+    def test_projecao_com_campos_esparsos(self):
+        renderer = JSONRenderer()
+        campos = ['id', 'categoria_nome', 'valor_diaria', 'disponivel']
+        queryset, serializer_class, projecao = self.casos()[0]
+        serializer = serializer_class(queryset.all(), many=True)
+        for nome in list(serializer.child.fields):
+            if nome not in campos:
+                serializer.child.fields.pop(nome)
+        
+        self.assertEqual(
+            renderer.render(projecao.converter(projecao.aplicar(queryset.all(), campos), campos)),
+            renderer.render(serializer.data),
+        )
+
+
+class CamposEsparsosTests(APITestCase):
+    def setUp(self):
+        self.cliente, self.orcamento = popular(3)
+        self.equipamento = Equipamento.objects.first()
+        self.reserva = Reserva.objects.filter(cliente=self.cliente).first()
+        ItemReserva.objects.create(
+            reserva=self.reserva, equipamento=self.equipamento, quantidade=1, periodo=1,
+            valor_unitario=Decimal('10.00'), valor_total=Decimal('10.00'),
+        )
+        self.admin = Cliente.objects.create(
+            username='admin@example.com', email='admin@example.com', nome_completo='Admin',
+            cpf_cnpj='999.999.999-99', is_staff=True,
+        )
+    
+    def casos(self):
+        """(usuário, url, é listagem, ?fields=, ?exclude=) de cada view com campos esparsos"""
+        return [
+            (self.cliente, reverse('equipamento-list'), True, 'id,nome,categoria_nome', 'descricao,disponivel'),
+            (self.cliente, reverse('equipamento-detail', args=[self.equipamento.pk]), False,
+             'id,nome', 'especificacoes_tecnicas,categoria'),
+            (self.cliente, reverse('equipamento-detail', args=[self.equipamento.pk]), False,
+             'id,categoria_nome,disponivel', 'versao'),
+            (self.cliente, reverse('orcamento-list'), True, 'id,cliente_nome,total_itens', 'valor_total'),
+            (self.cliente, reverse('orcamento-detail', args=[self.orcamento.pk]), False,
+             'id,status,itens', 'itens,cliente_nome'),
+            (self.cliente, reverse('reserva-list'), True, 'id,status', 'total_itens,cliente_nome'),
+            (self.cliente, reverse('reserva-detail', args=[self.reserva.pk]), False,
+             'id,cliente_nome,itens', 'itens,orcamento'),
+            (self.admin, reverse('reserva-admin-list'), True, 'id,data_uso', 'local_evento'),
+        ]
+    
+    def obter(self, usuario, url, listagem, **params):
+        self.client.force_authenticate(usuario)
+        resposta = self.client.get(url, params)
+        self.assertEqual(resposta.status_code, 200, resposta.content[:500])
+        dados = resposta.json()
+        return dados['results'][0] if listagem else dados
+    
+    def test_fields_e_exclude_em_cada_view(self):
+        for usuario, url, listagem, fields, exclude in self.casos():
+            with self.subTest(url=url, fields=fields):
+                completo = self.obter(usuario, url, listagem)
+                
+                parcial = self.obter(usuario, url, listagem, fields=fields)
+                self.assertEqual(list(parcial), [nome for nome in completo if nome in fields.split(',')])
+                self.assertEqual(parcial, {nome: completo[nome] for nome in parcial})
+                
+                sem = self.obter(usuario, url, listagem, exclude=exclude)
+                self.assertEqual(sem, {nome: valor for nome, valor in completo.items() if nome not in exclude.split(',')})
+    
+    def test_detalhe_carrega_so_as_colunas_pedidas(self):
+        self.client.force_authenticate(self.cliente)
+        url = reverse('equipamento-detail', args=[self.equipamento.pk])
+        with CaptureQueriesContext(connection) as queries:
+            resposta = self.client.get(url, {'fields': 'id,nome'})
+        self.assertEqual(resposta.json(), {'id': self.equipamento.pk, 'nome': self.equipamento.nome})
+        sql = [q['sql'] for q in queries if 'equipamentos_equipamento' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('descricao', sql[0])
+        self.assertNotIn('equipamentos_categoria', sql[0])
+
+
+class BenchmarkReservasTests(TestCase):
+    def test_baseline_versionado_usa_os_parametros_padrao(self):
+        opcoes = vars(BenchmarkReservas().create_parser('manage.py', 'benchmark_reservas').parse_args([]))
+        baseline = json.loads(BASELINE_PADRAO.read_text())
+        self.assertEqual(baseline['parametros'], {chave: opcoes[chave] for chave in baseline['parametros']})
+    
+    def test_falha_so_com_mais_queries_e_avisa_da_latencia(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        baseline, saida = Path(pasta.name) / 'baseline.json', Path(pasta.name) / 'saida.json'
+        pequeno = dict(
+            equipamentos=20, clientes=3, reservas=10, repeticoes=2, tamanhos_orcamento='1,2',
+            baseline=str(baseline), saida=str(saida), stdout=StringIO(),
+        )
+        with self.assertRaisesMessage(CommandError, 'não encontrado'):
+            call_command('benchmark_reservas', **pequeno)
+        call_command('benchmark_reservas', atualizar_baseline=True, **pequeno)
+        call_command('benchmark_reservas', tolerancia_ms=1000, **pequeno)
+        
+        # Latência acima do baseline só avisa, a não ser com --falhar-latencia
+        dados = json.loads(baseline.read_text())
+        dados['operacoes']['equipamento_detalhe']['p95_ms'] = 0.001
+        baseline.write_text(json.dumps(dados))
+        saida_comando = StringIO()
+        call_command('benchmark_reservas', tolerancia=0, tolerancia_ms=0, **{**pequeno, 'stdout': saida_comando})
+        self.assertIn('equipamento_detalhe: p95 0.00', saida_comando.getvalue())
+        with self.assertRaisesMessage(CommandError, 'equipamento_detalhe: p95'):
+            call_command('benchmark_reservas', tolerancia=0, tolerancia_ms=0, falhar_latencia=True, **pequeno)
+        
+        dados['operacoes']['equipamento_detalhe']['queries_max'] -= 1
+        baseline.write_text(json.dumps(dados))
+        with self.assertRaisesMessage(CommandError, 'equipamento_detalhe: queries'):
+            call_command('benchmark_reservas', **pequeno)
+        with self.assertRaisesMessage(CommandError, 'Parâmetros diferentes'):
+            call_command('benchmark_reservas', **{**pequeno, 'seed': 7})
+
+
+class CicloReservasTests(TestCase):
+    def setUp(self):
+        self.cliente, _ = popular(1)
+        self.equipamento = Equipamento.objects.get()
+        Equipamento.objects.update(quantidade_total=10, quantidade_disponivel=10)
+        MovimentoEstoque.objects.create(equipamento=self.equipamento, tipo='ajuste', quantidade=10)
+        Reserva.objects.all().delete()
+    
+    def reserva(self, status, data_uso, quantidade=3, modalidade='diaria'):
+        reserva = Reserva.objects.create(
+            cliente=self.cliente, status=status, data_uso=data_uso, local_evento='Salão', valor_total=Decimal('30.00'),
+            data_fim=Reserva.calcular_data_fim(data_uso, [(modalidade, 1)]),
+        )
+        ItemReserva.objects.create(
+            reserva=reserva, equipamento=self.equipamento, quantidade=quantidade, modalidade=modalidade, periodo=1,
+            valor_unitario=Decimal('10.00'), valor_total=Decimal('30.00'),
+        )
+        return reserva
+    
+    def estoque(self):
+        processar_fila()
+        self.equipamento.refresh_from_db()
+        return self.equipamento.quantidade_disponivel
+    
+    def test_ciclo_completo_ajusta_estoque_e_e_idempotente(self):
+        hoje = date.today()
+        atrasada = self.reserva('aprovada', hoje - timedelta(days=10))
+        do_dia = self.reserva('aprovada', hoje)
+        pendente = self.reserva('pendente', hoje)
+        
+        self.assertEqual(
+            atualizar_ciclo_reservas(hoje, lote=1),
+            {'atrasadas_concluidas': 1, 'ativadas': 1, 'concluidas': 0},
+        )
+        self.assertEqual(self.estoque(), 7)
+        self.assertEqual(atualizar_ciclo_reservas(hoje), {'atrasadas_concluidas': 0, 'ativadas': 0, 'concluidas': 0})
+        self.assertEqual(self.estoque(), 7)
+        
+        atualizar_ciclo_reservas(hoje + timedelta(days=1))
+        self.assertEqual(self.estoque(), 10)
+        status = dict(Reserva.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [status[atrasada.id], status[do_dia.id], status[pendente.id]],
+            ['concluida', 'concluida', 'pendente'],
+        )
+        self.assertEqual(
+            list(MovimentoEstoque.objects.filter(reserva=do_dia).order_by('id').values_list('tipo', 'quantidade')),
+            [('reserva', -3), ('liberacao', 3)],
+        )
+    
+    def test_reserva_semanal_fica_ativa_ate_o_fim_do_periodo(self):
+        hoje = date.today()
+        semanal = self.reserva('aprovada', hoje, modalidade='semanal')
+        self.assertEqual(semanal.data_fim, hoje + timedelta(days=6))
+        
+        atualizar_ciclo_reservas(hoje)
+        self.assertEqual(atualizar_ciclo_reservas(hoje + timedelta(days=6))['concluidas'], 0)
+        self.assertEqual(Reserva.objects.get(id=semanal.id).status, 'ativa')
+        self.assertEqual(self.estoque(), 7)
+        
+        self.assertEqual(atualizar_ciclo_reservas(hoje + timedelta(days=7))['concluidas'], 1)
+        self.assertEqual(Reserva.objects.get(id=semanal.id).status, 'concluida')
+        self.assertEqual(self.estoque(), 10)
+    
+    def test_aprovada_em_andamento_e_ativada_e_nao_concluida(self):
+        hoje = date.today()
+        semanal = self.reserva('aprovada', hoje - timedelta(days=2), modalidade='semanal')
+        self.assertEqual(
+            atualizar_ciclo_reservas(hoje),
+            {'atrasadas_concluidas': 0, 'ativadas': 1, 'concluidas': 0},
+        )
+        self.assertEqual(Reserva.objects.get(id=semanal.id).status, 'ativa')
+        self.assertEqual(self.estoque(), 7)
+
+
+@override_settings(ESTOQUE_MARGEM_CONSOLIDACAO=0)
+class EstoqueTests(TestCase):
+    def setUp(self):
+        popular(1)
+        self.equipamento = Equipamento.objects.get()
+        Equipamento.objects.update(quantidade_total=10, quantidade_disponivel=0)
+        self.equipamento.refresh_from_db()
+    
+    def estoque(self):
+        processar_fila()
+        self.equipamento.refresh_from_db()
+        return self.equipamento.quantidade_disponivel
+    
+    def registrar_em(self, momento, *args, **kwargs):
+        with mock.patch('django.utils.timezone.now', return_value=momento):
+            return estoque.registrar(self.equipamento, *args, **kwargs)
+    
+    def test_saldo_atual_e_historico_a_partir_dos_saldos(self):
+        inicio = timezone.now() - timedelta(days=30)
+        self.registrar_em(inicio, 'ajuste', 10)
+        self.registrar_em(inicio + timedelta(days=10), 'manutencao', -2)
+        self.assertEqual(self.estoque(), 8)
+        
+        self.assertEqual(estoque.consolidar(), {'saldos': 1, 'corrigidos': 0})
+        self.assertEqual(estoque.consolidar(), {'saldos': 0, 'corrigidos': 0})
+        self.registrar_em(inicio + timedelta(days=20), 'compra', 5)
+        self.registrar_em(inicio + timedelta(days=25), 'baixa', -1)
+        
+        self.assertEqual(self.estoque(), 12)
+        self.assertEqual(self.equipamento.quantidade_total, 14)
+        self.assertEqual(estoque.saldo_atual([self.equipamento.id]), {self.equipamento.id: 12})
+        self.assertEqual(
+            [estoque.saldo_em([self.equipamento.id], inicio + timedelta(days=dias))[self.equipamento.id]
+             for dias in (-1, 5, 15, 22, 29)],
+            [0, 10, 8, 13, 12],
+        )
+        
+        saldo = SaldoEstoque.objects.get()
+        self.assertEqual(saldo.quantidade, 8)
+        with self.assertNumQueries(2):
+            estoque.saldo_atual([self.equipamento.id])
+    
+    def test_registrar_so_insere_e_a_tarefa_atualiza_as_projecoes(self):
+        with CaptureQueriesContext(connection) as consultas:
+            estoque.registrar(self.equipamento, 'compra', 4)
+        comandos = [q['sql'].split()[0] for q in consultas]
+        comandos = [comando for comando in comandos if comando not in ('SAVEPOINT', 'RELEASE')]
+        self.assertEqual(comandos, ['INSERT', 'INSERT'])
+        
+        self.equipamento.refresh_from_db()
+        self.assertEqual((self.equipamento.quantidade_disponivel, self.equipamento.quantidade_total), (0, 10))
+        self.assertEqual(estoque.saldo_atual([self.equipamento.id]), {self.equipamento.id: 4})
+        
+        self.assertEqual(self.estoque(), 4)
+        self.assertEqual(self.equipamento.quantidade_total, 14)
+        # Tarefa repetida não soma a compra de novo
+        estoque.agendar_atualizacao([self.equipamento.id])
+        self.assertEqual(self.estoque(), 4)
+        self.assertEqual(self.equipamento.quantidade_total, 14)
+    
+    def test_consolidar_refaz_o_total_quando_a_tarefa_se_perde(self):
+        Equipamento.objects.filter(pk=self.equipamento.pk).update(quantidade_total=12)
+        estoque.registrar(self.equipamento, 'compra', 5)
+        estoque.registrar(self.equipamento, 'baixa', -1)
+        Tarefa.objects.all().delete()
+        
+        estoque.consolidar()
+        self.equipamento.refresh_from_db()
+        self.assertEqual((self.equipamento.quantidade_total, self.equipamento.quantidade_disponivel), (16, 4))
+        estoque.consolidar()
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.equipamento.quantidade_total, 16)
+    
+    def test_criar_reserva_confere_o_livro_e_nao_a_projecao(self):
+        orcamento = Orcamento.objects.order_by('id').first()
+        Orcamento.objects.filter(pk=orcamento.pk).update(status='finalizado')
+        cliente = APIClient()
+        cliente.force_authenticate(orcamento.cliente)
+        url = reverse('criar-reserva-orcamento', args=[orcamento.pk])
+        dados = {'data_uso': (date.today() + timedelta(days=5)).isoformat(), 'local_evento': 'Salão'}
+        
+        # Projeção desatualizada (worker atrasado) não permite reservar o que o livro não tem
+        Equipamento.objects.update(quantidade_disponivel=10)
+        self.assertEqual(cliente.post(url, dados, format='json').status_code, 400)
+        
+        estoque.registrar(self.equipamento, 'ajuste', 1)
+        Equipamento.objects.update(quantidade_disponivel=0)
+        self.assertEqual(cliente.post(url, dados, format='json').status_code, 201)
+    
+    def test_alteracao_manual_vira_ajuste_e_consolidar_corrige_divergencia(self):
+        self.equipamento.quantidade_disponivel = 6
+        self.equipamento.save()
+        self.assertEqual(
+            list(MovimentoEstoque.objects.values_list('tipo', 'quantidade')), [('ajuste', 6)]
+        )
+        
+        Equipamento.objects.update(quantidade_disponivel=9)
+        self.assertEqual(estoque.consolidar(), {'saldos': 1, 'corrigidos': 1})
+        self.assertEqual(self.estoque(), 6)
+        
+        movimento = MovimentoEstoque.objects.get()
+        with self.assertRaises(ValueError):
+            movimento.save()
+        with self.assertRaises(ValueError):
+            movimento.delete()
+
+
+class ConcorrenciaOtimistaTests(APITestCase):
+    def setUp(self):
+        self.cliente, self.orcamento = popular(2)
+        self.equipamento = Equipamento.objects.first()
+        self.admin = Cliente.objects.create(
+            username='admin@example.com', email='admin@example.com', nome_completo='Admin',
+            cpf_cnpj='999.999.999-99', is_staff=True,
+        )
+    
+    def test_save_sobre_versao_antiga_levanta_conflito(self):
+        primeira, segunda = Equipamento.objects.get(pk=self.equipamento.pk), Equipamento.objects.get(pk=self.equipamento.pk)
+        primeira.marca = 'Primeira'
+        primeira.save()
+        self.assertEqual(primeira.versao, 2)
+        
+        segunda.marca = 'Segunda'
+        with self.assertRaises(ConflitoVersao), transaction.atomic():
+            segunda.save()
+        self.assertEqual(Equipamento.objects.get(pk=self.equipamento.pk).marca, 'Primeira')
+    
+    def test_if_match_desatualizado_responde_412(self):
+        self.client.force_authenticate(self.admin)
+        etag = self.client.get(reverse('equipamento-detail', args=[self.equipamento.pk]))['ETag']
+        url = reverse('equipamento-update', args=[self.equipamento.pk])
+        dados = {'marca': 'Nova', 'valor_diaria': '20.00'}
+        
+        resposta = self.client.patch(url, dados, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        
+        resposta = self.client.patch(url, {'marca': 'Outra', 'valor_diaria': '20.00'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(resposta.status_code, 412)
+        self.assertEqual(Equipamento.objects.get(pk=self.equipamento.pk).marca, 'Nova')
+    
+    def test_projecao_do_estoque_nao_muda_a_versao_nem_e_sobrescrita(self):
+        estoque.registrar(self.equipamento.id, 'compra', 5)
+        processar_fila()
+        aberto = Equipamento.objects.get(pk=self.equipamento.pk)
+        projetado = aberto.quantidade_disponivel
+        
+        estoque.registrar(self.equipamento.id, 'reserva', -2)
+        processar_fila()
+        self.assertEqual(Equipamento.objects.get(pk=self.equipamento.pk).versao, aberto.versao)
+        
+        aberto.marca = 'Editada'
+        aberto.save()
+        equipamento = Equipamento.objects.get(pk=self.equipamento.pk)
+        self.assertEqual((equipamento.marca, equipamento.quantidade_disponivel), ('Editada', projetado - 2))
+        
+        aberto.quantidade_total += 3
+        aberto.save()
+        estoque.atualizar_projecoes([self.equipamento.id])
+        equipamento = Equipamento.objects.get(pk=self.equipamento.pk)
+        self.assertEqual(equipamento.quantidade_total, aberto.quantidade_total)
+        self.assertEqual(equipamento.quantidade_disponivel, projetado - 2)
+    
+    def test_admin_salva_com_a_projecao_atualizada_no_meio(self):
+        self.admin.is_superuser = True
+        self.admin.save()
+        self.client.force_login(self.admin)
+        url = reverse('admin:equipamentos_equipamento_change', args=[self.equipamento.pk])
+        formulario = self.client.get(url).context['adminform'].form
+        dados = {
+            campo: valor for campo, valor in formulario.initial.items()
+            if campo in formulario.fields and valor is not None
+        }
+        dados.update(marca='Pelo Admin', especificacoes_tecnicas='{}', imagens_adicionais='[]')
+        
+        salvar = EquipamentoAdmin.save_model
+        
+        def movimento_durante_o_save(admin, request, obj, form, change):
+            estoque.registrar(obj.id, 'compra', 4)
+            estoque.atualizar_projecoes([obj.id])
+            salvar(admin, request, obj, form, change)
+        
+        antes = Equipamento.objects.get(pk=self.equipamento.pk)
+        with mock.patch.object(EquipamentoAdmin, 'save_model', movimento_durante_o_save):
+            resposta = self.client.post(url, dados)
+        self.assertEqual(resposta.status_code, 302)
+        equipamento = Equipamento.objects.get(pk=self.equipamento.pk)
+        self.assertEqual(equipamento.marca, 'Pelo Admin')
+        self.assertEqual(equipamento.quantidade_total, antes.quantidade_total + 4)
+        self.assertEqual(equipamento.quantidade_disponivel, antes.quantidade_disponivel + 4)
+    
+    def test_mutacoes_do_orcamento_conferem_a_versao(self):
+        self.client.force_authenticate(self.cliente)
+        etag = self.client.get(reverse('orcamento-detail', args=[self.orcamento.pk]))['ETag']
+        Orcamento.objects.filter(pk=self.orcamento.pk).update(observacoes='Outra aba')
+        self.orcamento.refresh_from_db()
+        self.orcamento.save()
+        
+        url = reverse('orcamento-finalizar', args=[self.orcamento.pk])
+        self.assertEqual(self.client.post(url, HTTP_IF_MATCH=etag).status_code, 412)
+        resposta = self.client.post(url, HTTP_IF_MATCH=f'"{self.orcamento.versao}"')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['status'], 'finalizado')
+
+
+@override_settings(ORCAMENTO_RASCUNHO_EXPIRACAO_DIAS=30)
+class ExpiracaoRascunhosTests(TestCase):
+    def setUp(self):
+        self.cliente, self.orcamento_grande = popular(5)
+    
+    def test_apaga_so_rascunhos_expirados_em_lotes(self):
+        antigo = timezone.now() - timedelta(days=31)
+        Orcamento.objects.exclude(pk=self.orcamento_grande.pk).update(data_atualizacao=antigo)
+        finalizado = Orcamento.objects.exclude(pk=self.orcamento_grande.pk).first()
+        Orcamento.objects.filter(pk=finalizado.pk).update(status='finalizado')
+        antes = registro.contadores.get('orcamentos_rascunho_purgados_total', [0])[0]
+        
+        self.assertEqual(purgar_rascunhos(lote=2), {'orcamentos': 4, 'itens': 4})
+        self.assertEqual(
+            set(Orcamento.objects.values_list('id', flat=True)), {self.orcamento_grande.pk, finalizado.pk}
+        )
+        self.assertEqual(self.orcamento_grande.itens.count(), 5)
+        self.assertEqual(registro.contadores['orcamentos_rascunho_purgados_total'][0], antes + 4)
+        self.assertEqual(purgar_rascunhos(), {'orcamentos': 0, 'itens': 0})
+
+
+@override_settings(ARQUIVAMENTO_DIAS=365)
+class ArquivamentoTests(APITestCase):
+    def setUp(self):
+        self.cliente, self.orcamento_grande = popular(4)
+        antigo = date.today() - timedelta(days=400)
+        reservas = list(Reserva.objects.order_by('id'))
+        for reserva, status in zip(reservas, ['concluida', 'cancelada', 'pendente', 'concluida']):
+            Reserva.objects.filter(pk=reserva.pk).update(status=status, data_uso=antigo)
+        Reserva.objects.filter(pk=reservas[3].pk).update(data_uso=date.today())
+        self.arquivada = reservas[0]
+        MovimentoEstoque.objects.create(
+            equipamento=Equipamento.objects.first(), reserva=self.arquivada, tipo='liberacao', quantidade=1
+        )
+        Orcamento.objects.update(status='convertido', data_atualizacao=timezone.now() - timedelta(days=400))
+        Orcamento.objects.filter(pk=self.orcamento_grande.pk).update(status='cancelado')
+        self.admin = Cliente.objects.create(
+            username='admin@example.com', email='admin@example.com', nome_completo='Admin',
+            cpf_cnpj='999.999.999-99', is_staff=True,
+        )
+    
+    def relatorio(self):
+        self.client.force_authenticate(self.admin)
+        resposta = self.client.get(reverse('relatorio-mensal'))
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+    
+    def test_arquiva_em_lotes_sem_alterar_os_relatorios(self):
+        antes = self.relatorio()
+        
+        # Os orçamentos das duas reservas arquivadas e o orçamento grande (sem reservas)
+        self.assertEqual(arquivar(lote=1), {'reservas': 2, 'orcamentos': 3})
+        self.assertEqual(Reserva.objects.count(), 2)
+        self.assertEqual(Orcamento.objects.count(), 2)
+        self.assertFalse(ItemReserva.objects.filter(reserva_id=self.arquivada.pk).exists())
+        self.assertEqual(MovimentoEstoque.objects.get(reserva__isnull=False).reserva_id, self.arquivada.pk)
+        
+        self.assertEqual(self.relatorio(), antes)
+        self.assertEqual(arquivar(), {'reservas': 0, 'orcamentos': 0})
+    
+    def test_detalhe_arquivado_continua_disponivel_para_o_cliente(self):
+        self.client.force_authenticate(self.cliente)
+        esperado = self.client.get(reverse('reserva-detail', args=[self.arquivada.pk])).json()
+        arquivar()
+        self.assertTrue(ReservaArquivada.objects.filter(pk=self.arquivada.pk).exists())
+        
+        resposta = self.client.get(reverse('reserva-detail', args=[self.arquivada.pk]))
+        self.assertEqual(resposta['Arquivado'], 'true')
+        self.assertEqual(resposta.json(), esperado)
+        resposta = self.client.get(reverse('orcamento-detail', args=[self.orcamento_grande.pk]), {'fields': 'id,status'})
+        self.assertEqual(resposta.json(), {'id': self.orcamento_grande.pk, 'status': 'cancelado'})
+        listadas = self.client.get(reverse('reserva-list')).json()['results']
+        self.assertNotIn(self.arquivada.pk, [linha['id'] for linha in listadas])
+        
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(reverse('reserva-detail', args=[self.arquivada.pk])).status_code, 404)
+
+
+class AdminListagensTests(TestCase):
+    LISTAGENS = [
+        'admin:equipamentos_orcamento_changelist', 'admin:equipamentos_reserva_changelist',
+        'admin:equipamentos_itemorcamento_changelist', 'admin:equipamentos_itemreserva_changelist',
+    ]
+    
+    def setUp(self):
+        self.client.force_login(Cliente.objects.create(
+            username='admin@example.com', email='admin@example.com', nome_completo='Admin',
+            cpf_cnpj='999.999.999-99', is_staff=True, is_superuser=True,
+        ))
+    
+    def popular(self, linhas):
+        Cliente.objects.filter(is_superuser=False).delete()
+        Equipamento.objects.all().delete()
+        Categoria.objects.all().delete()
+        cliente, _ = popular(linhas)
+        equipamento = Equipamento.objects.first()
+        ItemReserva.objects.bulk_create([
+            ItemReserva(
+                reserva=reserva, equipamento=equipamento, quantidade=1, periodo=1,
+                valor_unitario=Decimal('10.00'), valor_total=Decimal('10.00'),
+            )
+            for reserva in Reserva.objects.filter(cliente=cliente)
+        ])
+    
+    def queries(self, nome):
+        with CaptureQueriesContext(connection) as capturadas:
+            resposta = self.client.get(reverse(nome))
+        self.assertEqual(resposta.status_code, 200)
+        return len(capturadas)
+    
+    def test_listagens_com_numero_fixo_de_queries(self):
+        self.popular(2)
+        poucas = {nome: self.queries(nome) for nome in self.LISTAGENS}
+        self.popular(12)
+        self.assertEqual({nome: self.queries(nome) for nome in self.LISTAGENS}, poucas)
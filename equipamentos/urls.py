@@ -8,6 +8,7 @@ urlpatterns = [
     
     # Equipamentos
     path('equipamentos/', views.EquipamentoListView.as_view(), name='equipamento-list'),
+    path('equipamentos/autocompletar/', views.autocompletar_equipamentos, name='equipamento-autocompletar'),
     path('equipamentos/<int:pk>/', views.EquipamentoDetailView.as_view(), name='equipamento-detail'),
     path('equipamentos/criar/', views.EquipamentoCreateView.as_view(), name='equipamento-create'),
     path('equipamentos/<int:pk>/editar/', views.EquipamentoUpdateView.as_view(), name='equipamento-update'),
@@ -30,5 +31,6 @@ urlpatterns = [
     path('admin/reservas/', views.ReservaAdminListView.as_view(), name='reserva-admin-list'),
     path('admin/reservas/<int:reserva_id>/aprovar/', views.aprovar_reserva, name='reserva-aprovar'),
     path('admin/reservas/<int:reserva_id>/rejeitar/', views.rejeitar_reserva, name='reserva-rejeitar'),
+    path('admin/relatorios/mensal/', views.relatorio_mensal, name='relatorio-mensal'),
 ]
 
@@ -0,0 +1,69 @@
+import re
+import unicodedata
+
+
+_NUMERO_RE = re.compile(r'^\s*([-+]?\d+(?:[.,]\d+)?)')
+_NUMERO_COMPLETO_RE = re.compile(r'^\s*([-+]?\d+(?:[.,]\d+)?)\s*$')
+
+
+def normalizar_texto(valor):
+    """Remove acentos e converte para minúsculas (ex: 'Potência' -> 'potencia')"""
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return texto.strip().lower()
+
+
+def extrair_numero(valor):
+    """
+    Extrai o número inicial de um valor (ex: '1000W' -> 1000.0, '1,5 kg' -> 1.5).
+    Retorna None quando o valor não começa com um número.
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    match = _NUMERO_RE.match(str(valor))
+    if not match:
+        return None
+    return float(match.group(1).replace(',', '.'))
+
+
+def converter_numero(valor):
+    """
+    Converte o valor inteiro em número (ex: '16' -> 16.0, '1,5' -> 1.5).
+    Retorna None quando há qualquer texto além do número (ex: '2x15 polegadas').
+    """
+    match = _NUMERO_COMPLETO_RE.match(str(valor))
+    if not match:
+        return None
+    return float(match.group(1).replace(',', '.'))
+
+
+def achatar_especificacoes(especificacoes):
+    """
+    Converte o JSON de especificações técnicas em tuplas
+    (chave, valor_texto, valor_numerico) já normalizadas para indexação.
+    
+    Objetos aninhados viram chaves compostas (ex: "entrada.canais") e listas
+    geram uma tupla por elemento.
+    """
+    if not isinstance(especificacoes, dict):
+        return []
+    
+    linhas = []
+    pendentes = list(especificacoes.items())
+    while pendentes:
+        chave, valor = pendentes.pop(0)
+        if isinstance(valor, dict):
+            pendentes.extend((f"{chave}.{k}", v) for k, v in valor.items())
+            continue
+        valores = valor if isinstance(valor, list) else [valor]
+        for item in valores:
+            if item is None or isinstance(item, (dict, list)):
+                continue
+            linhas.append((
+                normalizar_texto(chave)[:100],
+                normalizar_texto(item)[:255],
+                extrair_numero(item),
+            ))
+    return linhas
@@ -5,7 +5,11 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from .models import Categoria, Equipamento, Orcamento, ItemOrcamento, Reserva, ItemReserva
+from django.db.models import Count, Case, When, Value, BooleanField, CharField, Prefetch
+from django.utils import timezone
+from .models import (
+    Categoria, Equipamento, Orcamento, ItemOrcamento, Reserva, ItemReserva, OrcamentoArquivado, ReservaArquivada
+)
 from .serializers import (
     CategoriaSerializer, EquipamentoSerializer, EquipamentoCreateSerializer,
     EquipamentoListSerializer, OrcamentoSerializer, OrcamentoListSerializer,
@@ -13,6 +17,30 @@ from .serializers import (
     ReservaSerializer, ReservaListSerializer, ReservaCreateSerializer,
     ItemReservaSerializer
 )
+from .filters import EspecificacaoFilterBackend
+from .catalogo import obter_ou_calcular
+from .estoque import saldo_atual
+from .autocomplete import indice_equipamentos
+from .projecoes import Projecao, ListaProjetadaMixin, CamposEsparsosMixin
+from .arquivamento import LeituraArquivoMixin
+from .relatorios import resumo_mensal
+from backend.concorrencia import (
+    ConflitoVersao, VersaoDesatualizada, VersaoMixin, com_etag, resposta_conflito, verificar_if_match
+)
+from backend.limite_queries import limite_queries
+from idempotencia.chaves import IdempotenteMixin, idempotente
+
+
+# Equivalente em SQL da property Equipamento.disponivel
+DISPONIVEL = Case(
+    When(estado='disponivel', quantidade_disponivel__gt=0, then=Value(True)),
+    default=Value(False),
+    output_field=BooleanField()
+)
+
+# Itens com o equipamento já carregado (evita uma query por item nos serializers aninhados)
+ITENS_ORCAMENTO = Prefetch('itens', queryset=ItemOrcamento.objects.select_related('equipamento'))
+ITENS_RESERVA = Prefetch('itens', queryset=ItemReserva.objects.select_related('equipamento'))
 
 
 # Views para Categorias
@@ -20,6 +48,7 @@ class CategoriaListCreateView(generics.ListCreateAPIView):
     queryset = Categoria.objects.filter(ativo=True)
     serializer_class = CategoriaSerializer
     permission_classes = [IsAuthenticated]
+    limite_queries = 3
     
     def get_permissions(self):
         """Apenas admins podem criar categorias"""
@@ -32,15 +61,25 @@ class CategoriaDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     permission_classes = [IsAdminUser]
+    limite_queries = 6
 
 
 # Views para Equipamentos
-class EquipamentoListView(generics.ListAPIView):
+class EquipamentoListView(ListaProjetadaMixin, generics.ListAPIView):
     """Lista equipamentos com filtros"""
     queryset = Equipamento.objects.select_related('categoria').all()
     serializer_class = EquipamentoListSerializer
+    projecao = Projecao(EquipamentoListSerializer, {
+        'categoria_nome': 'categoria__nome',
+        'disponivel': DISPONIVEL,
+    })
+    dependencias_campos = {'disponivel': ['estado', 'quantidade_disponivel']}
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    limite_queries = 4
+    filter_backends = [
+        DjangoFilterBackend, EspecificacaoFilterBackend,
+        filters.SearchFilter, filters.OrderingFilter
+    ]
     filterset_fields = ['categoria', 'estado', 'marca']
     search_fields = ['nome', 'marca', 'modelo', 'descricao']
     ordering_fields = ['nome', 'valor_diaria', 'data_cadastro']
@@ -74,13 +113,100 @@ class EquipamentoListView(generics.ListAPIView):
                 pass
         
         return queryset
+    
+    # Faixas de preço (valor da diária) usadas nas facetas: (rótulo, mínimo, máximo)
+    faixas_preco = [
+        ('ate_100', None, 100),
+        ('100_300', 100, 300),
+        ('300_1000', 300, 1000),
+        ('acima_1000', 1000, None),
+    ]
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        
+        facets = request.query_params.get('facets', '')
+        if facets.lower() in ['true', '1'] and isinstance(response.data, dict):
+            params = {
+                chave: valor for chave, valor in request.query_params.items()
+                if chave not in ['page', 'page_size', 'ordering', 'facets', 'fields', 'exclude']
+            }
+            response.data['facets'] = obter_ou_calcular(
+                'facets', params, lambda: self.get_facets(self.filter_queryset(self.get_queryset()))
+            )
+        
+        return response
+    
+    def get_facets(self, queryset):
+        """
+        Contagens por categoria, marca, estado, disponibilidade e faixa de preço
+        calculadas em uma única agregação agrupada sobre os filtros atuais
+        """
+        faixas_when = []
+        for rotulo, minimo, maximo in self.faixas_preco:
+            condicoes = {}
+            if minimo is not None:
+                condicoes['valor_diaria__gte'] = minimo
+            if maximo is not None:
+                condicoes['valor_diaria__lt'] = maximo
+            faixas_when.append(When(**condicoes, then=Value(rotulo)))
+        
+        faixa = Case(*faixas_when, output_field=CharField())
+        grupos = (
+            queryset.order_by()
+            .annotate(faixa_preco=faixa, disponivel_facet=DISPONIVEL)
+            .values('categoria', 'categoria__nome', 'marca', 'estado', 'disponivel_facet', 'faixa_preco')
+            .annotate(total=Count('id'))
+        )
+        
+        categorias = {}
+        marcas = {}
+        estados = {}
+        disponibilidade = {'true': 0, 'false': 0}
+        faixas = {rotulo: 0 for rotulo, _, _ in self.faixas_preco}
+        
+        for grupo in grupos:
+            total = grupo['total']
+            categoria = categorias.setdefault(grupo['categoria'], {
+                'id': grupo['categoria'], 'nome': grupo['categoria__nome'], 'total': 0
+            })
+            categoria['total'] += total
+            marcas[grupo['marca']] = marcas.get(grupo['marca'], 0) + total
+            estados[grupo['estado']] = estados.get(grupo['estado'], 0) + total
+            disponibilidade['true' if grupo['disponivel_facet'] else 'false'] += total
+            if grupo['faixa_preco']:
+                faixas[grupo['faixa_preco']] += total
+        
+        return {
+            'categoria': sorted(categorias.values(), key=lambda c: c['nome']),
+            'marca': [{'valor': marca, 'total': total} for marca, total in sorted(marcas.items())],
+            'estado': [{'valor': estado, 'total': total} for estado, total in sorted(estados.items())],
+            'disponivel': disponibilidade,
+            'faixa_preco': [{'valor': rotulo, 'total': total} for rotulo, total in faixas.items()],
+        }
+
+
+@limite_queries(2)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autocompletar_equipamentos(request):
+    """Sugestões de equipamentos por prefixo de nome, marca ou modelo"""
+    termo = request.query_params.get('q', '')
+    try:
+        limite = min(max(int(request.query_params.get('limite', 10)), 1), 50)
+    except ValueError:
+        limite = 10
+    
+    return Response(indice_equipamentos.buscar(termo, limite))
 
 
-class EquipamentoDetailView(generics.RetrieveAPIView):
+class EquipamentoDetailView(VersaoMixin, CamposEsparsosMixin, generics.RetrieveAPIView):
     """Detalhes de um equipamento específico"""
     queryset = Equipamento.objects.select_related('categoria').all()
     serializer_class = EquipamentoSerializer
+    dependencias_campos = {'disponivel': ['estado', 'quantidade_disponivel']}
     permission_classes = [IsAuthenticated]
+    limite_queries = 2
 
 
 class EquipamentoCreateView(generics.CreateAPIView):
@@ -88,19 +214,22 @@ class EquipamentoCreateView(generics.CreateAPIView):
     queryset = Equipamento.objects.all()
     serializer_class = EquipamentoCreateSerializer
     permission_classes = [IsAdminUser]
+    limite_queries = 5
 
 
-class EquipamentoUpdateView(generics.UpdateAPIView):
-    """Atualizar equipamento (apenas admins)"""
+class EquipamentoUpdateView(VersaoMixin, generics.UpdateAPIView):
+    """Atualizar equipamento (apenas admins; If-Match com o ETag evita sobrescrever outra edição)"""
     queryset = Equipamento.objects.all()
     serializer_class = EquipamentoCreateSerializer
     permission_classes = [IsAdminUser]
+    limite_queries = 6
 
 
 class EquipamentoDeleteView(generics.DestroyAPIView):
     """Remover equipamento (apenas admins)"""
     queryset = Equipamento.objects.all()
     permission_classes = [IsAdminUser]
+    limite_queries = 9
     
     def destroy(self, request, *args, **kwargs):
         equipamento = self.get_object()
@@ -121,40 +250,54 @@ class EquipamentoDeleteView(generics.DestroyAPIView):
 
 
 # Views para Orçamentos
-class OrcamentoListView(generics.ListAPIView):
+class OrcamentoListView(ListaProjetadaMixin, generics.ListAPIView):
     """Lista orçamentos do cliente autenticado"""
     serializer_class = OrcamentoListSerializer
+    projecao = Projecao(OrcamentoListSerializer, {
+        'cliente_nome': 'cliente__nome_completo',
+        'total_itens': Count('itens'),
+    })
     permission_classes = [IsAuthenticated]
+    limite_queries = 3
     ordering = ['-data_criacao']
     
     def get_queryset(self):
         return Orcamento.objects.filter(cliente=self.request.user)
 
 
-class OrcamentoDetailView(generics.RetrieveAPIView):
-    """Detalhes de um orçamento específico"""
+class OrcamentoDetailView(LeituraArquivoMixin, VersaoMixin, CamposEsparsosMixin, generics.RetrieveAPIView):
+    """Detalhes de um orçamento específico (inclusive arquivado)"""
     serializer_class = OrcamentoSerializer
+    modelo_arquivo = OrcamentoArquivado
     permission_classes = [IsAuthenticated]
+    limite_queries = 4
     
     def get_queryset(self):
-        return Orcamento.objects.filter(cliente=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            # Geração do esquema OpenAPI (backend/esquema.py), com requisição anônima
+            return Orcamento.objects.none()
+        return Orcamento.objects.filter(cliente=self.request.user).prefetch_related(ITENS_ORCAMENTO)
 
 
-class OrcamentoCreateView(generics.CreateAPIView):
+class OrcamentoCreateView(IdempotenteMixin, VersaoMixin, generics.CreateAPIView):
     """Criar novo orçamento"""
     serializer_class = OrcamentoSerializer
     permission_classes = [IsAuthenticated]
+    limite_queries = 3
     
     def perform_create(self, serializer):
-        serializer.save(cliente=self.request.user)
+        self.instancia_versionada = serializer.save(cliente=self.request.user)
 
 
+@limite_queries(8)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotente
 def adicionar_item_orcamento(request, orcamento_id):
     """Adicionar item ao orçamento"""
     try:
         orcamento = get_object_or_404(Orcamento, id=orcamento_id, cliente=request.user)
+        verificar_if_match(request, orcamento)
         
         if orcamento.status != 'rascunho':
             return Response(
@@ -172,11 +315,15 @@ def adicionar_item_orcamento(request, orcamento_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            serializer.save(orcamento=orcamento)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # O item só fica se o total do orçamento for gravado sobre a versão lida
+            with transaction.atomic():
+                serializer.save(orcamento=orcamento)
+            return com_etag(Response(serializer.data, status=status.HTTP_201_CREATED), orcamento)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    except (ConflitoVersao, VersaoDesatualizada):
+        return resposta_conflito()
     except Exception as e:
         return Response(
             {'error': 'Erro interno do servidor.'},
@@ -184,12 +331,14 @@ def adicionar_item_orcamento(request, orcamento_id):
         )
 
 
+@limite_queries(7)
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def remover_item_orcamento(request, orcamento_id, item_id):
     """Remover item do orçamento"""
     try:
         orcamento = get_object_or_404(Orcamento, id=orcamento_id, cliente=request.user)
+        verificar_if_match(request, orcamento)
         
         if orcamento.status != 'rascunho':
             return Response(
@@ -198,10 +347,14 @@ def remover_item_orcamento(request, orcamento_id, item_id):
             )
         
         item = get_object_or_404(ItemOrcamento, id=item_id, orcamento=orcamento)
-        item.delete()
+        with transaction.atomic():
+            item.delete()
+            orcamento.calcular_total()
         
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return com_etag(Response(status=status.HTTP_204_NO_CONTENT), orcamento)
     
+    except (ConflitoVersao, VersaoDesatualizada):
+        return resposta_conflito()
     except Exception as e:
         return Response(
             {'error': 'Erro interno do servidor.'},
@@ -209,12 +362,16 @@ def remover_item_orcamento(request, orcamento_id, item_id):
         )
 
 
+@limite_queries(5)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def finalizar_orcamento(request, orcamento_id):
     """Finalizar orçamento"""
     try:
-        orcamento = get_object_or_404(Orcamento, id=orcamento_id, cliente=request.user)
+        orcamento = get_object_or_404(
+            Orcamento.objects.prefetch_related(ITENS_ORCAMENTO), id=orcamento_id, cliente=request.user
+        )
+        verificar_if_match(request, orcamento)
         
         if orcamento.status != 'rascunho':
             return Response(
@@ -232,8 +389,10 @@ def finalizar_orcamento(request, orcamento_id):
         orcamento.save()
         
         serializer = OrcamentoSerializer(orcamento)
-        return Response(serializer.data)
+        return com_etag(Response(serializer.data), orcamento)
     
+    except (ConflitoVersao, VersaoDesatualizada):
+        return resposta_conflito()
     except Exception as e:
         return Response(
             {'error': 'Erro interno do servidor.'},
@@ -242,32 +401,44 @@ def finalizar_orcamento(request, orcamento_id):
 
 
 # Views para Reservas
-class ReservaListView(generics.ListAPIView):
+class ReservaListView(ListaProjetadaMixin, generics.ListAPIView):
     """Lista reservas do cliente autenticado"""
     serializer_class = ReservaListSerializer
+    projecao = Projecao(ReservaListSerializer, {
+        'cliente_nome': 'cliente__nome_completo',
+        'total_itens': Count('itens'),
+    })
     permission_classes = [IsAuthenticated]
+    limite_queries = 3
     ordering = ['-data_criacao']
     
     def get_queryset(self):
         return Reserva.objects.filter(cliente=self.request.user)
 
 
-class ReservaDetailView(generics.RetrieveAPIView):
-    """Detalhes de uma reserva específica"""
+class ReservaDetailView(LeituraArquivoMixin, CamposEsparsosMixin, generics.RetrieveAPIView):
+    """Detalhes de uma reserva específica (inclusive arquivada)"""
     serializer_class = ReservaSerializer
+    modelo_arquivo = ReservaArquivada
     permission_classes = [IsAuthenticated]
+    limite_queries = 4
     
     def get_queryset(self):
-        return Reserva.objects.filter(cliente=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return Reserva.objects.none()
+        return Reserva.objects.filter(cliente=self.request.user).prefetch_related(ITENS_RESERVA)
 
 
+@limite_queries(13)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotente
 def criar_reserva_do_orcamento(request, orcamento_id):
     """Criar reserva a partir de um orçamento"""
     try:
         with transaction.atomic():
             orcamento = get_object_or_404(Orcamento, id=orcamento_id, cliente=request.user)
+            verificar_if_match(request, orcamento)
             
             if orcamento.status != 'finalizado':
                 return Response(
@@ -275,7 +446,8 @@ def criar_reserva_do_orcamento(request, orcamento_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            if not orcamento.itens.exists():
+            itens = list(orcamento.itens.select_related('equipamento'))
+            if not itens:
                 return Response(
                     {'error': 'Orçamento não possui itens.'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -286,9 +458,10 @@ def criar_reserva_do_orcamento(request, orcamento_id):
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
-            # Verificar disponibilidade final dos equipamentos
-            for item in orcamento.itens.all():
-                if item.quantidade > item.equipamento.quantidade_disponivel:
+            # Verificar disponibilidade final pelo livro (quantidade_disponivel é só a projeção das listagens)
+            saldos = saldo_atual({item.equipamento_id for item in itens})
+            for item in itens:
+                if item.quantidade > saldos[item.equipamento_id]:
                     return Response(
                         {'error': f'Equipamento {item.equipamento.nome} não possui quantidade suficiente disponível.'},
                         status=status.HTTP_400_BAD_REQUEST
@@ -299,14 +472,17 @@ def criar_reserva_do_orcamento(request, orcamento_id):
                 cliente=request.user,
                 orcamento=orcamento,
                 data_uso=serializer.validated_data['data_uso'],
+                data_fim=Reserva.calcular_data_fim(
+                    serializer.validated_data['data_uso'], [(item.modalidade, item.periodo) for item in itens]
+                ),
                 local_evento=serializer.validated_data['local_evento'],
                 observacoes=serializer.validated_data.get('observacoes', ''),
                 valor_total=orcamento.valor_total
             )
             
             # Criar itens da reserva
-            for item_orcamento in orcamento.itens.all():
-                ItemReserva.objects.create(
+            ItemReserva.objects.bulk_create([
+                ItemReserva(
                     reserva=reserva,
                     equipamento=item_orcamento.equipamento,
                     quantidade=item_orcamento.quantidade,
@@ -315,14 +491,19 @@ def criar_reserva_do_orcamento(request, orcamento_id):
                     valor_unitario=item_orcamento.valor_unitario,
                     valor_total=item_orcamento.valor_total
                 )
+                for item_orcamento in itens
+            ])
             
-            # Marcar orçamento como convertido
+            # Marcar orçamento como convertido (conflito de versão desfaz a reserva: evita duas conversões)
             orcamento.status = 'convertido'
             orcamento.save()
             
+            reserva = Reserva.objects.prefetch_related(ITENS_RESERVA).get(pk=reserva.pk)
             serializer = ReservaSerializer(reserva)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    except (ConflitoVersao, VersaoDesatualizada):
+        return resposta_conflito()
     except Exception as e:
         return Response(
             {'error': 'Erro interno do servidor.'},
@@ -331,22 +512,25 @@ def criar_reserva_do_orcamento(request, orcamento_id):
 
 
 # Views administrativas
-class ReservaAdminListView(generics.ListAPIView):
+class ReservaAdminListView(ListaProjetadaMixin, generics.ListAPIView):
     """Lista todas as reservas (apenas admins)"""
     queryset = Reserva.objects.all()
     serializer_class = ReservaListSerializer
+    projecao = ReservaListView.projecao
     permission_classes = [IsAdminUser]
+    limite_queries = 3
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'data_uso']
     ordering = ['-data_criacao']
 
 
+@limite_queries(5)
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def aprovar_reserva(request, reserva_id):
     """Aprovar reserva (apenas admins)"""
     try:
-        reserva = get_object_or_404(Reserva, id=reserva_id)
+        reserva = get_object_or_404(Reserva.objects.prefetch_related(ITENS_RESERVA), id=reserva_id)
         
         if reserva.status != 'pendente':
             return Response(
@@ -369,12 +553,13 @@ def aprovar_reserva(request, reserva_id):
         )
 
 
+@limite_queries(5)
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def rejeitar_reserva(request, reserva_id):
     """Rejeitar reserva (apenas admins)"""
     try:
-        reserva = get_object_or_404(Reserva, id=reserva_id)
+        reserva = get_object_or_404(Reserva.objects.prefetch_related(ITENS_RESERVA), id=reserva_id)
         
         if reserva.status != 'pendente':
             return Response(
@@ -394,3 +579,14 @@ def rejeitar_reserva(request, reserva_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+@limite_queries(4)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def relatorio_mensal(request):
+    """Quantidade e valor de reservas e orçamentos por mês e status, incluindo os arquivados (apenas admins)"""
+    ano = request.query_params.get('ano')
+    if ano is not None and not ano.isdigit():
+        return Response({'error': 'Ano inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(resumo_mensal(int(ano) if ano else None))
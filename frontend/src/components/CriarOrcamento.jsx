@@ -150,7 +150,7 @@ const CriarOrcamento = () => {
         modalidade: itemForm.modalidade,
         periodo: parseInt(itemForm.periodo),
         data_uso: itemForm.data_uso
-      });
+      }, orcamento.versao);
 
       // Recarregar orçamento
       const orcamentoAtualizado = await orcamentoService.obter(orcamento.id);
@@ -168,7 +168,9 @@ const CriarOrcamento = () => {
 
     } catch (error) {
       console.error('Erro ao adicionar item:', error);
-      if (error.response?.data?.error) {
+      if (error.response?.status === 412) {
+        await recarregarAposConflito();
+      } else if (error.response?.data?.error) {
         setErrors({ general: error.response.data.error });
       } else {
         setErrors({ general: 'Erro ao adicionar item ao orçamento' });
@@ -178,6 +180,13 @@ const CriarOrcamento = () => {
     }
   };
 
+  // Outra aba (ou um clique duplo) alterou o orçamento: mostra a versão atual em vez de sobrescrevê-la
+  const recarregarAposConflito = async () => {
+    const orcamentoAtualizado = await orcamentoService.obter(orcamento.id);
+    setOrcamento(orcamentoAtualizado);
+    setErrors({ general: 'O orçamento foi alterado em outra janela. Confira os itens e tente novamente.' });
+  };
+
   const removerItem = async (itemId) => {
     if (!window.confirm('Tem certeza de que deseja remover este item?')) {
       return;
@@ -185,14 +194,18 @@ const CriarOrcamento = () => {
 
     try {
       setLoading(true);
-      await orcamentoService.removerItem(orcamento.id, itemId);
+      await orcamentoService.removerItem(orcamento.id, itemId, orcamento.versao);
       
       // Recarregar orçamento
       const orcamentoAtualizado = await orcamentoService.obter(orcamento.id);
       setOrcamento(orcamentoAtualizado);
     } catch (error) {
       console.error('Erro ao remover item:', error);
-      setErrors({ general: 'Erro ao remover item do orçamento' });
+      if (error.response?.status === 412) {
+        await recarregarAposConflito();
+      } else {
+        setErrors({ general: 'Erro ao remover item do orçamento' });
+      }
     } finally {
       setLoading(false);
     }
@@ -206,14 +219,18 @@ const CriarOrcamento = () => {
 
     try {
       setLoading(true);
-      await orcamentoService.finalizar(orcamento.id);
+      await orcamentoService.finalizar(orcamento.id, orcamento.versao);
       
       navigate('/orcamentos', {
         state: { message: 'Orçamento finalizado com sucesso!' }
       });
     } catch (error) {
       console.error('Erro ao finalizar orçamento:', error);
-      setErrors({ general: error.response?.data?.error || 'Erro ao finalizar orçamento' });
+      if (error.response?.status === 412) {
+        await recarregarAposConflito();
+      } else {
+        setErrors({ general: error.response?.data?.error || 'Erro ao finalizar orçamento' });
+      }
     } finally {
       setLoading(false);
     }
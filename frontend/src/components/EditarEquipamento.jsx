@@ -50,6 +50,7 @@ const EditarEquipamento = () => {
 
   const [especificacoes, setEspecificacoes] = useState([{ chave: '', valor: '' }]);
   const [imagensAdicionais, setImagensAdicionais] = useState(['']);
+  const [versao, setVersao] = useState(null);
 
   useEffect(() => {
     if (!user?.is_staff) {
@@ -73,6 +74,7 @@ const EditarEquipamento = () => {
     try {
       setLoading(true);
       const data = await equipamentoService.obter(id);
+      setVersao(data.versao);
       setFormData({
         nome: data.nome || '',
         categoria: data.categoria ? data.categoria.toString() : '',
@@ -224,7 +226,7 @@ const EditarEquipamento = () => {
         quantidade_disponivel: parseInt(formData.quantidade_disponivel)
       };
 
-      await equipamentoService.atualizar(id, equipamentoData);
+      await equipamentoService.atualizar(id, equipamentoData, versao);
       
       navigate('/equipamentos', {
         state: { message: 'Equipamento atualizado com sucesso!' }
@@ -232,7 +234,9 @@ const EditarEquipamento = () => {
     } catch (error) {
       console.error('Erro ao atualizar equipamento:', error);
       
-      if (error.response?.data) {
+      if (error.response?.status === 412) {
+        setErrors({ general: 'Este equipamento foi alterado por outra pessoa. Recarregue a página para ver a versão atual.' });
+      } else if (error.response?.data) {
         setErrors(error.response.data);
       } else {
         setErrors({ general: 'Erro ao atualizar equipamento. Tente novamente.' });
@@ -66,7 +66,7 @@ const OrcamentoDetalhes = () => {
   const finalizarOrcamento = async () => {
     try {
       setLoadingAction(true);
-      await orcamentoService.finalizar(id);
+      await orcamentoService.finalizar(id, orcamento?.versao);
       await loadOrcamento(); // Recarregar para atualizar status
     } catch (error) {
       console.error('Erro ao finalizar orçamento:', error);
@@ -89,7 +89,7 @@ const OrcamentoDetalhes = () => {
 
     try {
       setLoadingAction(true);
-      await orcamentoService.criarReserva(id, reservaForm);
+      await orcamentoService.criarReserva(id, reservaForm, orcamento?.versao);
       
       navigate('/reservas', {
         state: { message: 'Reserva criada com sucesso!' }
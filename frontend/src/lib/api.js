@@ -61,6 +61,15 @@ api.interceptors.response.use(
   }
 );
 
+// If-Match com a versão lida: o servidor responde 412 se o registro mudou desde então
+const comVersao = (versao) => (versao ? { headers: { 'If-Match': `"${versao}"` } } : {});
+
+// Idempotency-Key: repetições da mesma requisição (ex: renovação do token) não criam registros em dobro
+const comIdempotencia = (config = {}) => ({
+  ...config,
+  headers: { ...config.headers, 'Idempotency-Key': crypto.randomUUID() },
+});
+
 // Serviços de autenticação
 export const authService = {
   login: async (email, password) => {
@@ -97,6 +106,11 @@ export const equipamentoService = {
     return response.data;
   },
 
+  autocompletar: async (q, limite = 10) => {
+    const response = await api.get('/api/equipamentos/equipamentos/autocompletar/', { params: { q, limite } });
+    return response.data;
+  },
+
   obter: async (id) => {
     const response = await api.get(`/api/equipamentos/equipamentos/${id}/`);
     return response.data;
@@ -107,8 +121,8 @@ export const equipamentoService = {
     return response.data;
   },
 
-  atualizar: async (id, equipamentoData) => {
-    const response = await api.put(`/api/equipamentos/equipamentos/${id}/editar/`, equipamentoData);
+  atualizar: async (id, equipamentoData, versao) => {
+    const response = await api.put(`/api/equipamentos/equipamentos/${id}/editar/`, equipamentoData, comVersao(versao));
     return response.data;
   },
 
@@ -141,27 +155,27 @@ export const orcamentoService = {
   },
 
   criar: async (orcamentoData = {}) => {
-    const response = await api.post('/api/equipamentos/orcamentos/criar/', orcamentoData);
+    const response = await api.post('/api/equipamentos/orcamentos/criar/', orcamentoData, comIdempotencia());
     return response.data;
   },
 
-  adicionarItem: async (orcamentoId, itemData) => {
-    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/adicionar-item/`, itemData);
+  adicionarItem: async (orcamentoId, itemData, versao) => {
+    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/adicionar-item/`, itemData, comIdempotencia(comVersao(versao)));
     return response.data;
   },
 
-  removerItem: async (orcamentoId, itemId) => {
-    const response = await api.delete(`/api/equipamentos/orcamentos/${orcamentoId}/remover-item/${itemId}/`);
+  removerItem: async (orcamentoId, itemId, versao) => {
+    const response = await api.delete(`/api/equipamentos/orcamentos/${orcamentoId}/remover-item/${itemId}/`, comVersao(versao));
     return response.data;
   },
 
-  finalizar: async (orcamentoId) => {
-    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/finalizar/`);
+  finalizar: async (orcamentoId, versao) => {
+    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/finalizar/`, undefined, comVersao(versao));
     return response.data;
   },
 
-  criarReserva: async (orcamentoId, reservaData) => {
-    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/criar-reserva/`, reservaData);
+  criarReserva: async (orcamentoId, reservaData, versao) => {
+    const response = await api.post(`/api/equipamentos/orcamentos/${orcamentoId}/criar-reserva/`, reservaData, comIdempotencia(comVersao(versao)));
     return response.data;
   },
 };
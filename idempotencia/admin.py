@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import RespostaIdempotente
+
+
+@admin.register(RespostaIdempotente)
+class RespostaIdempotenteAdmin(admin.ModelAdmin):
+    list_display = ['chave', 'usuario', 'status_http', 'data_criacao', 'expira_em']
+    list_filter = ['status_http']
+    list_select_related = ['usuario']
+    search_fields = ['chave', 'usuario__email']
+    readonly_fields = ['data_criacao']
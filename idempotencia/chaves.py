@@ -0,0 +1,124 @@
+"""
+Suporte ao cabeçalho Idempotency-Key nas requisições que criam registros.
+
+    @api_view(['POST'])
+    @permission_classes([IsAuthenticated])
+    @idempotente
+    def criar_reserva_do_orcamento(request, orcamento_id): ...
+
+O cliente gera uma chave por operação e a repete em cada nova tentativa. A
+primeira requisição com a chave executa a view e grava a resposta; as
+repetições (mesmo usuário, mesma chave, mesmo método/caminho/corpo) recebem a
+resposta gravada, com `Idempotent-Replayed: true`, sem executar nada. A mesma
+chave com outra requisição é recusada com 422.
+
+Reservar a chave, executar a view e gravar a resposta acontecem numa única
+transação. Uma repetição concorrente fica bloqueada no índice único
+(usuario, chave) no PostgreSQL, ou no BEGIN IMMEDIATE no SQLite, até a
+primeira terminar. Depois disso ela encontra a resposta gravada. Se a primeira
+falhar (5xx ou exceção), a transação é desfeita e a repetição executa
+normalmente.
+
+As respostas expiram depois de IDEMPOTENCIA_TTL segundos. Expiradas são
+substituídas ao reaparecer a chave e apagadas por `limpar_expiradas`.
+"""
+import hashlib
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import RespostaIdempotente
+
+
+CABECALHO = 'Idempotency-Key'
+
+# Cabeçalhos da resposta original que também são repetidos
+CABECALHOS_GRAVADOS = ['ETag', 'Location']
+
+LOTE_PADRAO = 1000
+
+
+def hash_requisicao(request):
+    conteudo = b'\n'.join([request.method.encode(), request.path.encode(), request.body])
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def repetir(gravada):
+    response = Response(gravada.corpo, status=gravada.status_http, headers=gravada.cabecalhos)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def executar(request, view, *args, **kwargs):
+    """Executa `view(request, *args, **kwargs)` no máximo uma vez por Idempotency-Key"""
+    chave = request.headers.get(CABECALHO)
+    if not chave or not request.user.is_authenticated:
+        return view(request, *args, **kwargs)
+    if len(chave) > 255:
+        return Response(
+            {'error': f'{CABECALHO} deve ter no máximo 255 caracteres.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    assinatura = hash_requisicao(request)
+    agora = timezone.now()
+    
+    with transaction.atomic():
+        RespostaIdempotente.objects.filter(usuario=request.user, chave=chave, expira_em__lte=agora).delete()
+        try:
+            with transaction.atomic():
+                registro = RespostaIdempotente.objects.create(
+                    usuario=request.user, chave=chave, hash_requisicao=assinatura,
+                    expira_em=agora + timedelta(seconds=getattr(settings, 'IDEMPOTENCIA_TTL', 86400)),
+                )
+        except IntegrityError:
+            gravada = RespostaIdempotente.objects.get(usuario=request.user, chave=chave)
+            if gravada.hash_requisicao != assinatura:
+                return Response(
+                    {'error': f'{CABECALHO} já usada com outra requisição.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            return repetir(gravada)
+        
+        response = view(request, *args, **kwargs)
+        if response.status_code >= 500:
+            # Nada fica gravado: a próxima tentativa executa de novo
+            transaction.set_rollback(True)
+            return response
+        
+        registro.status_http = response.status_code
+        registro.corpo = response.data
+        registro.cabecalhos = {nome: response[nome] for nome in CABECALHOS_GRAVADOS if response.has_header(nome)}
+        registro.save(update_fields=['status_http', 'corpo', 'cabecalhos'])
+    
+    return response
+
+
+def idempotente(view):
+    """Decorador para views de função (abaixo de @api_view, recebe o Request do DRF)"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return executar(request, view, *args, **kwargs)
+    return wrapper
+
+
+class IdempotenteMixin:
+    """Para views genéricas: aplica o Idempotency-Key ao POST"""
+    def post(self, request, *args, **kwargs):
+        return executar(request, super().post, *args, **kwargs)
+
+
+def limpar_expiradas(lote=LOTE_PADRAO):
+    """Apaga as respostas expiradas em lotes; retorna o total apagado"""
+    total = 0
+    while True:
+        ids = list(
+            RespostaIdempotente.objects.filter(expira_em__lte=timezone.now())
+            .order_by('expira_em').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return total
+        total += RespostaIdempotente.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from idempotencia.chaves import LOTE_PADRAO, limpar_expiradas
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga em lotes as respostas de Idempotency-Key expiradas '
+        '(IDEMPOTENCIA_TTL). Agende no cron ou enfileire a tarefa '
+        'idempotencia.limpar_expiradas.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO)
+    
+    def handle(self, *args, **options):
+        total = limpar_expiradas(lote=options['lote'])
+        self.stdout.write(f'{total} respostas expiradas apagadas')
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespostaIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=255, verbose_name='Chave')),
+                ('hash_requisicao', models.CharField(max_length=64, verbose_name='Hash da Requisição')),
+                ('status_http', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')),
+                ('corpo', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Corpo')),
+                ('cabecalhos', models.JSONField(blank=True, default=dict, verbose_name='Cabeçalhos')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('expira_em', models.DateTimeField(verbose_name='Expira Em')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respostas_idempotentes', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Resposta Idempotente',
+                'verbose_name_plural': 'Respostas Idempotentes',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['expira_em'], name='idempotencia_expira_idx')],
+                'unique_together': {('usuario', 'chave')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class RespostaIdempotente(models.Model):
+    """
+    Resposta gravada para um cabeçalho Idempotency-Key (ver idempotencia/chaves.py)
+    """
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='respostas_idempotentes',
+        verbose_name="Usuário"
+    )
+    
+    chave = models.CharField(max_length=255, verbose_name="Chave")
+    hash_requisicao = models.CharField(max_length=64, verbose_name="Hash da Requisição")
+    
+    status_http = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Status HTTP")
+    corpo = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Corpo")
+    cabecalhos = models.JSONField(default=dict, blank=True, verbose_name="Cabeçalhos")
+    
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    expira_em = models.DateTimeField(verbose_name="Expira Em")
+    
+    class Meta:
+        verbose_name = "Resposta Idempotente"
+        verbose_name_plural = "Respostas Idempotentes"
+        ordering = ['-data_criacao']
+        unique_together = ['usuario', 'chave']
+        indexes = [
+            models.Index(fields=['expira_em'], name='idempotencia_expira_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.chave} ({self.usuario_id}) - {self.status_http}"
@@ -0,0 +1,7 @@
+from tarefas.fila import tarefa
+from .chaves import LOTE_PADRAO, limpar_expiradas
+
+
+@tarefa(nome='idempotencia.limpar_expiradas')
+def limpar(lote=LOTE_PADRAO):
+    limpar_expiradas(lote=lote)
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from equipamentos.benchmark import popular
+from equipamentos.models import Equipamento, Orcamento
+from .chaves import limpar_expiradas
+from .models import RespostaIdempotente
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.cliente, _ = popular(2)
+        self.client.force_authenticate(self.cliente)
+    
+    def criar(self, chave, dados=None):
+        return self.client.post(reverse('orcamento-create'), dados or {}, format='json', HTTP_IDEMPOTENCY_KEY=chave)
+    
+    def test_repeticao_devolve_a_resposta_original_sem_reexecutar(self):
+        antes = Orcamento.objects.count()
+        primeira = self.criar('abc')
+        segunda = self.criar('abc')
+        
+        self.assertEqual((primeira.status_code, segunda.status_code), (201, 201))
+        self.assertEqual(segunda.json()['id'], primeira.json()['id'])
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(Orcamento.objects.count(), antes + 1)
+        
+        url = reverse('orcamento-adicionar-item', args=[primeira.json()['id']])
+        equipamento = Equipamento.objects.filter(quantidade_disponivel__gt=0).first()
+        item = {
+            'equipamento': equipamento.id, 'quantidade': 1, 'modalidade': 'diaria', 'periodo': 1,
+            'data_uso': (date.today() + timedelta(days=5)).isoformat(),
+        }
+        respostas = [self.client.post(url, item, format='json', HTTP_IDEMPOTENCY_KEY='item-1') for _ in range(2)]
+        self.assertEqual([resposta.status_code for resposta in respostas], [201, 201])
+        self.assertEqual(Orcamento.objects.get(pk=primeira.json()['id']).itens.count(), 1)
+    
+    def test_mesma_chave_com_outra_requisicao_e_recusada(self):
+        self.criar('abc', {'observacoes': 'primeira'})
+        resposta = self.criar('abc', {'observacoes': 'segunda'})
+        self.assertEqual(resposta.status_code, 422)
+    
+    def test_respostas_expiradas_liberam_a_chave(self):
+        primeira = self.criar('abc')
+        RespostaIdempotente.objects.update(expira_em=timezone.now() - timedelta(seconds=1))
+        segunda = self.criar('abc')
+        self.assertNotEqual(segunda.json()['id'], primeira.json()['id'])
+        
+        RespostaIdempotente.objects.update(expira_em=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(limpar_expiradas(lote=1), 1)
+        self.assertFalse(RespostaIdempotente.objects.exists())
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Tarefa
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ['id', 'nome', 'status', 'prioridade', 'tentativas', 'executar_em', 'worker']
+    list_filter = ['status', 'nome']
+    search_fields = ['nome', 'ultimo_erro']
+    readonly_fields = ['iniciada_em', 'renovada_em', 'concluida_em', 'data_criacao']
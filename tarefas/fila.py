@@ -0,0 +1,197 @@
+"""
+Fila de tarefas no banco de dados.
+
+    @tarefa(max_tentativas=5)
+    def reindexar_equipamento(equipamento_id): ...
+    
+    reindexar_equipamento.enfileirar({'equipamento_id': 1}, prioridade=10)
+
+A tarefa é gravada na mesma transação da requisição: se a transação for
+desfeita, a tarefa também é. Os módulos `<app>/tarefas.py` são carregados
+pelo worker (`python manage.py processar_tarefas`).
+
+Os workers reservam lotes com SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL),
+de modo que vários workers consomem a fila sem disputar as mesmas linhas. No
+SQLite, sem SKIP LOCKED, a reserva roda numa transação IMMEDIATE (um worker
+por vez) e é confirmada pelo UPDATE condicional em status='pendente'.
+
+Falhas são reexecutadas com backoff exponencial (com jitter) até
+`max_tentativas`. A reserva de uma tarefa é um lease: enquanto ela executa,
+uma thread do worker renova `renovada_em` a cada TAREFAS_INTERVALO_RENOVACAO
+segundos, e só tarefas sem renovação há TAREFAS_TIMEOUT_EXECUCAO segundos
+(worker morto ou travado) voltam à fila. Uma tarefa longa não é devolvida
+enquanto o worker estiver vivo. Antes de executar, o worker confirma com um
+UPDATE condicional que a tarefa ainda é dele: uma tarefa do fim de um lote
+demorado, devolvida à fila e pega por outro worker, não roda duas vezes.
+
+A entrega é "pelo menos uma vez": a função da tarefa confirma as próprias
+transações (os jobs em lotes fazem isso de propósito) antes do UPDATE que a
+marca como concluída. Se o worker morrer entre os dois, ou perder o lease, a
+tarefa roda de novo; por isso toda tarefa deve ser idempotente (os jobs deste
+projeto usam o próprio estado como progresso).
+"""
+import logging
+import random
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Tarefa
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = {}
+
+ORDEM_FILA = ['-prioridade', 'executar_em', 'id']
+
+
+class TarefaDesconhecida(Exception):
+    pass
+
+
+def tarefa(nome=None, max_tentativas=3, prioridade=0):
+    """Registra a função como tarefa e adiciona `funcao.enfileirar(argumentos, **opcoes)`"""
+    def decorador(funcao):
+        nome_tarefa = nome or f'{funcao.__module__}.{funcao.__name__}'
+        REGISTRO[nome_tarefa] = funcao
+        funcao.nome_tarefa = nome_tarefa
+        funcao.enfileirar = partial(
+            enfileirar, nome_tarefa, max_tentativas=max_tentativas, prioridade=prioridade
+        )
+        return funcao
+    return decorador
+
+
+def enfileirar(nome, argumentos=None, prioridade=0, atraso=None, max_tentativas=3):
+    """Cria a tarefa; `atraso` (timedelta ou segundos) adia a primeira execução"""
+    if isinstance(atraso, (int, float)):
+        atraso = timedelta(seconds=atraso)
+    return Tarefa.objects.create(
+        nome=nome,
+        argumentos=argumentos or {},
+        prioridade=prioridade,
+        max_tentativas=max_tentativas,
+        executar_em=timezone.now() + (atraso or timedelta()),
+    )
+
+
+def backoff(tentativa):
+    """Espera antes da próxima tentativa: exponencial, limitada e com jitter"""
+    base = getattr(settings, 'TAREFAS_BACKOFF_BASE', 5)
+    maximo = getattr(settings, 'TAREFAS_BACKOFF_MAXIMO', 3600)
+    espera = min(base * 2 ** (tentativa - 1), maximo)
+    return timedelta(seconds=random.uniform(espera / 2, espera))
+
+
+def reservar(worker, limite=10):
+    """Marca até `limite` tarefas prontas como 'executando' para o worker e as retorna"""
+    agora = timezone.now()
+    with transaction.atomic():
+        fila = Tarefa.objects.filter(status='pendente', executar_em__lte=agora).order_by(*ORDEM_FILA)
+        if connection.features.has_select_for_update_skip_locked:
+            fila = fila.select_for_update(skip_locked=True)
+        ids = list(fila.values_list('id', flat=True)[:limite])
+        if not ids:
+            return []
+        
+        Tarefa.objects.filter(id__in=ids, status='pendente').update(
+            status='executando', worker=worker, iniciada_em=agora, renovada_em=agora,
+            tentativas=F('tentativas') + 1,
+        )
+        return list(
+            Tarefa.objects.filter(id__in=ids, status='executando', worker=worker, iniciada_em=agora)
+            .order_by(*ORDEM_FILA)
+        )
+
+
+def executar(tarefa):
+    """
+    Executa a tarefa reservada e registra o resultado; retorna True em caso de
+    sucesso, False em falha e None se a tarefa já não pertence ao worker.
+    """
+    reservada = Tarefa.objects.filter(pk=tarefa.pk, status='executando', worker=tarefa.worker)
+    
+    # Confirma a posse e marca o início real (o lease passa a contar daqui)
+    agora = timezone.now()
+    if not reservada.update(iniciada_em=agora, renovada_em=agora):
+        logger.info(
+            'Tarefa %s (%s) devolvida à fila antes de começar; ignorada por %s', tarefa.pk, tarefa.nome, tarefa.worker
+        )
+        return None
+    
+    try:
+        funcao = REGISTRO.get(tarefa.nome)
+        if funcao is None:
+            raise TarefaDesconhecida(tarefa.nome)
+        with renovando(tarefa):
+            funcao(**tarefa.argumentos)
+    except Exception:
+        erro = traceback.format_exc()
+        if tarefa.tentativas < tarefa.max_tentativas:
+            reservada.update(
+                status='pendente', worker='', ultimo_erro=erro,
+                executar_em=timezone.now() + backoff(tarefa.tentativas),
+            )
+        else:
+            reservada.update(status='falhou', worker='', ultimo_erro=erro, concluida_em=timezone.now())
+        logger.warning('Tarefa %s (%s) falhou na tentativa %s', tarefa.pk, tarefa.nome, tarefa.tentativas)
+        return False
+    
+    reservada.update(status='concluida', concluida_em=timezone.now())
+    return True
+
+
+@contextmanager
+def renovando(tarefa):
+    """Renova o lease da tarefa numa thread enquanto o bloco executa"""
+    intervalo = getattr(settings, 'TAREFAS_INTERVALO_RENOVACAO', 30)
+    parar = threading.Event()
+    
+    def renovar():
+        try:
+            while not parar.wait(intervalo):
+                renovadas = Tarefa.objects.filter(pk=tarefa.pk, status='executando', worker=tarefa.worker).update(
+                    renovada_em=timezone.now()
+                )
+                if not renovadas:
+                    logger.warning('Tarefa %s (%s) não pertence mais a %s', tarefa.pk, tarefa.nome, tarefa.worker)
+                    return
+        except Exception:
+            logger.exception('Falha ao renovar a tarefa %s (%s)', tarefa.pk, tarefa.nome)
+        finally:
+            # Conexões do Django são por thread: fecha a desta
+            connections.close_all()
+    
+    thread = threading.Thread(target=renovar, name=f'renovacao-tarefa-{tarefa.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        thread.join()
+
+
+def liberar(tarefas):
+    """Devolve à fila tarefas reservadas que não chegaram a ser executadas (só as ainda do worker)"""
+    for worker in {tarefa.worker for tarefa in tarefas}:
+        Tarefa.objects.filter(
+            pk__in=[tarefa.pk for tarefa in tarefas if tarefa.worker == worker], status='executando', worker=worker
+        ).update(status='pendente', worker='', tentativas=F('tentativas') - 1)
+
+
+def recuperar_presas():
+    """Tarefas em 'executando' com o lease vencido (worker morto ou travado) voltam à fila ou falham"""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'TAREFAS_TIMEOUT_EXECUCAO', 120))
+    presas = Tarefa.objects.filter(status='executando', renovada_em__lt=limite)
+    
+    esgotadas = presas.filter(tentativas__gte=F('max_tentativas')).update(
+        status='falhou', worker='', ultimo_erro='Tempo de execução esgotado', concluida_em=timezone.now()
+    )
+    devolvidas = presas.update(status='pendente', worker='', ultimo_erro='Tempo de execução esgotado')
+    return devolvidas + esgotadas
@@ -0,0 +1,64 @@
+import os
+import signal
+import socket
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import autodiscover_modules
+from tarefas.fila import executar, liberar, recuperar_presas, reservar
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da fila de tarefas: reserva lotes de tarefas pendentes por '
+        'prioridade e as executa. Vários workers podem rodar em paralelo. '
+        'SIGTERM/SIGINT encerram após a tarefa em execução.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=10, help='Tarefas reservadas por vez')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Espera (s) quando a fila está vazia')
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e termina')
+        parser.add_argument('--worker', default=f'{socket.gethostname()}:{os.getpid()}')
+    
+    def handle(self, *args, **options):
+        autodiscover_modules('tarefas')
+        worker = options['worker']
+        self.parar = False
+        signal.signal(signal.SIGTERM, self.sinalizar_parada)
+        signal.signal(signal.SIGINT, self.sinalizar_parada)
+        
+        executadas = falhas = 0
+        ultima_recuperacao = 0.0
+        self.stdout.write(f'Worker {worker} iniciado')
+        
+        while not self.parar:
+            close_old_connections()
+            
+            if time.monotonic() - ultima_recuperacao > 60:
+                recuperadas = recuperar_presas()
+                if recuperadas:
+                    self.stdout.write(f'{recuperadas} tarefas presas devolvidas à fila')
+                ultima_recuperacao = time.monotonic()
+            
+            tarefas = reservar(worker, options['lote'])
+            if not tarefas:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+            
+            for indice, tarefa in enumerate(tarefas):
+                if self.parar:
+                    liberar(tarefas[indice:])
+                    break
+                resultado = executar(tarefa)
+                if resultado:
+                    executadas += 1
+                elif resultado is not None:
+                    falhas += 1
+        
+        self.stdout.write(f'Worker {worker} encerrado: {executadas} executadas, {falhas} falhas')
+    
+    def sinalizar_parada(self, signum, frame):
+        self.parar = True
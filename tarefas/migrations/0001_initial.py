@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome')),
+                ('argumentos', models.JSONField(blank=True, default=dict, verbose_name='Argumentos')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('prioridade', models.SmallIntegerField(default=0, verbose_name='Prioridade')),
+                ('executar_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Executar Em')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_tentativas', models.PositiveIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada Em')),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída Em')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'executar_em', 'prioridade'], name='tarefa_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copiar_inicio(apps, schema_editor):
+    # Tarefas em execução durante a migração: o lease começa no início delas
+    Tarefa = apps.get_model('tarefas', 'Tarefa')
+    Tarefa.objects.filter(status='executando').update(renovada_em=F('iniciada_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarefa',
+            name='renovada_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Renovada Em'),
+        ),
+        migrations.RunPython(copiar_inicio, migrations.RunPython.noop),
+    ]
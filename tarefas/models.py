@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tarefa(models.Model):
+    """
+    Tarefa da fila de processamento em segundo plano (ver tarefas/fila.py)
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+    
+    nome = models.CharField(max_length=100, verbose_name="Nome")
+    argumentos = models.JSONField(default=dict, blank=True, verbose_name="Argumentos")
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pendente',
+        verbose_name="Status"
+    )
+    
+    prioridade = models.SmallIntegerField(default=0, verbose_name="Prioridade")
+    executar_em = models.DateTimeField(default=timezone.now, verbose_name="Executar Em")
+    
+    tentativas = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    max_tentativas = models.PositiveIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    ultimo_erro = models.TextField(blank=True, verbose_name="Último Erro")
+    
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    iniciada_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada Em")
+    # Lease do worker: renovado enquanto a tarefa executa (tarefas/fila.py)
+    renovada_em = models.DateTimeField(null=True, blank=True, verbose_name="Renovada Em")
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluída Em")
+    
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
+    
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-data_criacao']
+        indexes = [
+            # Busca das próximas tarefas: pendentes, já liberadas, por prioridade
+            models.Index(fields=['status', 'executar_em', 'prioridade'], name='tarefa_fila_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Tarefa #{self.id} - {self.nome} ({self.status})"
@@ -0,0 +1,131 @@
+import time
+from datetime import timedelta
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from .fila import enfileirar, executar, liberar, recuperar_presas, reservar, tarefa
+from .models import Tarefa
+
+
+executadas = []
+
+
+@tarefa(nome='teste.registrar')
+def registrar(valor):
+    executadas.append(valor)
+
+
+@tarefa(nome='teste.recuperar')
+def recuperar():
+    # Outro worker procurando tarefas presas enquanto esta executa
+    executadas.append(recuperar_presas())
+
+
+@tarefa(nome='teste.demorada')
+def demorada(duracao):
+    # Roda por mais que o timeout; outro worker procura tarefas presas no fim
+    time.sleep(duracao)
+    executadas.append(recuperar_presas())
+
+
+@tarefa(nome='teste.falhar', max_tentativas=2)
+def falhar():
+    raise RuntimeError('falha proposital')
+
+
+class FilaTarefasTests(TestCase):
+    def setUp(self):
+        executadas.clear()
+    
+    def test_reserva_por_prioridade_e_ignora_futuras(self):
+        registrar.enfileirar({'valor': 'baixa'})
+        registrar.enfileirar({'valor': 'alta'}, prioridade=10)
+        registrar.enfileirar({'valor': 'futura'}, prioridade=99, atraso=60)
+        
+        tarefas = reservar('w1', limite=10)
+        self.assertEqual([t.argumentos['valor'] for t in tarefas], ['alta', 'baixa'])
+        self.assertEqual(reservar('w2', limite=10), [])
+        
+        for t in tarefas:
+            self.assertTrue(executar(t))
+        self.assertEqual(executadas, ['alta', 'baixa'])
+        self.assertEqual(Tarefa.objects.filter(status='concluida').count(), 2)
+    
+    @override_settings(TAREFAS_BACKOFF_BASE=10)
+    def test_falha_reagenda_com_backoff_e_depois_desiste(self):
+        falhar.enfileirar()
+        
+        (t,) = reservar('w1')
+        self.assertFalse(executar(t))
+        t.refresh_from_db()
+        self.assertEqual((t.status, t.tentativas), ('pendente', 1))
+        self.assertGreater(t.executar_em, timezone.now() + timedelta(seconds=4))
+        self.assertIn('falha proposital', t.ultimo_erro)
+        
+        Tarefa.objects.update(executar_em=timezone.now())
+        (t,) = reservar('w1')
+        self.assertFalse(executar(t))
+        t.refresh_from_db()
+        self.assertEqual((t.status, t.tentativas), ('falhou', 2))
+    
+    def test_tarefa_desconhecida_falha(self):
+        enfileirar('nao.existe', max_tentativas=1)
+        (t,) = reservar('w1')
+        self.assertFalse(executar(t))
+        self.assertEqual(Tarefa.objects.get().status, 'falhou')
+    
+    def test_liberar_e_recuperar_presas(self):
+        registrar.enfileirar({'valor': 1})
+        registrar.enfileirar({'valor': 2})
+        
+        liberar(reservar('w1'))
+        self.assertEqual(set(Tarefa.objects.values_list('status', 'tentativas')), {('pendente', 0)})
+        
+        reservar('w1')
+        Tarefa.objects.update(renovada_em=timezone.now() - timedelta(hours=1))
+        self.assertEqual(recuperar_presas(), 2)
+        self.assertEqual(len(reservar('w2')), 2)
+    
+    def test_tarefa_devolvida_durante_o_lote_nao_roda_duas_vezes(self):
+        enfileirar('teste.recuperar')
+        registrar.enfileirar({'valor': 'fim do lote'})
+        lote = reservar('w1')
+        # O lote foi reservado há mais que o timeout
+        Tarefa.objects.update(renovada_em=timezone.now() - timedelta(hours=1))
+        
+        # A tarefa em execução tem o lease renovado; só o fim do lote, ainda não iniciado, volta à fila
+        self.assertTrue(executar(lote[0]))
+        self.assertEqual(executadas, [1])
+        
+        (outra,) = reservar('w2')
+        self.assertEqual(outra.pk, lote[1].pk)
+        self.assertIsNone(executar(lote[1]))
+        liberar(lote[1:])
+        self.assertTrue(executar(outra))
+        self.assertEqual(executadas, [1, 'fim do lote'])
+        
+        tarefa_final = Tarefa.objects.get(pk=outra.pk)
+        self.assertEqual((tarefa_final.status, tarefa_final.worker, tarefa_final.tentativas), ('concluida', 'w2', 2))
+
+
+@override_settings(TAREFAS_TIMEOUT_EXECUCAO=0.2, TAREFAS_INTERVALO_RENOVACAO=0.05)
+class LeaseTarefasTests(TransactionTestCase):
+    """Renovação do lease em uma thread do worker (commits reais)"""
+    
+    def setUp(self):
+        executadas.clear()
+    
+    def test_tarefa_longa_renovada_nao_e_devolvida(self):
+        enfileirar('teste.demorada', {'duracao': 0.6})
+        (t,) = reservar('w1')
+        self.assertTrue(executar(t))
+        self.assertEqual(executadas, [0])
+        t.refresh_from_db()
+        self.assertEqual((t.status, t.worker, t.tentativas), ('concluida', 'w1', 1))
+        self.assertGreater(t.renovada_em, t.iniciada_em)
+    
+    def test_lease_sem_renovacao_volta_a_fila(self):
+        enfileirar('teste.demorada', {'duracao': 0})
+        reservar('w1')
+        time.sleep(0.3)
+        self.assertEqual(recuperar_presas(), 1)
+        self.assertEqual(Tarefa.objects.get().status, 'pendente')